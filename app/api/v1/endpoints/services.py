@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, AsyncIterator, Optional
 from app.core.orchestrator import ChatbotOrchestrator
 from app.models.service import ServiceCreate, ServiceUpdate, ServiceResponse
-from app.core.dependencies import get_orchestrator
+from app.core.dependencies import get_orchestrator, get_registry
+from app.core.fanout import get_aggregation_policy
+from app.core.registry import ServiceRegistry
+from app.core.serialization import FastJSONResponse, RawJSONResponse, dumps
+import json
 import logging
+import math
 
 router = APIRouter()
 
@@ -14,7 +20,8 @@ logger = logging.getLogger(__name__)
 @router.post("/", response_model=ServiceResponse)
 async def register_service(
     service: ServiceCreate,
-    orchestrator: ChatbotOrchestrator = Depends(get_orchestrator)
+    orchestrator: ChatbotOrchestrator = Depends(get_orchestrator),
+    registry: Optional[ServiceRegistry] = Depends(get_registry)
 ) -> ServiceResponse:
     """
     Register a new bot service with the orchestrator.
@@ -22,12 +29,16 @@ async def register_service(
     Args:
         service (ServiceCreate): The service to be registered.
         orchestrator (ChatbotOrchestrator): The orchestrator dependency.
+        registry (ServiceRegistry, optional): The shared registry, through
+            which the service is registered on every worker.
 
     Returns:
         ServiceResponse: The response after registering the service.
     """
     try:
         logger.info("Registering new service: %s", service.name)
+        if registry is not None:
+            return await registry.register(service)
         return await orchestrator.register_service(service)
     except ValueError as e:
         logger.error("Error registering service: %s", str(e))
@@ -41,27 +52,115 @@ async def list_services(
     orchestrator: ChatbotOrchestrator = Depends(get_orchestrator)
 ):
     """List all registered bot services."""
-    return orchestrator.get_available_services()
+    payload = orchestrator.get_services_payload(
+        lambda services: dumps([ServiceResponse.from_orm(service).dict() for service in services])
+    )
+    return RawJSONResponse(payload)
 
 @router.post("/query", response_model=Dict[str, Any])
 async def process_query(
     query: str,
+    capabilities: Optional[List[str]] = Query(None),
+    aggregation: Optional[str] = Query(None),
+    k: Optional[int] = Query(None),
+    deadline: Optional[float] = Query(None),
     orchestrator: ChatbotOrchestrator = Depends(get_orchestrator)
 ):
-    """Process a query through the appropriate bot service."""
-    response = await orchestrator.process_query(query)
+    """
+    Process a query through the appropriate bot service.
+
+    With ``aggregation`` (first_successful, first_k or best_confidence), the
+    query fans out to several capable services at once and their answers
+    are combined; ``k`` and ``deadline`` tune the policy.
+    """
+    if aggregation is not None:
+        options = {"deadline": deadline}
+        if k is not None:
+            if aggregation != "first_k":
+                raise HTTPException(status_code=400, detail="k only applies to first_k aggregation")
+            options["k"] = k
+        try:
+            policy = get_aggregation_policy(aggregation, **options)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        response = await orchestrator.fan_out(query, capabilities, policy)
+    else:
+        response = await orchestrator.process_query(query, capabilities)
     if "error" in response:
-        raise HTTPException(status_code=404, detail=response["error"])
-    return response
+        headers = None
+        if response.get("retry_after") is not None:
+            headers = {"Retry-After": str(math.ceil(response["retry_after"]))}
+        raise HTTPException(
+            status_code=response.get("status_code", 404),
+            detail=response["error"],
+            headers=headers
+        )
+    # Backend responses are plain JSON data; skip re-validating them against the response model
+    return FastJSONResponse(response)
+
+async def _sse_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Format orchestrator stream events as Server-Sent Events."""
+    service = None
+    async for event in events:
+        if "error" in event:
+            yield f"event: error\ndata: {json.dumps(event)}\n\n"
+            return
+        service = event["service"]
+        yield f"data: {json.dumps(event)}\n\n"
+    yield f"event: done\ndata: {json.dumps({'service': service})}\n\n"
+
+@router.post("/query/stream")
+async def stream_query(
+    query: str,
+    capabilities: Optional[List[str]] = Query(None),
+    orchestrator: ChatbotOrchestrator = Depends(get_orchestrator)
+):
+    """Process a query, streaming response chunks as Server-Sent Events."""
+    return StreamingResponse(
+        _sse_events(orchestrator.stream_query(query, capabilities)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/query/ws")
+async def query_websocket(
+    websocket: WebSocket,
+    orchestrator: ChatbotOrchestrator = Depends(get_orchestrator)
+):
+    """
+    Process queries over a WebSocket, forwarding response chunks as they arrive.
+
+    Each text message received is treated as a query; chunks are sent back as
+    JSON objects, followed by ``{"done": true, "service": ...}`` per query.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            query = await websocket.receive_text()
+            service = None
+            async for event in orchestrator.stream_query(query):
+                if "error" in event:
+                    await websocket.send_json(event)
+                    break
+                service = event["service"]
+                await websocket.send_json(event)
+            else:
+                await websocket.send_json({"done": True, "service": service})
+    except WebSocketDisconnect:
+        logger.info("WebSocket client disconnected")
 
 @router.delete("/{service_name}")
 async def deregister_service(
     service_name: str,
-    orchestrator: ChatbotOrchestrator = Depends(get_orchestrator)
+    orchestrator: ChatbotOrchestrator = Depends(get_orchestrator),
+    registry: Optional[ServiceRegistry] = Depends(get_registry)
 ):
     """Remove a bot service from the orchestrator."""
     try:
-        orchestrator.deregister_service(service_name)
+        if registry is not None:
+            await registry.deregister(service_name)
+        else:
+            orchestrator.deregister_service(service_name)
         return {"message": f"Service {service_name} successfully deregistered"}
     except KeyError:
         raise HTTPException(
@@ -0,0 +1,126 @@
+from typing import Any, Deque, Dict, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import time
+
+class ServiceOverloadedError(Exception):
+    """Exception raised when a service cannot admit another request."""
+
+    def __init__(self, service_name: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(f"Service {service_name} is overloaded: {reason}")
+        self.service_name = service_name
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Per-service admission control: a concurrency limit with a bounded FIFO queue.
+
+    Requests beyond ``max_concurrent`` wait in a queue of at most
+    ``max_queue_depth`` entries for up to ``max_queue_wait`` seconds. When the
+    queue is full the request is rejected immediately, so a burst is shed at
+    the door instead of piling coroutines onto one backend.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        max_concurrent: int,
+        max_queue_depth: int,
+        max_queue_wait: float
+    ):
+        self.service_name = service_name
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self.max_queue_wait = max_queue_wait
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_queue_timeout = 0
+        self.total_queue_wait = 0.0
+        self.max_observed_queue_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot.
+
+        Raises:
+            ServiceOverloadedError: If the queue is full or the wait times out.
+        """
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self.queue_depth >= self.max_queue_depth:
+            self.rejected_queue_full += 1
+            raise ServiceOverloadedError(self.service_name, "queue full", self.max_queue_wait)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        start_time = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_queue_wait)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.rejected_queue_timeout += 1
+            raise ServiceOverloadedError(self.service_name, "queue wait timed out", self.max_queue_wait)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        finally:
+            waited = time.monotonic() - start_time
+            self.total_queue_wait += waited
+            self.max_observed_queue_wait = max(self.max_observed_queue_wait, waited)
+        self.admitted += 1
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        """Leave the queue, passing the slot on if it was granted meanwhile."""
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the oldest waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot for the duration of the block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and rejection counters."""
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "queued_requests": self.queued,
+            "rejected_requests": self.rejected_queue_full + self.rejected_queue_timeout,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_queue_timeout": self.rejected_queue_timeout,
+            "average_queue_wait": self.total_queue_wait / self.queued if self.queued else 0.0,
+            "max_queue_wait": self.max_observed_queue_wait
+        }
@@ -0,0 +1,121 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+import bisect
+import time
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+BATCH_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Fixed-bucket histogram; each bucket counts observations up to its bound."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-bucket counts keyed by upper bound, plus count and sum."""
+        labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "sum": self.sum
+        }
+
+class MicroBatcher:
+    """
+    Collect concurrent submissions into batches sent as one upstream call.
+
+    A batch is sent once ``max_batch_size`` items are waiting or ``max_wait``
+    seconds after its first item arrived, whichever comes first. Results
+    are fanned back out to each submitter in order; ``send_batch`` may
+    return an exception in place of a result to fail just that item.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        max_wait: float
+    ):
+        self.send_batch = send_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sends: Set[asyncio.Task] = set()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.batch_latency = Histogram(BATCH_LATENCY_BUCKETS)
+
+    async def submit(self, item: Any) -> Any:
+        """Add an item to the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Send whatever is waiting now instead of at the end of the window."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Submitters that gave up (timed out or disconnected) are dropped
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        send = asyncio.create_task(self._send(batch))
+        self._sends.add(send)
+        send.add_done_callback(self._sends.discard)
+
+    async def _send(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        start_time = time.monotonic()
+        try:
+            results = await self.send_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch of {len(batch)} returned {len(results)} results")
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.batch_sizes.observe(len(batch))
+            self.batch_latency.observe(time.monotonic() - start_time)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Send any waiting items and wait for in-flight batches."""
+        self.flush()
+        await asyncio.gather(*self._sends, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch size and batch latency histograms."""
+        return {
+            "pending": len(self._pending),
+            "in_flight_batches": len(self._sends),
+            "batch_size": self.batch_sizes.get_stats(),
+            "batch_latency": self.batch_latency.get_stats()
+        }
@@ -0,0 +1,125 @@
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import sys
+import time
+
+class LRUCache:
+    """
+    In-process LRU cache bounded by entry count and approximate size in bytes.
+
+    Entries may carry a TTL; expired entries are dropped lazily on access.
+    Hit, miss and eviction counters are kept so the cache can be sized from
+    production traffic.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        sizeof: Callable[[Any], int] = sys.getsizeof
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._live_entry(key) is not None
+
+    def _live_entry(self, key: Hashable) -> Optional[Tuple[Any, int, Optional[float]]]:
+        """Return the entry for a key, dropping it if it has expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at = entry[2]
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._remove(key)
+            return None
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, marking it as most recently used."""
+        entry = self._live_entry(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value without touching recency or the hit counters."""
+        entry = self._live_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Cache a value, evicting least recently used entries to stay in bounds.
+
+        Args:
+            key: Cache key.
+            value: Value to cache.
+            ttl (float, optional): Lifetime in seconds, overriding ``ttl_seconds``.
+        """
+        if ttl is None:
+            ttl = self.ttl_seconds
+        if ttl is not None and ttl <= 0:
+            self.invalidate(key)
+            return
+
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Never worth evicting the whole cache for a single oversized value
+            self.invalidate(key)
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a key from the cache, returning whether it was present."""
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) * 100 if lookups else 0.0
+        }
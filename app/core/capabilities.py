@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, List, Optional, Set
+import re
+from app.core.config import settings
+
+class CapabilityIndex:
+    """Inverted index from capability to the names of services providing it."""
+
+    def __init__(self):
+        self._index: Dict[str, Set[str]] = {}
+
+    def add(self, service_name: str, capabilities: Iterable[str]) -> None:
+        """Index a service under each of its capabilities."""
+        for capability in capabilities:
+            self._index.setdefault(capability, set()).add(service_name)
+
+    def remove(self, service_name: str, capabilities: Iterable[str]) -> None:
+        """Drop a service from the index."""
+        for capability in capabilities:
+            names = self._index.get(capability)
+            if names is None:
+                continue
+            names.discard(service_name)
+            if not names:
+                del self._index[capability]
+
+    def lookup(self, capabilities: Iterable[str]) -> Set[str]:
+        """
+        Get the services providing every one of the given capabilities.
+
+        Starts from the smallest posting set, so the cost is proportional to
+        the number of matching services rather than all registered ones.
+        """
+        postings = [self._index.get(capability, set()) for capability in capabilities]
+        if not postings:
+            return set()
+        postings.sort(key=len)
+        smallest, rest = postings[0], postings[1:]
+        return {name for name in smallest if all(name in other for other in rest)}
+
+    def capabilities(self) -> List[str]:
+        """List every indexed capability."""
+        return list(self._index)
+
+class QueryClassifier:
+    """
+    Map a query to the capabilities it requires using keyword/regex rules.
+
+    All rules are compiled into a single alternation, so classifying a query
+    is one regex pass regardless of how many rules are configured.
+
+    Args:
+        rules (Dict[str, List[str]]): Regex patterns per capability. Plain
+            words match case-insensitively on word boundaries. Named groups
+            are not allowed in the patterns.
+
+    Raises:
+        ValueError: If a pattern defines a named group.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, List[str]]] = None):
+        if rules is None:
+            rules = settings.CAPABILITY_RULES
+        self._group_capabilities: Dict[str, str] = {}
+        alternatives = []
+        for i, (capability, patterns) in enumerate(rules.items()):
+            if not patterns:
+                continue
+            for pattern in patterns:
+                # The combined regex tells capabilities apart by its own group
+                # names, which a named group in a rule could shadow or redefine
+                if re.compile(pattern).groupindex:
+                    raise ValueError(
+                        f"Capability rule {pattern!r} for {capability!r} must not use named groups"
+                    )
+            group = f"c{i}"
+            self._group_capabilities[group] = capability
+            joined = "|".join(
+                rf"\b{pattern}\b" if pattern.isalnum() else pattern for pattern in patterns
+            )
+            alternatives.append(f"(?P<{group}>{joined})")
+        self._pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+
+    def classify(self, query: str) -> Set[str]:
+        """Get the capabilities a query requires, empty when any service will do."""
+        if self._pattern is None:
+            return set()
+        return {
+            self._group_capabilities[match.lastgroup]
+            for match in self._pattern.finditer(query)
+        }
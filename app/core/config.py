@@ -1,5 +1,7 @@
 from pydantic import BaseSettings, validator
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, cast
+from functools import lru_cache
+import json
 import os
 
 class Settings(BaseSettings):
@@ -17,6 +19,13 @@ class Settings(BaseSettings):
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
     REDIS_URL: str = f"redis://{REDIS_HOST}:{REDIS_PORT}"
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_POOL_TIMEOUT_SECONDS: float = float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", 5.0))
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", 5.0))
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS", 2.0))
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL_SECONDS", 30))
+    # 3 switches to RESP3 (requires Redis 6+); hiredis is used automatically when installed
+    REDIS_PROTOCOL: int = int(os.getenv("REDIS_PROTOCOL", 2))
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -24,19 +33,108 @@ class Settings(BaseSettings):
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", 60))
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    # JSON object mapping model -> requests per minute across all clients
+    MODEL_RATE_LIMITS: Dict[str, int] = json.loads(os.getenv("MODEL_RATE_LIMITS", "{}"))
+    # Share of a client's remaining tokens a worker may admit without asking Redis
+    RATE_LIMIT_LOCAL_FRACTION: float = float(os.getenv("RATE_LIMIT_LOCAL_FRACTION", 0.1))
+    RATE_LIMIT_LOCAL_SYNC_SECONDS: float = float(os.getenv("RATE_LIMIT_LOCAL_SYNC_SECONDS", 1.0))
+    # How long to allow requests without trying Redis after it fails
+    RATE_LIMIT_FAILURE_BACKOFF_SECONDS: float = float(os.getenv("RATE_LIMIT_FAILURE_BACKOFF_SECONDS", 5.0))
     
+    # Metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+
+    # Startup: build the HTTP/Redis clients during startup rather than on the first request
+    STARTUP_PREWARM_CLIENTS: bool = os.getenv("STARTUP_PREWARM_CLIENTS", "True").lower() == "true"
+    # Load the default model's tokenizer in the background once the app has started
+    STARTUP_PREWARM_TOKENIZER: bool = os.getenv("STARTUP_PREWARM_TOKENIZER", "True").lower() == "true"
+
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
     # Model Configurations
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama2")
+    # How long Ollama keeps a model loaded after a request (Ollama duration, e.g. "30m"; "-1" = forever)
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    # Models pinged in the background to stay resident; defaults to OLLAMA_MODEL
+    OLLAMA_KEEP_WARM_MODELS: List[str] = [m for m in os.getenv("OLLAMA_KEEP_WARM_MODELS", "").split(",") if m]
+    OLLAMA_KEEP_WARM_INTERVAL_SECONDS: float = float(os.getenv("OLLAMA_KEEP_WARM_INTERVAL_SECONDS", 240.0))
+    OLLAMA_TIMEOUT_SECONDS: float = float(os.getenv("OLLAMA_TIMEOUT_SECONDS", 120.0))
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     
     # Service Configuration
     DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "gpt-3.5-turbo")
     MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", 2000))
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", 0.7))
-    
+    # Context window assumed for models missing from app.core.tokens.MODEL_CONTEXT_WINDOWS
+    DEFAULT_CONTEXT_WINDOW_TOKENS: int = int(os.getenv("DEFAULT_CONTEXT_WINDOW_TOKENS", 4096))
+    # How long token counts are approximated after a tokenizer fails to load, before it is retried
+    TOKENIZER_RETRY_SECONDS: float = float(os.getenv("TOKENIZER_RETRY_SECONDS", 60.0))
+    SUMMARIZE_EVICTED_HISTORY: bool = os.getenv("SUMMARIZE_EVICTED_HISTORY", "False").lower() == "true"
+    HISTORY_SUMMARY_MAX_TOKENS: int = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", 256))
+
+    # Shared Service Registry
+    REGISTRY_ENABLED: bool = os.getenv("REGISTRY_ENABLED", "True").lower() == "true"
+    REGISTRY_LOAD_SYNC_SECONDS: float = float(os.getenv("REGISTRY_LOAD_SYNC_SECONDS", 1.0))
+
+    # Routing
+    ROUTING_STRATEGY: str = os.getenv("ROUTING_STRATEGY", "least_outstanding")
+    ROUTING_EWMA_ALPHA: float = float(os.getenv("ROUTING_EWMA_ALPHA", 0.3))
+    # JSON object mapping capability -> keyword/regex patterns for query classification
+    CAPABILITY_RULES: Dict[str, List[str]] = json.loads(os.getenv("CAPABILITY_RULES", "{}"))
+
+    # Admission Control (per-service queues, used when max_concurrent_requests is set)
+    SERVICE_MAX_QUEUE_DEPTH: int = int(os.getenv("SERVICE_MAX_QUEUE_DEPTH", 100))
+    SERVICE_MAX_QUEUE_WAIT_SECONDS: float = float(os.getenv("SERVICE_MAX_QUEUE_WAIT_SECONDS", 5.0))
+
+    # Micro-batching (for services whose backend accepts batch inputs)
+    MICRO_BATCHING_ENABLED: bool = os.getenv("MICRO_BATCHING_ENABLED", "True").lower() == "true"
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", 16))
+    BATCH_MAX_WAIT_SECONDS: float = float(os.getenv("BATCH_MAX_WAIT_SECONDS", 0.01))
+
+    # Circuit Breakers and Health Checks
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5))
+    CIRCUIT_BREAKER_SUCCESS_THRESHOLD: int = int(os.getenv("CIRCUIT_BREAKER_SUCCESS_THRESHOLD", 2))
+    CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS", 30.0))
+    # Concurrent trial requests a half-open service admits; the rest spill over to other services
+    CIRCUIT_BREAKER_HALF_OPEN_MAX_REQUESTS: int = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_MAX_REQUESTS", 1))
+    CIRCUIT_BREAKER_LATENCY_SLO_SECONDS: Optional[float] = (
+        float(os.environ["CIRCUIT_BREAKER_LATENCY_SLO_SECONDS"])
+        if os.getenv("CIRCUIT_BREAKER_LATENCY_SLO_SECONDS") else None
+    )
+    HEALTH_CHECK_ENABLED: bool = os.getenv("HEALTH_CHECK_ENABLED", "True").lower() == "true"
+    HEALTH_CHECK_INTERVAL_SECONDS: float = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", 15.0))
+    HEALTH_CHECK_JITTER: float = float(os.getenv("HEALTH_CHECK_JITTER", 0.2))
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", 5.0))
+
+    # Retries and Hedging
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", 2))
+    RETRY_BACKOFF_SECONDS: float = float(os.getenv("RETRY_BACKOFF_SECONDS", 0.1))
+    RETRY_MAX_BACKOFF_SECONDS: float = float(os.getenv("RETRY_MAX_BACKOFF_SECONDS", 2.0))
+    RETRY_BUDGET_RATIO: float = float(os.getenv("RETRY_BUDGET_RATIO", 0.1))
+    RETRY_BUDGET_MIN_PER_SECOND: float = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", 1.0))
+    RETRY_BUDGET_WINDOW_SECONDS: float = float(os.getenv("RETRY_BUDGET_WINDOW_SECONDS", 10.0))
+    HEDGING_ENABLED: bool = os.getenv("HEDGING_ENABLED", "False").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", 95.0))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+    HEDGE_DEFAULT_DELAY_SECONDS: float = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", 1.0))
+    # Fan-out: how many capable services a query goes to, and when to stop waiting
+    FANOUT_MAX_SERVICES: int = int(os.getenv("FANOUT_MAX_SERVICES", 3))
+    FANOUT_K: int = int(os.getenv("FANOUT_K", 2))
+    FANOUT_DEADLINE_SECONDS: float = float(os.getenv("FANOUT_DEADLINE_SECONDS", 10.0))
+    SINGLEFLIGHT_ENABLED: bool = os.getenv("SINGLEFLIGHT_ENABLED", "True").lower() == "true"
+    LATENCY_WINDOW_SIZE: int = int(os.getenv("LATENCY_WINDOW_SIZE", 256))
+
+    # Upstream HTTP Connection Pool
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "True").lower() == "true"
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", 30.0))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", 5.0))
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", 30.0))
+
     # Model Authorization
     AUTHORIZED_MODELS: List[str] = os.getenv("AUTHORIZED_MODELS", "gpt-3.5-turbo,claude-2,llama2").split(",")
     MODEL_AUTHORIZATION_ENABLED: bool = os.getenv("MODEL_AUTHORIZATION_ENABLED", "True").lower() == "true"
@@ -44,6 +142,22 @@ class Settings(BaseSettings):
     # Conversation Management
     MAX_CONVERSATION_HISTORY: int = int(os.getenv("MAX_CONVERSATION_HISTORY", 10))
     CONVERSATION_TIMEOUT_MINUTES: int = int(os.getenv("CONVERSATION_TIMEOUT_MINUTES", 30))
+    CONVERSATION_CACHE_ENABLED: bool = os.getenv("CONVERSATION_CACHE_ENABLED", "False").lower() == "true"
+    CONVERSATION_CACHE_MAX_ENTRIES: int = int(os.getenv("CONVERSATION_CACHE_MAX_ENTRIES", 10000))
+    CONVERSATION_CACHE_MAX_BYTES: int = int(os.getenv("CONVERSATION_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    CONVERSATION_CACHE_TTL_SECONDS: float = float(os.getenv("CONVERSATION_CACHE_TTL_SECONDS", 60.0))
+    # Storage format for new messages: "msgpack" (compact binary) or "json".
+    # Both formats are always readable; use "json" until every worker can read msgpack.
+    CONVERSATION_CODEC: str = os.getenv("CONVERSATION_CODEC", "msgpack")
+    CONVERSATION_COMPRESS_THRESHOLD_BYTES: int = int(os.getenv("CONVERSATION_COMPRESS_THRESHOLD_BYTES", 512))
+    CONVERSATION_COMPRESSION_LEVEL: int = int(os.getenv("CONVERSATION_COMPRESSION_LEVEL", 3))
+
+    # Response Cache
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "False").lower() == "true"
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 3600.0))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 10000))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    RESPONSE_CACHE_ALLOW_NONZERO_TEMPERATURE: bool = os.getenv("RESPONSE_CACHE_ALLOW_NONZERO_TEMPERATURE", "False").lower() == "true"
     
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: str | List[str]) -> List[str]:
@@ -55,4 +169,23 @@ class Settings(BaseSettings):
         case_sensitive = True
         env_file = ".env"
 
-settings = Settings()
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Load the settings from the environment and .env file, once."""
+    return Settings()
+
+class _LazySettings:
+    """
+    The application settings, loaded on first use.
+
+    Modules import ``settings`` and read it when called rather than at import,
+    so importing them does not parse the environment.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+settings = cast(Settings, _LazySettings())
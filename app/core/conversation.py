@@ -1,25 +1,133 @@
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional, AsyncIterator, Any
 from datetime import datetime, timedelta
+import asyncio
 import json
+import time
+import uuid
 from app.core.config import settings
-import aioredis
+from app.core.cache import LRUCache
+from app.core.conversation_codec import ConversationCodec, format_timestamp, get_codec, parse_timestamp
+from app.core.metrics import redis_timer, stats_collector
+from app.core.redis_client import Pipelined, get_redis_client
+from app.core.tokens import load_token_counter
 from app.core.orchestrator import ModelAuthorizationError
 
+if TYPE_CHECKING:
+    import redis.asyncio as redis
+
+# Remove conversations from the active index, with their keys, only if they
+# are still expired, so one that got a new message since it was listed stays.
+#
+# KEYS: active index, then the messages, meta and legacy keys of each conversation
+# ARGV: cutoff score, then the conversation IDs
+# Returns: the number of conversations removed
+PRUNE_SCRIPT = """
+local cutoff = tonumber(ARGV[1])
+local pruned = 0
+for i = 2, #ARGV do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) <= cutoff then
+        local base = 3 * (i - 2) + 1
+        redis.call('DEL', KEYS[base + 1], KEYS[base + 2], KEYS[base + 3])
+        redis.call('ZREM', KEYS[1], ARGV[i])
+        pruned = pruned + 1
+    end
+end
+return pruned
+"""
+
+# Delete a legacy conversation blob only if it is unchanged since it was read.
+#
+# KEYS: legacy key
+# ARGV: the value read
+# Returns: 1 if deleted, else 0
+DELETE_UNCHANGED_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
 class ConversationManager:
-    def __init__(self, redis_url: str = settings.REDIS_URL):
-        self.redis = aioredis.from_url(redis_url, decode_responses=True)
+    # Sorted set of conversation IDs scored by last-updated epoch seconds
+    ACTIVE_INDEX_KEY = "conversations:active"
+    # Pub/sub channel used to invalidate other workers' local caches
+    INVALIDATION_CHANNEL = "conversations:invalidate"
+
+    def __init__(
+        self,
+        redis_client: Optional["redis.Redis"] = None,
+        cache_enabled: Optional[bool] = None,
+        codec: Optional[ConversationCodec] = None
+    ):
+        self.redis = redis_client or get_redis_client()
+        self.codec = codec or get_codec()
         self.timeout = timedelta(minutes=settings.CONVERSATION_TIMEOUT_MINUTES)
+        self.cache: Optional[LRUCache] = None
+        if cache_enabled is None:
+            cache_enabled = settings.CONVERSATION_CACHE_ENABLED
+        if cache_enabled:
+            self.cache = LRUCache(
+                max_entries=settings.CONVERSATION_CACHE_MAX_ENTRIES,
+                max_bytes=settings.CONVERSATION_CACHE_MAX_BYTES,
+                ttl_seconds=settings.CONVERSATION_CACHE_TTL_SECONDS,
+                sizeof=self._conversation_size
+            )
+            stats_collector.register_cache("conversation", self.cache)
+        self._worker_id = uuid.uuid4().hex
+        self._prune_script = self.redis.register_script(PRUNE_SCRIPT)
+        self._delete_unchanged_script = self.redis.register_script(DELETE_UNCHANGED_SCRIPT)
+        self._invalidation_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _conversation_size(messages: List[Dict[str, Any]]) -> int:
+        """Approximate the in-memory size of a cached conversation."""
+        return sum(len(message["content"]) + 128 for message in messages)
+
+    @staticmethod
+    def _messages_key(conversation_id: str) -> str:
+        """Redis list holding the conversation messages, oldest first."""
+        return f"conversation:{conversation_id}:messages"
+
+    @staticmethod
+    def _meta_key(conversation_id: str) -> str:
+        """Redis hash holding the conversation timestamps."""
+        return f"conversation:{conversation_id}:meta"
+
+    @staticmethod
+    def _legacy_key(conversation_id: str) -> str:
+        """JSON blob conversations were stored in before the list and hash."""
+        return f"conversation:{conversation_id}"
 
     async def get_conversation(self, conversation_id: str) -> List[Dict[str, str]]:
         """Retrieve conversation history."""
+        # redis is imported on use so importing this module stays cheap
+        from redis.client import NEVER_DECODE
+
         try:
-            data = await self.redis.get(f"conversation:{conversation_id}")
-            if data:
-                conversation = json.loads(data)
-                if self._is_conversation_expired(conversation):
+            if self.cache is not None:
+                cached = self.cache.get(conversation_id)
+                if cached is not None:
+                    return list(cached)
+
+            batch = Pipelined(self.redis, "get_conversation")
+            async with batch as pipe:
+                pipe.hgetall(self._meta_key(conversation_id))
+                # Binary records must reach the codec undecoded
+                pipe.execute_command(
+                    "LRANGE", self._messages_key(conversation_id), 0, -1, **{NEVER_DECODE: True}
+                )
+                pipe.exists(self._legacy_key(conversation_id))
+            meta, messages, legacy = batch.results
+            if legacy and await self._migrate_legacy_conversation(conversation_id):
+                return await self.get_conversation(conversation_id)
+            if meta:
+                if self._is_conversation_expired(meta):
                     await self.delete_conversation(conversation_id)
                     return []
-                return conversation["messages"]
+                messages = [self.codec.decode(message) for message in messages]
+                self._cache_conversation(conversation_id, messages, self._remaining_lifetime(meta))
+                return list(messages)
             return []
         except Exception as e:
             print(f"Error retrieving conversation: {str(e)}")
@@ -32,43 +140,64 @@ class ConversationManager:
         content: str,
         metadata: Optional[Dict] = None
     ) -> bool:
-        """Add a message to the conversation history."""
-        try:
-            data = await self.redis.get(f"conversation:{conversation_id}")
-            if data:
-                conversation = json.loads(data)
-                messages = conversation["messages"]
-            else:
-                conversation = {
-                    "created_at": datetime.utcnow().isoformat(),
-                    "messages": []
-                }
-                messages = conversation["messages"]
+        """
+        Add a message to the conversation history.
 
-            # Add new message
+        The append, trim and TTL refresh run as one MULTI/EXEC round trip, so
+        the cost is independent of history length and concurrent turns for the
+        same conversation cannot overwrite each other.
+        """
+        try:
+            now = datetime.utcnow().isoformat()
+            stored_now = self.codec.encode_timestamp(now)
+            # Count tokens once at write time so history windowing never re-encodes
+            counter = await load_token_counter(settings.DEFAULT_MODEL)
             message = {
                 "role": role,
                 "content": content,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": now,
+                "token_count": counter.count(content),
+                "token_encoding": counter.name
             }
             if metadata:
                 message["metadata"] = metadata
 
-            messages.append(message)
-
-            # Trim conversation history if needed
-            if len(messages) > settings.MAX_CONVERSATION_HISTORY:
-                messages = messages[-settings.MAX_CONVERSATION_HISTORY:]
-
-            conversation["messages"] = messages
-            conversation["updated_at"] = datetime.utcnow().isoformat()
+            messages_key = self._messages_key(conversation_id)
+            meta_key = self._meta_key(conversation_id)
+            batch = Pipelined(self.redis, "add_message", transaction=True)
+            async with batch as pipe:
+                pipe.exists(self._legacy_key(conversation_id))
+                pipe.hsetnx(meta_key, "created_at", stored_now)
+                pipe.hset(meta_key, "updated_at", stored_now)
+                pipe.rpush(messages_key, self.codec.encode(message))
+                # Trim conversation history to the most recent messages
+                pipe.ltrim(messages_key, -settings.MAX_CONVERSATION_HISTORY, -1)
+                pipe.expire(messages_key, self.timeout)
+                pipe.expire(meta_key, self.timeout)
+                pipe.zadd(self.ACTIVE_INDEX_KEY, {conversation_id: time.time()})
+                if self.cache is not None:
+                    pipe.publish(self.INVALIDATION_CHANNEL, f"{self._worker_id}:{conversation_id}")
+            results = batch.results
 
-            # Save to Redis with expiration
-            await self.redis.setex(
-                f"conversation:{conversation_id}",
-                self.timeout,
-                json.dumps(conversation)
-            )
+            if results[0]:
+                # The earlier messages are still in the legacy blob. The new
+                # message is already stored, so a blob that cannot be converted
+                # must not turn this write into a failure
+                try:
+                    await self._migrate_legacy_conversation(conversation_id)
+                except Exception as e:
+                    print(f"Error migrating legacy conversation: {str(e)}")
+                if self.cache is not None:
+                    self.cache.invalidate(conversation_id)
+            elif self.cache is not None:
+                # Write through: extend the cached history, or start it when
+                # this message created the conversation (RPUSH returned 1)
+                cached = self.cache.peek(conversation_id)
+                if cached is not None:
+                    messages = (cached + [message])[-settings.MAX_CONVERSATION_HISTORY:]
+                    self._cache_conversation(conversation_id, messages, self.timeout.total_seconds())
+                elif results[3] == 1:
+                    self._cache_conversation(conversation_id, [message], self.timeout.total_seconds())
             return True
         except Exception as e:
             print(f"Error adding message: {str(e)}")
@@ -77,37 +206,253 @@ class ConversationManager:
     async def delete_conversation(self, conversation_id: str) -> bool:
         """Delete a conversation."""
         try:
-            await self.redis.delete(f"conversation:{conversation_id}")
+            if self.cache is not None:
+                self.cache.invalidate(conversation_id)
+            async with Pipelined(self.redis, "delete_conversation", transaction=True) as pipe:
+                pipe.delete(
+                    self._messages_key(conversation_id),
+                    self._meta_key(conversation_id),
+                    self._legacy_key(conversation_id)
+                )
+                pipe.zrem(self.ACTIVE_INDEX_KEY, conversation_id)
+                if self.cache is not None:
+                    pipe.publish(self.INVALIDATION_CHANNEL, f"{self._worker_id}:{conversation_id}")
             return True
         except Exception as e:
             print(f"Error deleting conversation: {str(e)}")
             return False
 
-    def _is_conversation_expired(self, conversation: Dict) -> bool:
+    async def _migrate_legacy_conversation(self, conversation_id: str) -> bool:
+        """
+        Move a conversation stored as a single JSON blob into the list and hash.
+
+        Conversations written before the list and hash layout are converted
+        when first read or written. The legacy messages go in front of any
+        already in the list, so a message added before the conversion keeps
+        its place, and WATCH on the blob makes concurrent conversions of the
+        same conversation apply once.
+
+        Returns:
+            bool: Whether a legacy conversation was found.
+        """
+        from redis.exceptions import WatchError
+
+        legacy_key = self._legacy_key(conversation_id)
+        messages_key = self._messages_key(conversation_id)
+        meta_key = self._meta_key(conversation_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(legacy_key)
+                data = await pipe.get(legacy_key)
+                if data is None:
+                    return False
+                conversation = json.loads(data)
+                created_at = conversation["created_at"]
+                updated_at = conversation.get("updated_at") or created_at
+                messages = [self.codec.encode(message) for message in conversation["messages"]]
+
+                pipe.multi()
+                if messages:
+                    pipe.lpush(messages_key, *reversed(messages))
+                    pipe.ltrim(messages_key, -settings.MAX_CONVERSATION_HISTORY, -1)
+                pipe.hset(meta_key, "created_at", self.codec.encode_timestamp(created_at))
+                pipe.hsetnx(meta_key, "updated_at", self.codec.encode_timestamp(updated_at))
+                pipe.expire(messages_key, self.timeout)
+                pipe.expire(meta_key, self.timeout)
+                pipe.zadd(self.ACTIVE_INDEX_KEY, {conversation_id: parse_timestamp(updated_at)}, gt=True)
+                pipe.delete(legacy_key)
+                with redis_timer("migrate_legacy_conversation"):
+                    await pipe.execute()
+            except WatchError:
+                # Another worker converted it first
+                pass
+        return True
+
+    def _is_conversation_expired(self, meta: Dict) -> bool:
         """Check if a conversation has expired."""
-        updated_at = datetime.fromisoformat(conversation.get("updated_at", conversation["created_at"]))
-        return datetime.utcnow() - updated_at > self.timeout
+        return self._remaining_lifetime(meta) < 0
+
+    def _remaining_lifetime(self, meta: Dict) -> float:
+        """Seconds until a conversation expires, negative once it has."""
+        updated_at = parse_timestamp(meta.get("updated_at") or meta["created_at"])
+        return self.timeout.total_seconds() - (time.time() - updated_at)
+
+    def _cache_conversation(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        lifetime: float
+    ) -> None:
+        """Store a conversation in the local cache without outliving it in Redis."""
+        if self.cache is None:
+            return
+        ttl = lifetime
+        if self.cache.ttl_seconds is not None:
+            ttl = min(ttl, self.cache.ttl_seconds)
+        self.cache.set(conversation_id, messages, ttl=ttl)
+
+    async def start_cache_invalidation(self) -> None:
+        """Start listening for conversation changes made by other workers."""
+        if self.cache is None or self._invalidation_task is not None:
+            return
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+        self._invalidation_task = asyncio.create_task(self._listen_for_invalidations(pubsub))
+
+    async def stop_cache_invalidation(self) -> None:
+        """Stop the cache invalidation listener."""
+        task, self._invalidation_task = self._invalidation_task, None
+        if task is None:
+            return
+        # A cancellation landing as a message arrives can be swallowed while
+        # the reply is read, so keep cancelling until the listener ends
+        while not task.done():
+            task.cancel()
+            await asyncio.wait({task}, timeout=0.1)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error in conversation cache invalidation listener: {str(task.exception())}")
+
+    async def _listen_for_invalidations(self, pubsub) -> None:
+        """Drop locally cached conversations that another worker changed."""
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                worker_id, _, conversation_id = message["data"].partition(":")
+                if worker_id != self._worker_id:
+                    self.cache.invalidate(conversation_id)
+        finally:
+            await pubsub.unsubscribe(self.INVALIDATION_CHANNEL)
+            await pubsub.aclose()
+
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Get local conversation cache counters, or None when caching is disabled."""
+        if self.cache is None:
+            return None
+        return self.cache.get_stats()
+
+    async def iter_active_conversations(
+        self,
+        since_minutes: Optional[float] = None,
+        page_size: int = 100
+    ) -> AsyncIterator[str]:
+        """
+        Iterate over active conversation IDs, least recently updated first.
+
+        IDs are paged out of the active index with ZRANGEBYSCORE, resuming
+        from the last score seen rather than an offset, so each page costs
+        O(log N + page_size) and conversations removed during iteration do not
+        cause others to be skipped. IDs sharing the last score are told apart
+        by member, the index's own tiebreak. Conversations updated during
+        iteration move to the end of the index and may be yielded again.
 
-    async def get_active_conversations(self) -> List[str]:
+        Args:
+            since_minutes (float, optional): Only yield conversations updated in
+                the last N minutes. Defaults to the conversation timeout.
+            page_size (int): Number of IDs fetched per round trip.
+        """
+        if since_minutes is None:
+            since_minutes = self.timeout.total_seconds() / 60
+        min_score = time.time() - since_minutes * 60
+        last_score: Optional[float] = None
+        last_member = ""
+        # IDs already yielded with the last score; the next page starts among them
+        tied = 0
+        while True:
+            num = page_size + tied
+            with redis_timer("list_active_conversations"):
+                page = await self.redis.zrangebyscore(
+                    self.ACTIVE_INDEX_KEY, min_score, "+inf",
+                    start=0, num=num, withscores=True
+                )
+            for conversation_id, score in page:
+                if score == last_score and conversation_id <= last_member:
+                    continue
+                yield conversation_id
+                if score != last_score:
+                    last_score, tied = score, 0
+                last_member = conversation_id
+                tied += 1
+            if len(page) < num:
+                return
+            min_score = last_score
+
+    async def get_active_conversations(self, since_minutes: Optional[float] = None) -> List[str]:
         """Get a list of active conversation IDs."""
         try:
-            keys = await self.redis.keys("conversation:*")
-            return [key.split(":")[1] for key in keys]
+            return [
+                conversation_id
+                async for conversation_id in self.iter_active_conversations(since_minutes)
+            ]
         except Exception as e:
             print(f"Error getting active conversations: {str(e)}")
             return []
 
+    async def prune_expired_conversations(self, batch_size: int = 500) -> int:
+        """
+        Remove expired conversations from the active index in bulk.
+
+        Each conversation is checked and deleted atomically, so one updated
+        after it was listed is kept. Conversations still stored as legacy
+        blobs are not in the index; expired ones are found by a scan.
+
+        Returns:
+            int: Number of conversations pruned.
+        """
+        max_score = time.time() - self.timeout.total_seconds()
+        pruned = 0
+        try:
+            while True:
+                with redis_timer("prune_expired_conversations"):
+                    expired = await self.redis.zrangebyscore(
+                        self.ACTIVE_INDEX_KEY, "-inf", max_score,
+                        start=0, num=batch_size
+                    )
+                if not expired:
+                    break
+                keys = [self.ACTIVE_INDEX_KEY]
+                for conversation_id in expired:
+                    keys.extend((
+                        self._messages_key(conversation_id),
+                        self._meta_key(conversation_id),
+                        self._legacy_key(conversation_id)
+                    ))
+                with redis_timer("prune_expired_conversations"):
+                    pruned += await self._prune_script(keys=keys, args=[max_score, *expired])
+            pruned += await self._prune_legacy_conversations(batch_size)
+        except Exception as e:
+            print(f"Error pruning expired conversations: {str(e)}")
+        return pruned
+
+    async def _prune_legacy_conversations(self, batch_size: int) -> int:
+        """Delete expired conversations still stored as legacy JSON blobs."""
+        pruned = 0
+        async for key in self.redis.scan_iter(match=self._legacy_key("*"), count=batch_size, _type="string"):
+            data = await self.redis.get(key)
+            if data is None or not self._is_conversation_expired(json.loads(data)):
+                continue
+            # A blob converted or rewritten meanwhile is left alone
+            with redis_timer("prune_expired_conversations"):
+                pruned += await self._delete_unchanged_script(keys=[key], args=[data])
+        return pruned
+
     async def get_conversation_metadata(self, conversation_id: str) -> Optional[Dict]:
         """Get conversation metadata."""
         try:
-            data = await self.redis.get(f"conversation:{conversation_id}")
-            if data:
-                conversation = json.loads(data)
+            batch = Pipelined(self.redis, "get_conversation_metadata")
+            async with batch as pipe:
+                pipe.hgetall(self._meta_key(conversation_id))
+                pipe.llen(self._messages_key(conversation_id))
+                pipe.exists(self._legacy_key(conversation_id))
+            meta, message_count, legacy = batch.results
+            if legacy and await self._migrate_legacy_conversation(conversation_id):
+                return await self.get_conversation_metadata(conversation_id)
+            if meta:
                 return {
-                    "created_at": conversation["created_at"],
-                    "updated_at": conversation.get("updated_at"),
-                    "message_count": len(conversation["messages"]),
-                    "is_expired": self._is_conversation_expired(conversation)
+                    "created_at": format_timestamp(meta["created_at"]),
+                    "updated_at": format_timestamp(meta["updated_at"]) if meta.get("updated_at") else None,
+                    "message_count": message_count,
+                    "is_expired": self._is_conversation_expired(meta)
                 }
             return None
         except Exception as e:
@@ -0,0 +1,154 @@
+from typing import Any, Dict, Optional, Union
+from datetime import datetime, timezone
+import json
+import logging
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Leading byte of each binary record, so the format can change without
+# migrating stored data. Legacy JSON records start with "{" instead.
+FORMAT_MSGPACK = 1
+FORMAT_MSGPACK_ZSTD = 2
+
+def to_epoch_ms(timestamp: str) -> int:
+    """Convert a naive UTC ISO-8601 timestamp to epoch milliseconds."""
+    moment = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc)
+    return round(moment.timestamp() * 1000)
+
+def from_epoch_ms(epoch_ms: int) -> str:
+    """Convert epoch milliseconds to a naive UTC ISO-8601 timestamp."""
+    return datetime.fromtimestamp(epoch_ms / 1000, timezone.utc).replace(tzinfo=None).isoformat()
+
+def parse_timestamp(value: Union[str, int]) -> float:
+    """Epoch seconds of a stored timestamp, either epoch milliseconds or legacy ISO-8601."""
+    try:
+        return int(value) / 1000
+    except ValueError:
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+def format_timestamp(value: Union[str, int]) -> str:
+    """ISO-8601 form of a stored timestamp, whichever format it was stored in."""
+    try:
+        return from_epoch_ms(int(value))
+    except ValueError:
+        return value
+
+_decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+def decode_message(raw: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    Decode a stored message in any supported format.
+
+    Raises:
+        ValueError: If the record has an unknown format version.
+    """
+    if isinstance(raw, str) or raw[:1] == b"{":
+        return json.loads(raw)
+    version, payload = raw[0], raw[1:]
+    if version == FORMAT_MSGPACK_ZSTD:
+        if _decompressor is None:
+            raise ValueError("zstandard is required to read compressed conversation records")
+        payload = _decompressor.decompress(payload)
+    elif version != FORMAT_MSGPACK:
+        raise ValueError(f"Unknown conversation record format: {version}")
+    if msgpack is None:
+        raise ValueError("msgpack is required to read binary conversation records")
+    message = msgpack.unpackb(payload)
+    if "timestamp" in message:
+        message["timestamp"] = from_epoch_ms(message["timestamp"])
+    return message
+
+class ConversationCodec:
+    """
+    Storage format of conversation messages and timestamps.
+
+    The base codec stores messages as JSON with ISO-8601 timestamps, as
+    conversations always have been. Whatever codec wrote a record, it is
+    read back with ``decode_message``.
+    """
+
+    name = "json"
+
+    def encode(self, message: Dict[str, Any]) -> Union[str, bytes]:
+        """Encode a message whose ``timestamp`` is a naive UTC ISO-8601 string."""
+        return json.dumps(message)
+
+    def encode_timestamp(self, timestamp: str) -> Union[str, int]:
+        """Encode a naive UTC ISO-8601 timestamp for the conversation metadata."""
+        return timestamp
+
+    def decode(self, raw: Union[str, bytes]) -> Dict[str, Any]:
+        return decode_message(raw)
+
+class MsgpackCodec(ConversationCodec):
+    """
+    Compact binary codec: a format byte followed by the msgpack-encoded message.
+
+    Timestamps are stored as epoch milliseconds. Records larger than
+    ``compress_threshold`` bytes are zstd-compressed when zstandard is
+    installed.
+    """
+
+    name = "msgpack"
+
+    def __init__(
+        self,
+        compress_threshold: Optional[int] = None,
+        compression_level: Optional[int] = None
+    ):
+        if msgpack is None:
+            raise ImportError("msgpack is not installed")
+        self.compress_threshold = (
+            compress_threshold if compress_threshold is not None
+            else settings.CONVERSATION_COMPRESS_THRESHOLD_BYTES
+        )
+        self._compressor = None
+        if zstandard is not None:
+            if compression_level is None:
+                compression_level = settings.CONVERSATION_COMPRESSION_LEVEL
+            self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        else:
+            logger.info("zstandard is not installed; conversation records are stored uncompressed")
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        if "timestamp" in message:
+            message = {**message, "timestamp": to_epoch_ms(message["timestamp"])}
+        payload = msgpack.packb(message)
+        if self._compressor is not None and len(payload) > self.compress_threshold:
+            compressed = self._compressor.compress(payload)
+            if len(compressed) < len(payload):
+                return bytes([FORMAT_MSGPACK_ZSTD]) + compressed
+        return bytes([FORMAT_MSGPACK]) + payload
+
+    def encode_timestamp(self, timestamp: str) -> int:
+        return to_epoch_ms(timestamp)
+
+CODECS = {
+    "json": ConversationCodec,
+    "msgpack": MsgpackCodec,
+}
+
+def get_codec(name: Optional[str] = None) -> ConversationCodec:
+    """
+    Build the named codec, CONVERSATION_CODEC by default, falling back to
+    JSON if its dependencies are missing.
+    """
+    name = name or settings.CONVERSATION_CODEC
+    if name not in CODECS:
+        raise ValueError(f"Unknown conversation codec: {name}")
+    try:
+        return CODECS[name]()
+    except ImportError as e:
+        logger.warning("Conversation codec %s unavailable (%s); storing JSON", name, str(e))
+        return ConversationCodec()
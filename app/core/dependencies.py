@@ -1,36 +1,131 @@
-from typing import AsyncGenerator
+from typing import TYPE_CHECKING, AsyncGenerator, Optional
+import asyncio
 from fastapi import Depends
 from app.core.orchestrator import ChatbotOrchestrator
 from app.core.config import settings
-import redis.asyncio as redis
+from app.core.metrics import stats_collector
+from app.core.rate_limit import RateLimiter
+from app.core.redis_client import get_redis_client
+from app.core.registry import ServiceRegistry
+from app.core.response_cache import ResponseCache
+
+if TYPE_CHECKING:
+    import redis.asyncio as redis
+    from app.core.conversation import ConversationManager
 
 # Global instances
-_redis_client = None
 _orchestrator = None
+_rate_limiter = None
+_registry = None
+_conversation_manager = None
+# Held while the orchestrator and registry are created, so requests wait for them
+_orchestrator_lock = asyncio.Lock()
+
+def redis_required() -> bool:
+    """Whether any enabled feature keeps state in Redis."""
+    return settings.RATE_LIMIT_ENABLED or settings.REGISTRY_ENABLED or settings.RESPONSE_CACHE_ENABLED
 
-async def get_redis() -> AsyncGenerator[redis.Redis, None]:
+async def get_redis() -> AsyncGenerator["redis.Redis", None]:
     """Get Redis connection."""
-    global _redis_client
-    if _redis_client is None:
-        _redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            decode_responses=True
-        )
     try:
-        yield _redis_client
+        yield get_redis_client()
     finally:
-        pass  # Connection will be handled by the global client
-
-async def get_orchestrator(
-    redis: redis.Redis = Depends(get_redis)
-) -> ChatbotOrchestrator:
-    """Get ChatbotOrchestrator instance."""
-    global _orchestrator
-    if _orchestrator is None:
-        _orchestrator = ChatbotOrchestrator()
-        # Initialize orchestrator with any persisted services
-        services = await redis.hgetall("services")
-        for service_data in services.values():
-            await _orchestrator.register_service(service_data)
+        pass  # Connections return to the shared pool, closed on shutdown
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Get the shared RateLimiter, or None when rate limiting is disabled."""
+    global _rate_limiter
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(get_redis_client())
+    return _rate_limiter
+
+def get_conversation_manager() -> "ConversationManager":
+    """Get the shared ConversationManager, creating it on first use."""
+    global _conversation_manager
+    if _conversation_manager is None:
+        # Imported here so workers that never touch conversations skip the codec imports
+        from app.core.conversation import ConversationManager
+        _conversation_manager = ConversationManager(
+            get_redis_client(),
+            cache_enabled=settings.CONVERSATION_CACHE_ENABLED
+        )
+    return _conversation_manager
+
+async def start_conversation_manager() -> None:
+    """
+    Follow conversation changes made by other workers when conversations are cached locally.
+
+    If the subscription fails the local cache is dropped, since it could
+    otherwise serve conversations other workers have changed.
+    """
+    if not settings.CONVERSATION_CACHE_ENABLED:
+        return
+    manager = get_conversation_manager()
+    try:
+        await manager.start_cache_invalidation()
+    except Exception as e:
+        print(f"Error subscribing to conversation changes, disabling the local cache: {str(e)}")
+        manager.cache = None
+
+async def close_conversation_manager() -> None:
+    """Stop following conversation changes."""
+    global _conversation_manager
+    if _conversation_manager is not None:
+        await _conversation_manager.stop_cache_invalidation()
+        _conversation_manager = None
+
+async def get_orchestrator() -> ChatbotOrchestrator:
+    """
+    Get ChatbotOrchestrator instance.
+
+    The Redis client is only created when a Redis-backed feature is enabled.
+    The orchestrator is only handed out once the shared registry has loaded,
+    so no request registers a service this worker alone would know about.
+    """
+    global _orchestrator, _registry
+    if _orchestrator is not None:
+        return _orchestrator
+    async with _orchestrator_lock:
+        if _orchestrator is None:
+            response_cache = None
+            if settings.RESPONSE_CACHE_ENABLED:
+                response_cache = ResponseCache(redis=get_redis_client())
+            orchestrator = ChatbotOrchestrator(
+                response_cache=response_cache,
+                rate_limiter=get_rate_limiter()
+            )
+            if settings.REGISTRY_ENABLED:
+                # Load the shared services and follow changes made by other workers
+                registry = ServiceRegistry(get_redis_client(), orchestrator)
+                try:
+                    await registry.start()
+                    _registry = registry
+                except Exception as e:
+                    print(f"Error loading service registry, serving local services only: {str(e)}")
+            stats_collector.register_orchestrator(orchestrator)
+            if response_cache is not None:
+                stats_collector.register_cache("response", response_cache)
+            if settings.HEALTH_CHECK_ENABLED:
+                orchestrator.start_health_checks()
+            orchestrator.start_backends()
+            _orchestrator = orchestrator
     return _orchestrator
+
+async def get_registry(
+    orchestrator: ChatbotOrchestrator = Depends(get_orchestrator)
+) -> Optional[ServiceRegistry]:
+    """Get the shared ServiceRegistry, or None when services are local to this worker."""
+    return _registry
+
+async def close_orchestrator() -> None:
+    """Stop the orchestrator's background tasks."""
+    global _orchestrator, _registry
+    if _registry is not None:
+        await _registry.stop()
+        _registry = None
+    if _orchestrator is not None:
+        await _orchestrator.stop_health_checks()
+        await _orchestrator.stop_backends()
+        _orchestrator = None
@@ -0,0 +1,91 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+class AggregationPolicy(ABC):
+    """
+    Decides when a fan-out has heard enough and what to answer with.
+
+    The orchestrator sends the query to several services at once, feeds
+    each successful response to ``satisfied`` as it arrives, and cancels
+    the calls still outstanding as soon as it returns True or ``deadline``
+    seconds pass. ``aggregate`` then builds the answer from the responses
+    collected so far, in arrival order.
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline if deadline is not None else settings.FANOUT_DEADLINE_SECONDS
+
+    @abstractmethod
+    def satisfied(self, responses: List[Dict[str, Any]]) -> bool:
+        """Whether the responses so far are enough to stop waiting."""
+        pass
+
+    @abstractmethod
+    def aggregate(self, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the answer from a non-empty list of responses."""
+        pass
+
+class FirstSuccessfulPolicy(AggregationPolicy):
+    """Answer with the first successful response."""
+
+    def satisfied(self, responses: List[Dict[str, Any]]) -> bool:
+        return len(responses) >= 1
+
+    def aggregate(self, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return responses[0]
+
+class FirstKPolicy(AggregationPolicy):
+    """
+    Collect the first ``k`` successful responses.
+
+    The answer is the first response, with all of them under ``responses``.
+    If fewer than ``k`` arrive before the deadline, those that did are used.
+    """
+
+    def __init__(self, k: Optional[int] = None, deadline: Optional[float] = None):
+        super().__init__(deadline)
+        self.k = k if k is not None else settings.FANOUT_K
+        if self.k < 1:
+            raise ValueError("k must be at least 1")
+
+    def satisfied(self, responses: List[Dict[str, Any]]) -> bool:
+        return len(responses) >= self.k
+
+    def aggregate(self, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {**responses[0], "responses": responses[:self.k]}
+
+class BestConfidencePolicy(AggregationPolicy):
+    """
+    Answer with the most confident response received within the deadline.
+
+    Waits for every service unless one reports the maximum confidence,
+    which cannot be beaten. Responses without a ``confidence`` score 0.
+    """
+
+    MAX_CONFIDENCE = 1.0
+
+    def satisfied(self, responses: List[Dict[str, Any]]) -> bool:
+        return any(self._confidence(response) >= self.MAX_CONFIDENCE for response in responses)
+
+    def aggregate(self, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return max(responses, key=self._confidence)
+
+    @staticmethod
+    def _confidence(response: Dict[str, Any]) -> float:
+        try:
+            return float(response.get("confidence") or 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+AGGREGATION_POLICIES = {
+    "first_successful": FirstSuccessfulPolicy,
+    "first_k": FirstKPolicy,
+    "best_confidence": BestConfidencePolicy,
+}
+
+def get_aggregation_policy(name: str, **kwargs: Any) -> AggregationPolicy:
+    """Build an aggregation policy by name, passing options such as ``deadline``."""
+    if name not in AGGREGATION_POLICIES:
+        raise ValueError(f"Unknown aggregation policy '{name}'")
+    return AGGREGATION_POLICIES[name](**kwargs)
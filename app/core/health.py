@@ -0,0 +1,191 @@
+from typing import Callable, Dict, Optional, Set, TYPE_CHECKING
+from enum import Enum
+import asyncio
+import logging
+import random
+import time
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.core.orchestrator import ChatbotOrchestrator
+
+logger = logging.getLogger(__name__)
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Per-service circuit breaker driven by consecutive failures and latency SLO breaches.
+
+    ``failure_threshold`` consecutive failures (or responses slower than
+    ``latency_slo``) open the circuit. While open the service takes no
+    traffic; once ``reset_timeout`` has passed, a successful health probe
+    moves it to half-open, where ``success_threshold`` consecutive successes
+    close it again and any failure re-opens it. A half-open service admits at
+    most ``half_open_max_requests`` trial requests at a time.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        success_threshold: Optional[int] = None,
+        latency_slo: Optional[float] = None,
+        half_open_max_requests: Optional[int] = None,
+        on_state_change: Optional[Callable[[CircuitState], None]] = None
+    ):
+        self.failure_threshold = (
+            failure_threshold if failure_threshold is not None else settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        )
+        self.reset_timeout = reset_timeout if reset_timeout is not None else settings.CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS
+        self.success_threshold = (
+            success_threshold if success_threshold is not None else settings.CIRCUIT_BREAKER_SUCCESS_THRESHOLD
+        )
+        self.latency_slo = latency_slo if latency_slo is not None else settings.CIRCUIT_BREAKER_LATENCY_SLO_SECONDS
+        self.half_open_max_requests = (
+            half_open_max_requests if half_open_max_requests is not None
+            else settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_REQUESTS
+        )
+        self.on_state_change = on_state_change
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.trials_in_flight = 0
+        self.opened_at: Optional[float] = None
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.trials_in_flight = 0
+        self.opened_at = time.monotonic() if state == CircuitState.OPEN else None
+        if self.on_state_change is not None:
+            self.on_state_change(state)
+
+    def allow_request(self) -> bool:
+        """
+        Whether a request may be sent now.
+
+        Always when closed and never when open. When half-open, admitting the
+        request takes one of the trial slots, freed by ``release_trial``.
+        """
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.OPEN or self.trials_in_flight >= self.half_open_max_requests:
+            return False
+        self.trials_in_flight += 1
+        return True
+
+    def release_trial(self) -> None:
+        """Free the trial slot of a finished half-open request."""
+        if self.state == CircuitState.HALF_OPEN and self.trials_in_flight > 0:
+            self.trials_in_flight -= 1
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """Record a successful call; one slower than the latency SLO counts as a failure."""
+        if latency is not None and self.latency_slo is not None and latency > self.latency_slo:
+            self.record_failure()
+            return
+
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(CircuitState.HALF_OPEN)
+                self.consecutive_successes = 1
+            else:
+                return
+        elif self.state == CircuitState.HALF_OPEN:
+            self.consecutive_successes += 1
+        self.consecutive_failures = 0
+
+        if self.state == CircuitState.HALF_OPEN and self.consecutive_successes >= self.success_threshold:
+            self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+        elif self.state == CircuitState.OPEN:
+            # Keep the circuit open for another full reset timeout
+            self.opened_at = time.monotonic()
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self._transition(CircuitState.OPEN)
+
+class HealthCheckScheduler:
+    """
+    Background task probing every registered service's health check.
+
+    Each service is probed every ``interval`` seconds, jittered by up to
+    ``jitter`` (a fraction of the interval) so probes do not synchronize
+    across services or workers. Results feed the orchestrator's circuit
+    breakers, so requests never pay for a probe themselves.
+    """
+
+    def __init__(
+        self,
+        orchestrator: "ChatbotOrchestrator",
+        interval: Optional[float] = None,
+        jitter: Optional[float] = None
+    ):
+        self.orchestrator = orchestrator
+        self.interval = interval if interval is not None else settings.HEALTH_CHECK_INTERVAL_SECONDS
+        self.jitter = jitter if jitter is not None else settings.HEALTH_CHECK_JITTER
+        self._task: Optional[asyncio.Task] = None
+        self._next_probe: Dict[str, float] = {}
+        self._probing: Set[str] = set()
+        self._probes: Set[asyncio.Task] = set()
+
+    def _jittered_interval(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def start(self) -> None:
+        """Start probing in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop probing and wait for in-flight probes to be cancelled."""
+        tasks = list(self._probes)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            services = set(self.orchestrator.services)
+            for name in list(self._next_probe):
+                if name not in services:
+                    del self._next_probe[name]
+            for name in services:
+                if name not in self._next_probe:
+                    # Stagger newly seen services across one interval
+                    self._next_probe[name] = now + random.uniform(0, self.interval)
+
+            for name, due in self._next_probe.items():
+                if due <= now and name not in self._probing:
+                    self._next_probe[name] = now + self._jittered_interval()
+                    self._probing.add(name)
+                    probe = asyncio.create_task(self._probe(name))
+                    self._probes.add(probe)
+                    probe.add_done_callback(self._probes.discard)
+
+            next_due = min(self._next_probe.values(), default=now + self.interval)
+            await asyncio.sleep(min(max(next_due - now, 0.05), 1.0))
+
+    async def _probe(self, service_name: str) -> None:
+        try:
+            await self.orchestrator.check_service_health(service_name)
+        except Exception as e:
+            logger.warning("Health probe for %s failed: %s", service_name, str(e))
+        finally:
+            self._probing.discard(service_name)
@@ -0,0 +1,62 @@
+from typing import TYPE_CHECKING, Optional
+import logging
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Global instance shared by all upstream services
+_http_client: Optional["httpx.AsyncClient"] = None
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def create_http_client() -> "httpx.AsyncClient":
+    """Build a pooled HTTP client from the connection pool settings."""
+    # Imported here so workers that never call upstream services do not pay for it
+    import httpx
+
+    http2 = settings.HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("HTTP/2 requested but 'h2' is not installed; falling back to HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+        )
+    )
+
+def request_timeout(client: "httpx.AsyncClient", seconds: float) -> "httpx.Timeout":
+    """Per-request read/write timeout that keeps the client's connect and pool timeouts."""
+    import httpx
+
+    return httpx.Timeout(seconds, connect=client.timeout.connect, pool=client.timeout.pool)
+
+def get_http_client() -> "httpx.AsyncClient":
+    """Get the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
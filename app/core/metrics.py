@@ -0,0 +1,151 @@
+from typing import Any, Dict, Iterator, Optional, Tuple
+from contextlib import contextmanager
+import time
+import weakref
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+REQUEST_LATENCY = Histogram(
+    "orchestrator_request_duration_seconds",
+    "Time to complete a request to a service, including queueing",
+    ["service", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "orchestrator_time_to_first_token_seconds",
+    "Time from dispatching a streamed request to its first chunk",
+    ["service"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_ERRORS = Counter(
+    "orchestrator_request_errors_total",
+    "Failed or rejected requests to a service, by error type",
+    ["service", "error_type"]
+)
+REDIS_LATENCY = Histogram(
+    "redis_operation_duration_seconds",
+    "Time taken by Redis operations, one observation per round trip",
+    ["operation"],
+    buckets=REDIS_BUCKETS
+)
+
+# Label children are resolved once per service instead of on every request
+_service_children: Dict[str, Tuple[Any, Any, Any]] = {}
+_redis_children: Dict[str, Any] = {}
+# Error type -> counter child per service, so a removed service's error series can be found
+_error_children: Dict[str, Dict[str, Any]] = {}
+
+def _children(service_name: str) -> Tuple[Any, Any, Any]:
+    children = _service_children.get(service_name)
+    if children is None:
+        children = (
+            REQUEST_LATENCY.labels(service_name, "success"),
+            REQUEST_LATENCY.labels(service_name, "failure"),
+            TIME_TO_FIRST_TOKEN.labels(service_name)
+        )
+        _service_children[service_name] = children
+    return children
+
+def observe_request(service_name: str, seconds: float, success: bool) -> None:
+    """Record the latency of a finished request."""
+    success_child, failure_child, _ = _children(service_name)
+    (success_child if success else failure_child).observe(seconds)
+
+def observe_first_token(service_name: str, seconds: float) -> None:
+    """Record a streamed request's time to first token."""
+    _children(service_name)[2].observe(seconds)
+
+def count_error(service_name: str, error: BaseException) -> None:
+    """Count a failed request by the type of its error."""
+    error_type = type(error).__name__
+    children = _error_children.setdefault(service_name, {})
+    child = children.get(error_type)
+    if child is None:
+        child = children[error_type] = REQUEST_ERRORS.labels(service_name, error_type)
+    child.inc()
+
+def remove_service(service_name: str) -> None:
+    """Drop a deregistered service's series."""
+    for error_type in _error_children.pop(service_name, {}):
+        REQUEST_ERRORS.remove(service_name, error_type)
+    if _service_children.pop(service_name, None) is None:
+        return
+    for outcome in ("success", "failure"):
+        REQUEST_LATENCY.remove(service_name, outcome)
+    TIME_TO_FIRST_TOKEN.remove(service_name)
+
+@contextmanager
+def redis_timer(operation: str) -> Iterator[None]:
+    """Time a Redis round trip under the given operation name."""
+    child = _redis_children.get(operation)
+    if child is None:
+        child = _redis_children[operation] = REDIS_LATENCY.labels(operation)
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        child.observe(time.perf_counter() - start_time)
+
+class StatsCollector:
+    """
+    Exposes counters the app already keeps, read only when /metrics is scraped.
+
+    Cache hit/miss counters, in-flight requests, queue depths and circuit
+    states are tracked by the caches and the orchestrator anyway, so they
+    cost nothing extra on the request path.
+    """
+
+    def __init__(self):
+        self._caches: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+        self._orchestrator: Optional[weakref.ReferenceType] = None
+
+    def register_cache(self, name: str, cache: Any) -> None:
+        """Expose a cache with ``hits`` and ``misses`` counters."""
+        self._caches[name] = cache
+
+    def register_orchestrator(self, orchestrator: Any) -> None:
+        """Expose per-service load of the orchestrator."""
+        self._orchestrator = weakref.ref(orchestrator)
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Cache hits over lookups", labels=["cache"])
+        for name, cache in list(self._caches.items()):
+            lookups = cache.hits + cache.misses
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            ratio.add_metric([name], cache.hits / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+        orchestrator = self._orchestrator() if self._orchestrator is not None else None
+        if orchestrator is None:
+            return
+        in_flight = GaugeMetricFamily(
+            "orchestrator_in_flight_requests", "Requests currently dispatched to a service",
+            labels=["service"]
+        )
+        queue_depth = GaugeMetricFamily(
+            "orchestrator_queue_depth", "Requests waiting for a service's concurrency slot",
+            labels=["service"]
+        )
+        circuit_open = GaugeMetricFamily(
+            "orchestrator_circuit_open", "1 while a service's circuit breaker is open",
+            labels=["service"]
+        )
+        for name in list(orchestrator.services):
+            metrics = orchestrator.get_service_metrics(name)
+            in_flight.add_metric([name], metrics["current_load"])
+            queue_depth.add_metric([name], metrics["queue_depth"])
+            circuit_open.add_metric([name], 1 if metrics["circuit_state"] == "open" else 0)
+        yield in_flight
+        yield queue_depth
+        yield circuit_open
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
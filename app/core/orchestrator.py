@@ -1,10 +1,24 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, AsyncIterator, Any, Callable, Set
 from pydantic import BaseModel
+from collections import deque
+from contextlib import aclosing, nullcontext
 import uuid
 import asyncio
 import time
 from dataclasses import dataclass
 from app.core.config import settings
+from app.core import metrics as metrics_registry
+from app.core.admission import AdmissionController, ServiceOverloadedError
+from app.core.batching import MicroBatcher
+from app.core.fanout import AggregationPolicy, FirstSuccessfulPolicy
+from app.core.rate_limit import RateLimiter
+from app.core.response_cache import ResponseCache
+from app.core.resilience import RetryBudget, latency_percentile
+from app.core.singleflight import SingleFlight
+from app.core.health import CircuitBreaker, CircuitState, HealthCheckScheduler
+from app.core.capabilities import CapabilityIndex, QueryClassifier
+from app.core.routing import RoutingStrategy, get_routing_strategy, record_outcome, service_cost
+from app.services.base import BaseBotService
 
 class BotService(BaseModel):
     name: str
@@ -18,6 +32,16 @@ class ServiceCreate:
     endpoint: str
     capabilities: List[str]
     description: str
+    max_concurrent_requests: Optional[int] = None
+    timeout_seconds: Optional[float] = 30.0
+    max_queue_depth: Optional[int] = None
+    max_queue_wait_seconds: Optional[float] = None
+    batch_endpoint: Optional[str] = None
+    max_batch_size: Optional[int] = None
+    max_batch_wait_seconds: Optional[float] = None
+    rate_limit_per_minute: Optional[int] = None
+    api_key: Optional[str] = None
+    headers: Optional[dict] = None
 
 @dataclass
 class ServiceResponse:
@@ -27,88 +51,755 @@ class ServiceResponse:
     capabilities: List[str]
     description: str
     is_active: bool
+    max_concurrent_requests: Optional[int] = None
+    timeout_seconds: Optional[float] = 30.0
+    max_queue_depth: Optional[int] = None
+    max_queue_wait_seconds: Optional[float] = None
+    batch_endpoint: Optional[str] = None
+    max_batch_size: Optional[int] = None
+    max_batch_wait_seconds: Optional[float] = None
+    rate_limit_per_minute: Optional[int] = None
 
 class ModelAuthorizationError(Exception):
     """Exception raised when a model is not authorized."""
     pass
 
 class ChatbotOrchestrator:
-    def __init__(self):
+    def __init__(
+        self,
+        response_cache: Optional[ResponseCache] = None,
+        routing_strategy: Optional[RoutingStrategy] = None,
+        classifier: Optional[QueryClassifier] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        self.response_cache = response_cache
+        self.rate_limiter = rate_limiter
+        self.routing_strategy = routing_strategy or get_routing_strategy()
+        self.classifier = classifier or QueryClassifier()
+        self.capability_index = CapabilityIndex()
         self.services: Dict[str, BotService] = {}
         self._load_metrics: Dict[str, Dict] = {}
         self._last_health_check: Dict[str, float] = {}
+        self._available_services: Optional[List[BotService]] = None
+        # Serialized service listing, rendered once per registry change
+        self._services_payload: Optional[bytes] = None
+        self._backends: Dict[str, BaseBotService] = {}
+        self._admission: Dict[str, AdmissionController] = {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._health_scheduler: Optional[HealthCheckScheduler] = None
+        # Whether backends run their background work (e.g. keep-warm pings) while registered
+        self._backends_started = False
+        self._backend_stops: Set[asyncio.Task] = set()
+        self.retry_budget = RetryBudget()
+        self._resilience_stats = {
+            "retries": 0,
+            "hedged_requests": 0,
+            "hedge_wins": 0,
+            "fanout_requests": 0,
+            "fanout_cancelled_calls": 0
+        }
+        self._singleflight = SingleFlight()
+
+    async def register_service(
+        self,
+        service: ServiceCreate,
+        backend: Optional[BaseBotService] = None
+    ) -> ServiceResponse:
+        """
+        Register a new bot service with the orchestrator.
 
-    async def register_service(self, service: ServiceCreate) -> ServiceResponse:
-        """Register a new bot service with the orchestrator."""
+        Args:
+            service (ServiceCreate): The service definition.
+            backend (BaseBotService, optional): In-process adapter that handles
+                the service's queries, such as ``EchoBotService`` or
+                ``OpenAIService``. Defaults to an ``HTTPBotService`` calling
+                the service endpoint.
+        """
         if service.name in self.services:
             raise ValueError(f"Service {service.name} already exists")
+
+        timeout_seconds = getattr(service, "timeout_seconds", 30.0)
+        max_concurrent_requests = getattr(service, "max_concurrent_requests", None)
+        max_queue_depth = getattr(service, "max_queue_depth", None)
+        if max_queue_depth is None:
+            max_queue_depth = settings.SERVICE_MAX_QUEUE_DEPTH
+        max_queue_wait_seconds = getattr(service, "max_queue_wait_seconds", None)
+        if max_queue_wait_seconds is None:
+            max_queue_wait_seconds = settings.SERVICE_MAX_QUEUE_WAIT_SECONDS
+        batch_endpoint = getattr(service, "batch_endpoint", None)
+        max_batch_size = getattr(service, "max_batch_size", None)
+        if max_batch_size is None:
+            max_batch_size = settings.BATCH_MAX_SIZE
+        max_batch_wait_seconds = getattr(service, "max_batch_wait_seconds", None)
+        if max_batch_wait_seconds is None:
+            max_batch_wait_seconds = settings.BATCH_MAX_WAIT_SECONDS
+        if backend is None:
+            # Adapters load on first use, keeping their HTTP stack out of startup
+            from app.services.http_service import HTTPBotService
+            backend = HTTPBotService(
+                name=service.name,
+                endpoint=service.endpoint,
+                capabilities=service.capabilities,
+                api_key=getattr(service, "api_key", None),
+                headers=getattr(service, "headers", None),
+                timeout_seconds=timeout_seconds,
+                batch_endpoint=batch_endpoint
+            )
         
         service_id = str(uuid.uuid4())
         service_response = ServiceResponse(
             id=service_id,
             name=service.name,
-            endpoint=service.endpoint,
+            endpoint=str(service.endpoint),
             capabilities=service.capabilities,
             description=service.description,
-            is_active=True
+            is_active=True,
+            max_concurrent_requests=max_concurrent_requests,
+            timeout_seconds=timeout_seconds,
+            max_queue_depth=max_queue_depth,
+            max_queue_wait_seconds=max_queue_wait_seconds,
+            batch_endpoint=str(batch_endpoint) if batch_endpoint else None,
+            max_batch_size=max_batch_size,
+            max_batch_wait_seconds=max_batch_wait_seconds,
+            rate_limit_per_minute=getattr(service, "rate_limit_per_minute", None)
         )
         
         self.services[service.name] = service_response
+        self._backends[service.name] = backend
+        if max_concurrent_requests:
+            self._admission[service.name] = AdmissionController(
+                service.name,
+                max_concurrent=max_concurrent_requests,
+                max_queue_depth=max_queue_depth,
+                max_queue_wait=max_queue_wait_seconds
+            )
+        if settings.MICRO_BATCHING_ENABLED and backend.supports_batching and max_batch_size > 1:
+            self._batchers[service.name] = MicroBatcher(
+                lambda queries, name=service.name, backend=backend: self._send_batch(name, backend, queries),
+                max_batch_size=max_batch_size,
+                max_wait=max_batch_wait_seconds
+            )
         self._load_metrics[service.name] = {
             "requests": 0,
+            # In-flight requests on other workers, from the shared registry
+            "remote_requests": 0,
             "success": 0,
-            "total_time": 0
+            "failures": 0,
+            "total_time": 0,
+            "samples": 0,
+            "ewma_latency": 0.0,
+            "ewma_error_rate": 0.0,
+            "recent_latencies": deque(maxlen=settings.LATENCY_WINDOW_SIZE),
+            # Upstream-reported timing name -> [total seconds, count]
+            "backend_timings": {}
         }
+        backend.timings_listener = lambda timings, name=service.name: self._record_timings(name, timings)
+        self._breakers[service.name] = CircuitBreaker(
+            on_state_change=lambda state, name=service.name: self._on_circuit_change(name, state)
+        )
+        self.capability_index.add(service.name, service.capabilities)
+        self._services_changed()
+        if self._backends_started:
+            backend.start()
         return service_response
 
     def deregister_service(self, service_name: str) -> None:
         """Remove a bot service from the orchestrator."""
         if service_name in self.services:
+            self.capability_index.remove(service_name, self.services[service_name].capabilities)
             del self.services[service_name]
             del self._load_metrics[service_name]
+            backend = self._backends.pop(service_name)
+            backend.timings_listener = None
+            if self._backends_started:
+                stop = asyncio.create_task(backend.stop())
+                self._backend_stops.add(stop)
+                stop.add_done_callback(self._backend_stops.discard)
+            self._admission.pop(service_name, None)
+            batcher = self._batchers.pop(service_name, None)
+            if batcher is not None:
+                batcher.flush()
+            self._breakers.pop(service_name, None)
+            self._last_health_check.pop(service_name, None)
+            metrics_registry.remove_service(service_name)
+            self._services_changed()
+
+    def get_backend(self, service_name: str) -> Optional[BaseBotService]:
+        """Get the adapter handling a service's queries, or None if it is not registered."""
+        return self._backends.get(service_name)
+
+    def _services_changed(self) -> None:
+        """Drop views of the registry so they are rebuilt on next use."""
+        self._available_services = None
+        self._services_payload = None
+
+    def _active_services(self) -> List[BotService]:
+        """Active services, rebuilt only after the registry changes."""
+        if self._available_services is None:
+            self._available_services = [
+                service for service in self.services.values() if service.is_active
+            ]
+        return self._available_services
 
     def get_available_services(self) -> List[BotService]:
         """Get list of all active services."""
-        return [service for service in self.services.values() if service.is_active]
+        return list(self._active_services())
 
-    async def route_query(self, query: str) -> Optional[BotService]:
-        """Route a query to the most appropriate bot service."""
-        available_services = self.get_available_services()
-        if not available_services:
-            return None
+    def get_services_payload(self, render: Callable[[List[ServiceResponse]], bytes]) -> bytes:
+        """
+        Get the active services serialized by ``render``.
+
+        The result is cached until a service is registered, deregistered or
+        changes state, so listing services does not re-serialize them.
+        """
+        if self._services_payload is None:
+            self._services_payload = render(self._active_services())
+        return self._services_payload
+
+    def set_service_active(self, service_name: str, is_active: bool) -> None:
+        """Mark a service as active or inactive for routing."""
+        self.services[service_name].is_active = is_active
+        self._services_changed()
 
-        # Simple load balancing - choose service with least current load
-        return min(
-            available_services,
-            key=lambda s: self._load_metrics[s.name]["requests"]
+    def _on_circuit_change(self, service_name: str, state: CircuitState) -> None:
+        """Take a service out of rotation while its circuit is open."""
+        if service_name in self.services:
+            self.set_service_active(service_name, state != CircuitState.OPEN)
+
+    async def check_service_health(self, service_name: str) -> bool:
+        """Probe a service's health check and feed the result to its circuit breaker."""
+        backend = self._backends[service_name]
+        start_time = time.time()
+        try:
+            healthy = await asyncio.wait_for(
+                backend.health_check(), settings.HEALTH_CHECK_TIMEOUT_SECONDS
+            )
+        except Exception:
+            healthy = False
+
+        self._last_health_check[service_name] = time.time()
+        breaker = self._breakers.get(service_name)
+        if breaker is not None:
+            if healthy:
+                breaker.record_success(time.time() - start_time)
+            else:
+                breaker.record_failure()
+        return healthy
+
+    def start_health_checks(self) -> None:
+        """Start the background health-probe scheduler."""
+        if self._health_scheduler is None:
+            self._health_scheduler = HealthCheckScheduler(self)
+            self._health_scheduler.start()
+
+    async def stop_health_checks(self) -> None:
+        """Stop the background health-probe scheduler."""
+        if self._health_scheduler is not None:
+            await self._health_scheduler.stop()
+            self._health_scheduler = None
+
+    def start_backends(self) -> None:
+        """Start the background work of registered backends, and of backends registered later."""
+        self._backends_started = True
+        for backend in self._backends.values():
+            backend.start()
+
+    async def stop_backends(self) -> None:
+        """Stop the background work of all backends."""
+        self._backends_started = False
+        await asyncio.gather(
+            *(backend.stop() for backend in self._backends.values()),
+            *self._backend_stops,
+            return_exceptions=True
         )
 
-    async def process_query(self, query: str) -> Dict:
+    async def route_query(
+        self,
+        query: str,
+        capabilities: Optional[List[str]] = None,
+        exclude: Optional[Set[str]] = None
+    ) -> Optional[BotService]:
+        """
+        Route a query to the most appropriate bot service.
+
+        Candidates are narrowed to the services providing every required
+        capability, taken from ``capabilities`` when given and otherwise
+        inferred from the query. Inferred capabilities are a preference: if
+        no active service matches, any active service may answer. Services
+        in ``exclude`` (e.g. ones that just shed the query) are skipped.
+        """
+        candidates = self._candidate_services(query, capabilities, exclude)
+        if not candidates:
+            return None
+        return self.routing_strategy.select(candidates, self._load_metrics)
+
+    def _candidate_services(
+        self,
+        query: str,
+        capabilities: Optional[List[str]] = None,
+        exclude: Optional[Set[str]] = None
+    ) -> List[BotService]:
+        """Active services that may answer a query, as described in ``route_query``."""
+        required = set(capabilities) if capabilities else self.classifier.classify(query)
+        if required:
+            candidates = [
+                self.services[name]
+                for name in self.capability_index.lookup(required)
+                if self.services[name].is_active and not (exclude and name in exclude)
+            ]
+            if candidates or capabilities:
+                return candidates
+
+        available_services = self._active_services()
+        if exclude:
+            available_services = [s for s in available_services if s.name not in exclude]
+        return available_services
+
+    async def process_query(self, query: str, capabilities: Optional[List[str]] = None) -> Dict:
         """Process a query through the appropriate bot service."""
-        service = await self.route_query(query)
-        if not service:
+        cache_model = "orchestrator:" + ",".join(sorted(capabilities or []))
+        if self.response_cache is not None:
+            cached = await self.response_cache.lookup(
+                cache_model, query, temperature=settings.TEMPERATURE
+            )
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return await self._process_uncached(query, capabilities, cache_model)
+
+        # Identical concurrent queries share a single upstream call
+        key = (" ".join(query.split()), tuple(sorted(capabilities or [])))
+        response = await self._singleflight.do(
+            key, lambda: self._process_uncached(query, capabilities, cache_model)
+        )
+        return dict(response)
+
+    async def _process_uncached(
+        self,
+        query: str,
+        capabilities: Optional[List[str]],
+        cache_model: str
+    ) -> Dict:
+        """Route and dispatch a query that missed the response cache."""
+        # Spill over to the next capable service while the chosen one sheds load
+        shed: Set[str] = set()
+        overloaded: Optional[ServiceOverloadedError] = None
+        while True:
+            service = await self.route_query(query, capabilities, exclude=shed)
+            if not service:
+                if overloaded is not None:
+                    return self._overload_error(overloaded)
+                return {"error": "No suitable service found for query"}
+
+            try:
+                response = await self._dispatch_hedged(service, query, capabilities)
+                break
+            except ServiceOverloadedError as e:
+                overloaded = e
+                shed.add(service.name)
+            except asyncio.TimeoutError:
+                return {"error": f"Service {service.name} timed out after {service.timeout_seconds}s"}
+            except Exception as e:
+                return {"error": f"Service error: {str(e)}"}
+
+        if self.response_cache is not None:
+            await self.response_cache.store(
+                response, cache_model, query, temperature=settings.TEMPERATURE
+            )
+        return response
+
+    async def fan_out(
+        self,
+        query: str,
+        capabilities: Optional[List[str]] = None,
+        policy: Optional[AggregationPolicy] = None,
+        max_services: Optional[int] = None
+    ) -> Dict:
+        """
+        Send a query to several capable services at once and aggregate their answers.
+
+        Up to ``max_services`` candidates, cheapest first, are called
+        concurrently. Successful responses are handed to ``policy`` as they
+        arrive (first-successful by default); once it is satisfied or its
+        deadline passes, the calls still outstanding are cancelled so no
+        more upstream work is paid for. Failed calls are not retried, since
+        the other services already provide redundancy.
+        """
+        policy = policy or FirstSuccessfulPolicy()
+        if max_services is None:
+            max_services = settings.FANOUT_MAX_SERVICES
+        candidates = self._candidate_services(query, capabilities)
+        if not candidates:
             return {"error": "No suitable service found for query"}
-        
+        candidates = sorted(candidates, key=lambda s: service_cost(self._load_metrics[s.name]))[:max_services]
+
+        self._resilience_stats["fanout_requests"] += 1
+        tasks = {
+            asyncio.create_task(self._dispatch(service, query)): service
+            for service in candidates
+        }
+        responses: List[Dict[str, Any]] = []
+        errors: Dict[str, BaseException] = {}
+        pending = set(tasks)
+        deadline = time.monotonic() + policy.deadline
         try:
-            self._load_metrics[service.name]["requests"] += 1
-            start_time = time.time()
-            
-            # Simulate processing (replace with actual service call)
-            await asyncio.sleep(0.1)
-            response = {
-                "service": service.name,
-                "response": f"Processed by {service.name}: {query}"
-            }
-            
-            # Update metrics
-            self._load_metrics[service.name]["success"] += 1
-            self._load_metrics[service.name]["total_time"] += time.time() - start_time
-            
-            return response
+            while pending and not policy.satisfied(responses):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Several calls may finish together; take them in dispatch order
+                for task in (task for task in tasks if task in done):
+                    if task.exception() is None:
+                        responses.append(task.result())
+                    else:
+                        errors[tasks[task].name] = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(self._consume_exception)
+            self._resilience_stats["fanout_cancelled_calls"] += len(pending)
+
+        fanout = {
+            "services": [service.name for service in candidates],
+            "responded": len(responses),
+            "cancelled": len(pending)
+        }
+        if responses:
+            return {**policy.aggregate(responses), "fanout": fanout}
+        if errors and all(isinstance(error, ServiceOverloadedError) for error in errors.values()):
+            return self._overload_error(next(iter(errors.values())))
+        if pending:
+            return {"error": f"No service answered within {policy.deadline}s", "fanout": fanout}
+        return {
+            "error": "All services failed: " + "; ".join(
+                f"{name}: {str(error) or type(error).__name__}" for name, error in errors.items()
+            ),
+            "fanout": fanout
+        }
+
+    async def stream_query(
+        self,
+        query: str,
+        capabilities: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Process a query through the appropriate bot service, yielding chunks.
+
+        Each event is a dict with the ``service`` name and a ``chunk`` of the
+        response, or a single ``error`` dict mirroring ``process_query``.
+        The request only counts as a success once the stream completes; a
+        client that disconnects mid-stream still releases its load slot.
+        """
+        shed: Set[str] = set()
+        overloaded: Optional[ServiceOverloadedError] = None
+        while True:
+            service = await self.route_query(query, capabilities, exclude=shed)
+            if not service:
+                if overloaded is not None:
+                    yield self._overload_error(overloaded)
+                else:
+                    yield {"error": "No suitable service found for query"}
+                return
+
+            try:
+                async with aclosing(self._dispatch_stream(service, query)) as chunks:
+                    async for chunk in chunks:
+                        yield {"service": service.name, "chunk": chunk}
+                return
+            except ServiceOverloadedError as e:
+                # Admission happens before the first chunk, so nothing was sent yet
+                overloaded = e
+                shed.add(service.name)
+            except asyncio.TimeoutError:
+                yield {"error": f"Service {service.name} timed out after {service.timeout_seconds}s"}
+                return
+            except Exception as e:
+                yield {"error": f"Service error: {str(e)}"}
+                return
+
+    @staticmethod
+    def _overload_error(error: ServiceOverloadedError) -> Dict[str, Any]:
+        """Error response telling the client to back off and retry."""
+        return {
+            "error": str(error),
+            "status_code": 503,
+            "retry_after": error.retry_after
+        }
+
+    async def _dispatch_hedged(
+        self,
+        service: ServiceResponse,
+        query: str,
+        capabilities: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Dispatch a query, hedging to a second capable service if it runs slow.
+
+        With hedging enabled, if the primary has not answered within the
+        HEDGE_PERCENTILE latency of its recent requests, a duplicate goes to
+        another capable service and the first success wins; the loser is
+        cancelled. Hedges draw from the same budget as retries.
+        """
+        self.retry_budget.record_request()
+        if not settings.HEDGING_ENABLED:
+            return await self._dispatch_with_retries(service, query)
+
+        primary = asyncio.create_task(self._dispatch_with_retries(service, query))
+        primary.add_done_callback(self._consume_exception)
+        hedge: Optional[asyncio.Task] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self._hedge_delay(service.name))
+            if done:
+                return primary.result()
+
+            hedge_service = await self.route_query(query, capabilities, exclude={service.name})
+            if hedge_service is None or not self.retry_budget.try_spend():
+                return await primary
+
+            self._resilience_stats["hedged_requests"] += 1
+            hedge = asyncio.create_task(self._dispatch_with_retries(hedge_service, query))
+            hedge.add_done_callback(self._consume_exception)
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._resilience_stats["hedge_wins"] += 1
+                        return task.result()
+            # Both failed; report the primary's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _hedge_delay(self, service_name: str) -> float:
+        """How long to wait on a service before hedging, from its latency percentile."""
+        samples = self._load_metrics[service_name]["recent_latencies"]
+        if len(samples) < settings.HEDGE_MIN_SAMPLES:
+            return settings.HEDGE_DEFAULT_DELAY_SECONDS
+        return latency_percentile(samples, settings.HEDGE_PERCENTILE)
+
+    @staticmethod
+    def _consume_exception(task: asyncio.Task) -> None:
+        """Mark a background attempt's exception as retrieved."""
+        if not task.cancelled():
+            task.exception()
+
+    async def _dispatch_with_retries(self, service: ServiceResponse, query: str) -> Dict[str, Any]:
+        """Dispatch a query, retrying failures on the same service within the retry budget."""
+        if settings.RETRY_MAX_ATTEMPTS <= 1:
+            return await self._dispatch(service, query)
+        from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(settings.RETRY_MAX_ATTEMPTS),
+            wait=wait_random_exponential(
+                multiplier=settings.RETRY_BACKOFF_SECONDS,
+                max=settings.RETRY_MAX_BACKOFF_SECONDS
+            ),
+            retry=retry_if_exception(lambda e: self._should_retry(service.name, e)),
+            reraise=True
+        )
+        return await retrying(self._dispatch, service, query)
+
+    def _should_retry(self, service_name: str, error: BaseException) -> bool:
+        """Retry backend failures while the service is in rotation and the budget allows."""
+        if not isinstance(error, Exception):
+            return False  # Never retry a cancelled attempt
+        if isinstance(error, ServiceOverloadedError):
+            return False  # Shed load is handled by spilling over, not retrying
+        service = self.services.get(service_name)
+        if service is None or not service.is_active:
+            return False
+        if not self.retry_budget.try_spend():
+            return False
+        self._resilience_stats["retries"] += 1
+        return True
+
+    async def _dispatch(self, service: ServiceResponse, query: str) -> Dict[str, Any]:
+        """
+        Call a service's backend, enforcing its concurrency limit and timeout.
+
+        Raises whatever the backend raises (``asyncio.TimeoutError`` on
+        timeout) after recording the failure in the service metrics.
+        """
+        metrics = self._load_metrics[service.name]
+        backend = self._backends[service.name]
+        metrics["requests"] += 1
+        start_time = time.time()
+        batcher = self._batchers.get(service.name)
+        trial: Optional[CircuitBreaker] = None
+        try:
+            await self._check_rate_limit(service)
+            trial = self._admit_through_breaker(service.name)
+            if batcher is not None:
+                # The batch takes the admission slot, so waiting in it is bounded too
+                result = await asyncio.wait_for(batcher.submit(query), service.timeout_seconds)
+            else:
+                async with self._admission_slot(service.name):
+                    result = await asyncio.wait_for(
+                        backend.process_query(query), service.timeout_seconds
+                    )
+        except ServiceOverloadedError as e:
+            metrics_registry.count_error(service.name, e)
+            raise
         except Exception as e:
-            return {"error": f"Service error: {str(e)}"}
+            self._record_failure(service.name, time.time() - start_time, e)
+            raise
         finally:
-            self._load_metrics[service.name]["requests"] -= 1
+            metrics["requests"] -= 1
+            if trial is not None:
+                trial.release_trial()
+
+        self._record_success(service.name, time.time() - start_time)
+        return {**result, "service": service.name}
+
+    async def _send_batch(
+        self,
+        service_name: str,
+        backend: BaseBotService,
+        queries: List[str]
+    ) -> List[Any]:
+        """
+        Send a micro-batch to a service's backend as one upstream call.
+
+        Each query takes its own admission slot, so a batch counts against
+        the concurrency limit like the same number of single requests. Queries
+        shed by admission control get their ``ServiceOverloadedError`` as
+        their result and the rest are sent.
+        """
+        controller = self._admission.get(service_name)
+        if controller is None:
+            return await backend.process_batch(queries)
+
+        held = 0
+
+        async def acquire() -> None:
+            nonlocal held
+            await controller.acquire()
+            held += 1
+
+        try:
+            admissions = await asyncio.gather(*(acquire() for _ in queries), return_exceptions=True)
+            admitted = [query for query, error in zip(queries, admissions) if error is None]
+            results = iter(await backend.process_batch(admitted) if admitted else [])
+        finally:
+            for _ in range(held):
+                controller.release()
+        return [next(results) if error is None else error for error in admissions]
+
+    async def _dispatch_stream(self, service: ServiceResponse, query: str) -> AsyncIterator[str]:
+        """Stream from a service's backend; the timeout bounds the whole stream."""
+        metrics = self._load_metrics[service.name]
+        backend = self._backends[service.name]
+        metrics["requests"] += 1
+        start_time = time.time()
+        first_chunk = True
+        trial: Optional[CircuitBreaker] = None
+        try:
+            await self._check_rate_limit(service)
+            trial = self._admit_through_breaker(service.name)
+            async with self._admission_slot(service.name), \
+                    aclosing(backend.stream_query(query)) as chunks:
+                while True:
+                    remaining = None
+                    if service.timeout_seconds is not None:
+                        remaining = max(start_time + service.timeout_seconds - time.time(), 0)
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        break
+                    if first_chunk:
+                        first_chunk = False
+                        metrics_registry.observe_first_token(service.name, time.time() - start_time)
+                    yield chunk
+        except ServiceOverloadedError as e:
+            metrics_registry.count_error(service.name, e)
+            raise
+        except Exception as e:
+            self._record_failure(service.name, time.time() - start_time, e)
+            raise
+        finally:
+            metrics["requests"] -= 1
+            if trial is not None:
+                trial.release_trial()
+
+        self._record_success(service.name, time.time() - start_time)
+
+    async def _check_rate_limit(self, service: ServiceResponse) -> None:
+        """Shed a request that would exceed the service's cluster-wide rate limit."""
+        if self.rate_limiter is None or not service.rate_limit_per_minute:
+            return
+        result = await self.rate_limiter.check({
+            RateLimiter.key("service", service.name): service.rate_limit_per_minute
+        })
+        if not result.allowed:
+            raise ServiceOverloadedError(service.name, "rate limited", result.retry_after)
+
+    def _admit_through_breaker(self, service_name: str) -> Optional[CircuitBreaker]:
+        """
+        Shed a request the service's circuit breaker does not admit.
+
+        Returns:
+            Optional[CircuitBreaker]: The breaker whose half-open trial slot the
+            request took, to release when it finishes; None outside half-open.
+        """
+        breaker = self._breakers[service_name]
+        half_open = breaker.state == CircuitState.HALF_OPEN
+        if not breaker.allow_request():
+            raise ServiceOverloadedError(service_name, f"circuit {breaker.state.value}")
+        return breaker if half_open else None
+
+    def _admission_slot(self, service_name: str):
+        """Slot context for a service, a no-op when it has no concurrency limit."""
+        controller = self._admission.get(service_name)
+        return controller.slot() if controller is not None else nullcontext()
+
+    def _record_success(self, service_name: str, elapsed: float) -> None:
+        metrics = self._load_metrics.get(service_name)
+        if metrics is None:
+            return  # Deregistered while the request was in flight
+        metrics["success"] += 1
+        metrics["total_time"] += elapsed
+        metrics["recent_latencies"].append(elapsed)
+        record_outcome(metrics, elapsed, True)
+        metrics_registry.observe_request(service_name, elapsed, True)
+        self._breakers[service_name].record_success(elapsed)
+
+    def _record_failure(self, service_name: str, elapsed: float, error: BaseException) -> None:
+        metrics = self._load_metrics.get(service_name)
+        if metrics is None:
+            return
+        metrics["failures"] += 1
+        record_outcome(metrics, elapsed, False)
+        metrics_registry.observe_request(service_name, elapsed, False)
+        metrics_registry.count_error(service_name, error)
+        self._breakers[service_name].record_failure()
+
+    def get_local_load(self) -> Dict[str, int]:
+        """In-flight requests per service on this worker."""
+        return {name: metrics["requests"] for name, metrics in self._load_metrics.items()}
+
+    def set_remote_load(self, remote: Dict[str, int]) -> None:
+        """Set the in-flight requests per service on other workers, used for routing."""
+        for name, metrics in self._load_metrics.items():
+            metrics["remote_requests"] = remote.get(name, 0)
+
+    def _record_timings(self, service_name: str, timings: Dict[str, float]) -> None:
+        metrics = self._load_metrics.get(service_name)
+        if metrics is None:
+            return
+        for name, value in timings.items():
+            totals = metrics["backend_timings"].setdefault(name, [0.0, 0])
+            totals[0] += value
+            totals[1] += 1
 
     def get_service_metrics(self, service_name: str) -> Dict:
         """Get performance metrics for a service."""
@@ -116,9 +807,9 @@ class ChatbotOrchestrator:
             raise KeyError(f"Service {service_name} not found")
         
         metrics = self._load_metrics[service_name]
-        total_requests = metrics["success"]
+        total_requests = metrics["success"] + metrics["failures"]
         if total_requests > 0:
-            avg_time = metrics["total_time"] / total_requests
+            avg_time = metrics["total_time"] / metrics["success"] if metrics["success"] else 0
             success_rate = (metrics["success"] / total_requests) * 100
         else:
             avg_time = 0
@@ -126,9 +817,52 @@ class ChatbotOrchestrator:
             
         return {
             "current_load": metrics["requests"],
+            "cluster_load": metrics["requests"] + metrics["remote_requests"],
             "total_requests": total_requests,
             "success_rate": success_rate,
-            "average_response_time": avg_time
+            "average_response_time": avg_time,
+            "ewma_latency": metrics["ewma_latency"],
+            "ewma_error_rate": metrics["ewma_error_rate"],
+            "circuit_state": self._breakers[service_name].state.value,
+            "last_health_check": self._last_health_check.get(service_name),
+            "backend_timings": {
+                name: total / count for name, (total, count) in metrics["backend_timings"].items()
+            },
+            **self._admission_stats(service_name),
+            **self._batching_stats(service_name)
+        }
+
+    def get_resilience_metrics(self) -> Dict[str, int]:
+        """Get orchestrator-wide retry, hedging, fan-out and request coalescing counters."""
+        singleflight = self._singleflight.get_stats()
+        return {
+            **self._resilience_stats,
+            **self.retry_budget.get_stats(),
+            "coalesced_requests": singleflight["coalesced"],
+            "singleflight_leaders": singleflight["leaders"]
+        }
+
+    def _batching_stats(self, service_name: str) -> Dict[str, Any]:
+        batcher = self._batchers.get(service_name)
+        if batcher is None:
+            return {}
+        return {"batching": batcher.get_stats()}
+
+    def _admission_stats(self, service_name: str) -> Dict[str, Any]:
+        controller = self._admission.get(service_name)
+        if controller is None:
+            return {
+                "queue_depth": 0,
+                "rejected_requests": 0,
+                "average_queue_wait": 0.0,
+                "max_queue_wait": 0.0
+            }
+        stats = controller.get_stats()
+        return {
+            "queue_depth": stats["queue_depth"],
+            "rejected_requests": stats["rejected_requests"],
+            "average_queue_wait": stats["average_queue_wait"],
+            "max_queue_wait": stats["max_queue_wait"]
         }
 
     def _check_model_authorization(self, model_name: str) -> None:
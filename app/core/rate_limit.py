@@ -0,0 +1,234 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import math
+import time
+from starlette.requests import HTTPConnection
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+# Token buckets refilling ``capacity`` tokens per minute, checked and charged
+# atomically in one round trip. A request must find a token in every bucket.
+#
+# KEYS: bucket keys
+# ARGV: capacity and pending charge for each key, interleaved. The pending
+#       charge covers requests already admitted by a worker's local pre-check.
+# Returns: {allowed, retry_after_ms, remaining}
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tokens = {}
+local allowed = 1
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local pending = tonumber(ARGV[2 * i])
+    local rate = capacity / 60000
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local t = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    t = math.min(capacity, t + math.max(now - ts, 0) * rate) - pending
+    tokens[i] = t
+    if t < 1 then
+        allowed = 0
+        retry_after = math.max(retry_after, math.ceil((1 - t) / rate))
+    end
+end
+local remaining = nil
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local t = tokens[i]
+    if allowed == 1 then
+        t = t - 1
+    end
+    redis.call('HSET', key, 'tokens', t, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil((capacity - t) / (capacity / 60000)) + 1000)
+    if remaining == nil or t < remaining then
+        remaining = t
+    end
+end
+return {allowed, retry_after, math.floor(remaining or 0)}
+"""
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    retry_after: float
+    remaining: int
+
+class _LocalBucket:
+    __slots__ = ("remaining", "synced_at", "pending")
+
+    def __init__(self):
+        self.remaining = 0
+        self.synced_at = 0.0
+        self.pending = 0
+
+class RateLimiter:
+    """
+    Cluster-wide per-minute rate limits backed by a Redis token-bucket script.
+
+    Every check is one EVALSHA round trip, atomic across workers and nodes.
+    Clients that are clearly under their limits skip Redis: after a check
+    leaves ``remaining`` tokens, a worker may admit up to
+    ``local_fraction * remaining`` more requests for ``local_sync_seconds``
+    on its own, charging them to Redis with its next check. Clients near
+    their limit always go to Redis. If Redis fails, requests are allowed
+    without trying it again for ``failure_backoff`` seconds.
+    """
+
+    KEY_PREFIX = "ratelimit:"
+
+    def __init__(
+        self,
+        redis,
+        local_fraction: Optional[float] = None,
+        local_sync_seconds: Optional[float] = None,
+        failure_backoff: Optional[float] = None
+    ):
+        self.redis = redis
+        self.local_fraction = local_fraction if local_fraction is not None else settings.RATE_LIMIT_LOCAL_FRACTION
+        self.local_sync_seconds = (
+            local_sync_seconds if local_sync_seconds is not None else settings.RATE_LIMIT_LOCAL_SYNC_SECONDS
+        )
+        self.failure_backoff = (
+            failure_backoff if failure_backoff is not None else settings.RATE_LIMIT_FAILURE_BACKOFF_SECONDS
+        )
+        self._redis_retry_at = 0.0
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._local = LRUCache(max_entries=10000)
+        self.local_hits = 0
+        self.redis_checks = 0
+
+    @classmethod
+    def key(cls, dimension: str, value: str, hashed: bool = False) -> str:
+        """Build a bucket key, hashing values such as API keys that must not be stored."""
+        if hashed:
+            value = hashlib.sha256(value.encode()).hexdigest()[:32]
+        return f"{cls.KEY_PREFIX}{dimension}:{value}"
+
+    def _local_check(self, buckets: List[Tuple[str, _LocalBucket]], now: float) -> bool:
+        for _, bucket in buckets:
+            if now - bucket.synced_at >= self.local_sync_seconds:
+                return False
+            if bucket.pending + 1 > bucket.remaining * self.local_fraction:
+                return False
+        for _, bucket in buckets:
+            bucket.pending += 1
+        return True
+
+    async def check(self, limits: Dict[str, int]) -> RateLimitResult:
+        """
+        Take one request from each bucket, given as key -> requests per minute.
+
+        Fails open (allowing the request) when Redis is unreachable.
+        """
+        limits = {key: limit for key, limit in limits.items() if limit > 0}
+        now = time.monotonic()
+        if not limits or now < self._redis_retry_at:
+            return RateLimitResult(True, 0.0, -1)
+
+        buckets = []
+        for key in limits:
+            bucket = self._local.get(key)
+            if bucket is None:
+                bucket = _LocalBucket()
+                self._local.set(key, bucket)
+            buckets.append((key, bucket))
+        if self._local_check(buckets, now):
+            self.local_hits += 1
+            return RateLimitResult(True, 0.0, min(int(b.remaining) - b.pending for _, b in buckets))
+
+        # Hand the locally admitted requests over to this check's charge
+        pending = {key: bucket.pending for key, bucket in buckets}
+        for _, bucket in buckets:
+            bucket.pending = 0
+        args = []
+        for key, limit in limits.items():
+            args.extend((limit, pending[key]))
+
+        self.redis_checks += 1
+        try:
+            allowed, retry_after_ms, remaining = await self._script(keys=list(limits), args=args)
+        except Exception as e:
+            print(f"Error checking rate limit: {str(e)}")
+            self._redis_retry_at = time.monotonic() + self.failure_backoff
+            for key, bucket in buckets:
+                bucket.pending += pending[key]
+            return RateLimitResult(True, 0.0, -1)
+
+        synced_at = time.monotonic()
+        for _, bucket in buckets:
+            bucket.remaining = max(int(remaining), 0)
+            bucket.synced_at = synced_at
+        return RateLimitResult(bool(allowed), int(retry_after_ms) / 1000, int(remaining))
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get counters of checks answered locally and by Redis."""
+        return {
+            "local_hits": self.local_hits,
+            "redis_checks": self.redis_checks
+        }
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-API-key and per-model limits on API routes.
+
+    The client is identified by its ``X-API-Key`` header or bearer token,
+    falling back to its address; the model by a ``model`` query parameter
+    or ``X-Model`` header. Rejected requests get a 429 with Retry-After.
+    """
+
+    def __init__(self, app, get_limiter, path_prefix: Optional[str] = None):
+        self.app = app
+        self.get_limiter = get_limiter
+        self.path_prefix = path_prefix if path_prefix is not None else settings.API_V1_STR
+
+    @staticmethod
+    def _limits(scope) -> Dict[str, int]:
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        client = headers.get("x-api-key")
+        if client is None and headers.get("authorization", "").lower().startswith("bearer "):
+            client = headers["authorization"][len("bearer "):]
+        if client:
+            limits = {RateLimiter.key("key", client, hashed=True): settings.RATE_LIMIT_PER_MINUTE}
+        else:
+            host = scope["client"][0] if scope.get("client") else "unknown"
+            limits = {RateLimiter.key("ip", host): settings.RATE_LIMIT_PER_MINUTE}
+
+        model = headers.get("x-model")
+        if model is None:
+            # Decoded the way the route will see it, so "gpt%2D4" and "gpt-4" share a bucket
+            model = HTTPConnection(scope).query_params.get("model")
+        if model and model in settings.MODEL_RATE_LIMITS:
+            limits[RateLimiter.key("model", model)] = settings.MODEL_RATE_LIMITS[model]
+        return limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        limiter: Optional[RateLimiter] = self.get_limiter()
+        if limiter is not None:
+            result = await limiter.check(self._limits(scope))
+            if not result.allowed:
+                await self._reject(scope, send, result)
+                return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope, send, result: RateLimitResult) -> None:
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(math.ceil(result.retry_after), 1)).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
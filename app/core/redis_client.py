@@ -0,0 +1,84 @@
+from typing import TYPE_CHECKING, Any, List, Optional
+import logging
+from app.core.config import settings
+from app.core.metrics import redis_timer
+
+if TYPE_CHECKING:
+    import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+# Global instance shared by conversations, the registry, caching and rate limiting
+_redis_client: Optional["redis.Redis"] = None
+
+def create_redis_client() -> "redis.Redis":
+    """Build a Redis client over a bounded connection pool from the Redis settings."""
+    # Imported here so workers with no Redis-backed feature enabled do not pay for it
+    import redis.asyncio as redis
+    from redis.utils import HIREDIS_AVAILABLE
+
+    if not HIREDIS_AVAILABLE:
+        logger.info("hiredis is not installed; using the pure-Python Redis parser")
+
+    pool = redis.BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        # How long a request waits for a free connection before failing
+        timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+        protocol=settings.REDIS_PROTOCOL,
+        decode_responses=True
+    )
+    return redis.Redis(connection_pool=pool)
+
+def get_redis_client() -> "redis.Redis":
+    """Get the shared Redis client, creating it on first use."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = create_redis_client()
+    return _redis_client
+
+async def close_redis_client() -> None:
+    """Close the shared Redis client and disconnect its pooled connections."""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
+
+class Pipelined:
+    """
+    Queue several commands and send them to Redis in one round trip.
+
+    The commands run when the block exits, timed under ``operation``, and
+    their replies are then available as ``results``::
+
+        batch = Pipelined(redis, "get_conversation")
+        async with batch as pipe:
+            pipe.hgetall(meta_key)
+            pipe.lrange(messages_key, 0, -1)
+        meta, messages = batch.results
+
+    With ``transaction=True`` the commands run atomically in MULTI/EXEC.
+    """
+
+    def __init__(self, redis_client: "redis.Redis", operation: str, transaction: bool = False):
+        self.redis = redis_client
+        self.operation = operation
+        self.transaction = transaction
+        self.results: List[Any] = []
+        self._pipe = None
+
+    async def __aenter__(self):
+        self._pipe = self.redis.pipeline(transaction=self.transaction)
+        return self._pipe
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                with redis_timer(self.operation):
+                    self.results = await self._pipe.execute()
+        finally:
+            await self._pipe.reset()
+            self._pipe = None
@@ -0,0 +1,271 @@
+from typing import Any, Dict, Optional, Set
+import asyncio
+import dataclasses
+import json
+import logging
+import time
+import uuid
+from app.core.config import settings
+from app.core.metrics import redis_timer
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate, ServiceResponse
+from app.core.redis_client import Pipelined
+
+logger = logging.getLogger(__name__)
+
+# Apply a registry change, bump the version and announce it, atomically.
+# Changes are therefore published in version order. The announcement only
+# names the service, since configs can hold credentials; workers read the
+# config from the hash.
+#
+# KEYS: services hash, version key
+# ARGV: op ("register" | "deregister"), name, config JSON, worker ID, channel
+# Returns: the new version, or -1 if the change did not apply
+CHANGE_SCRIPT = """
+if ARGV[1] == 'register' then
+    if redis.call('HSETNX', KEYS[1], ARGV[2], ARGV[3]) == 0 then
+        return -1
+    end
+elseif redis.call('HDEL', KEYS[1], ARGV[2]) == 0 then
+    return -1
+end
+local version = redis.call('INCR', KEYS[2])
+redis.call('PUBLISH', ARGV[5], cjson.encode({
+    version = version, op = ARGV[1], name = ARGV[2], worker = ARGV[4]
+}))
+return version
+"""
+
+def service_config(service: Any) -> Dict[str, Any]:
+    """Serializable config of a service definition (pydantic model or dataclass)."""
+    if dataclasses.is_dataclass(service):
+        config = dataclasses.asdict(service)
+    else:
+        config = service.dict()
+    return json.loads(json.dumps(config, default=str))
+
+class ServiceRegistry:
+    """
+    Service registry shared by every worker through Redis.
+
+    Service configs live in the ``services`` hash alongside a version counter.
+    Each change bumps the version and is published on a channel, so workers
+    apply it to their in-memory orchestrator incrementally; a worker that
+    sees a gap in versions (e.g. after a reconnect) reloads the snapshot.
+
+    Workers also publish their per-service in-flight counts every
+    ``load_sync_interval`` seconds and route on the cluster-wide totals.
+    """
+
+    SERVICES_KEY = "services"
+    VERSION_KEY = "services:version"
+    CHANGES_CHANNEL = "services:changes"
+    WORKERS_KEY = "services:workers"
+    LOAD_KEY_PREFIX = "services:load:"
+
+    def __init__(
+        self,
+        redis,
+        orchestrator: ChatbotOrchestrator,
+        load_sync_interval: Optional[float] = None
+    ):
+        self.redis = redis
+        self.orchestrator = orchestrator
+        self.load_sync_interval = (
+            load_sync_interval if load_sync_interval is not None else settings.REGISTRY_LOAD_SYNC_SECONDS
+        )
+        self.worker_id = uuid.uuid4().hex
+        self.version = 0
+        # Config of each service this registry manages, to detect changes on resync
+        self._configs: Dict[str, Dict[str, Any]] = {}
+        self._script = redis.register_script(CHANGE_SCRIPT)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Load the current registry and follow changes and cluster load in the background."""
+        pubsub = self.redis.pubsub()
+        # Subscribe before loading, so no change between the two is missed
+        await pubsub.subscribe(self.CHANGES_CHANNEL)
+        await self.load_snapshot()
+        for coro in (self._listen(pubsub), self._sync_load_forever()):
+            task = asyncio.create_task(coro)
+            self._tasks.add(task)
+
+    async def stop(self) -> None:
+        """Stop following changes and withdraw this worker's load counters."""
+        # A cancellation landing as a message arrives can be swallowed while
+        # the reply is read, so keep cancelling until the tasks end
+        while not all(task.done() for task in self._tasks):
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.wait(self._tasks, timeout=0.1)
+        for task in self._tasks:
+            if not task.cancelled() and task.exception() is not None:
+                print(f"Error in registry background task: {str(task.exception())}")
+        self._tasks.clear()
+        try:
+            async with Pipelined(self.redis, "registry_load_sync") as pipe:
+                pipe.delete(self.LOAD_KEY_PREFIX + self.worker_id)
+                pipe.zrem(self.WORKERS_KEY, self.worker_id)
+        except Exception as e:
+            print(f"Error withdrawing worker load: {str(e)}")
+
+    async def register(self, service: Any) -> ServiceResponse:
+        """
+        Register a service cluster-wide.
+
+        Raises:
+            ValueError: If a service with this name is already registered.
+        """
+        config = service_config(service)
+        with redis_timer("registry_change"):
+            version = await self._script(
+                keys=[self.SERVICES_KEY, self.VERSION_KEY],
+                args=["register", service.name, json.dumps(config), self.worker_id, self.CHANGES_CHANNEL]
+            )
+        if version == -1:
+            raise ValueError(f"Service {service.name} already exists")
+        return await self._apply_register(service.name, config)
+
+    async def deregister(self, service_name: str) -> None:
+        """
+        Deregister a service cluster-wide.
+
+        Raises:
+            KeyError: If no such service is registered.
+        """
+        with redis_timer("registry_change"):
+            version = await self._script(
+                keys=[self.SERVICES_KEY, self.VERSION_KEY],
+                args=["deregister", service_name, "", self.worker_id, self.CHANGES_CHANNEL]
+            )
+        if version == -1 and service_name not in self.orchestrator.services:
+            raise KeyError(f"Service {service_name} not found")
+        self._apply_deregister(service_name)
+
+    async def load_snapshot(self) -> int:
+        """
+        Reconcile the local orchestrator with the registry in Redis.
+
+        Returns:
+            int: The registry version loaded.
+        """
+        batch = Pipelined(self.redis, "registry_snapshot", transaction=True)
+        async with batch as pipe:
+            pipe.hgetall(self.SERVICES_KEY)
+            pipe.get(self.VERSION_KEY)
+        services, version = batch.results
+
+        configs = {name: json.loads(data) for name, data in services.items()}
+        for name in list(self._configs):
+            if name not in configs:
+                self._apply_deregister(name)
+        for name, config in configs.items():
+            if self._configs.get(name) != config and not self._has_local_backend(name):
+                try:
+                    await self._apply_register(name, config)
+                except Exception as e:
+                    print(f"Error loading service {name}: {str(e)}")
+        self.version = int(version or 0)
+        return self.version
+
+    async def _apply_register(self, name: str, config: Dict[str, Any]) -> ServiceResponse:
+        fields = {field.name for field in dataclasses.fields(ServiceCreate)}
+        service = ServiceCreate(**{key: value for key, value in config.items() if key in fields})
+        if name in self.orchestrator.services:
+            self.orchestrator.deregister_service(name)
+        response = await self.orchestrator.register_service(service)
+        self._configs[name] = config
+        return response
+
+    def _has_local_backend(self, name: str) -> bool:
+        """
+        Whether a service was registered on this worker with its own backend
+        (e.g. an Ollama or OpenAI adapter), which the shared HTTP config must not replace.
+        """
+        # Imported here so workers that never call upstream services skip the HTTP stack
+        from app.services.http_service import HTTPBotService
+
+        backend = self.orchestrator.get_backend(name)
+        return backend is not None and not isinstance(backend, HTTPBotService)
+
+    def _apply_deregister(self, name: str) -> None:
+        self.orchestrator.deregister_service(name)
+        self._configs.pop(name, None)
+
+    async def _on_change(self, change: Dict[str, Any]) -> None:
+        """Apply a published change, reloading the snapshot if one was missed."""
+        version = change["version"]
+        if version <= self.version:
+            return
+        if version != self.version + 1:
+            logger.info("Registry moved from version %s to %s; reloading", self.version, version)
+            await self.load_snapshot()
+            return
+        self.version = version
+        if change["worker"] == self.worker_id:
+            return  # Already applied when the change was made
+        if self._has_local_backend(change["name"]):
+            logger.info("Keeping the local backend of service %s", change["name"])
+            return
+        if change["op"] == "register":
+            data = await self.redis.hget(self.SERVICES_KEY, change["name"])
+            if data is None:
+                return  # Deregistered since; that change follows
+            await self._apply_register(change["name"], json.loads(data))
+        else:
+            self._apply_deregister(change["name"])
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    await self._on_change(json.loads(message["data"]))
+                except Exception as e:
+                    print(f"Error applying registry change: {str(e)}")
+        finally:
+            await pubsub.unsubscribe(self.CHANGES_CHANNEL)
+            await pubsub.aclose()
+
+    async def sync_load(self) -> Dict[str, int]:
+        """
+        Publish this worker's in-flight counts and fetch the other workers'.
+
+        Returns:
+            Dict[str, int]: In-flight requests per service on other workers.
+        """
+        now = time.time()
+        ttl = self.load_sync_interval * 3
+        load_key = self.LOAD_KEY_PREFIX + self.worker_id
+        local = self.orchestrator.get_local_load()
+        batch = Pipelined(self.redis, "registry_load_sync")
+        async with batch as pipe:
+            pipe.delete(load_key)
+            if local:
+                pipe.hset(load_key, mapping=local)
+            pipe.pexpire(load_key, int(ttl * 1000))
+            pipe.zadd(self.WORKERS_KEY, {self.worker_id: now})
+            pipe.zremrangebyscore(self.WORKERS_KEY, "-inf", now - ttl)
+            pipe.zrange(self.WORKERS_KEY, 0, -1)
+
+        others = [worker for worker in batch.results[-1] if worker != self.worker_id]
+        remote: Dict[str, int] = {}
+        if others:
+            batch = Pipelined(self.redis, "registry_load_sync")
+            async with batch as pipe:
+                for worker in others:
+                    pipe.hgetall(self.LOAD_KEY_PREFIX + worker)
+            for load in batch.results:
+                for name, count in load.items():
+                    remote[name] = remote.get(name, 0) + int(count)
+        self.orchestrator.set_remote_load(remote)
+        return remote
+
+    async def _sync_load_forever(self) -> None:
+        while True:
+            try:
+                await self.sync_load()
+            except Exception as e:
+                logger.warning("Cluster load sync failed: %s", str(e))
+            await asyncio.sleep(self.load_sync_interval)
@@ -0,0 +1,65 @@
+from typing import Deque, Dict, Optional, Sequence
+from collections import deque
+import math
+import time
+from app.core.config import settings
+
+def latency_percentile(samples: Sequence[float], percentile: float) -> float:
+    """Nearest-rank percentile of a sample of latencies."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+class RetryBudget:
+    """
+    Global budget capping retries (and hedges) to a fraction of recent traffic.
+
+    Over a sliding ``window`` of seconds, at most ``ratio`` extra attempts are
+    allowed per original request, plus a floor of ``min_per_second`` so low
+    traffic can still retry. During an outage every request fails, and the
+    budget keeps retries from multiplying the load on the struggling backend.
+    """
+
+    def __init__(
+        self,
+        ratio: Optional[float] = None,
+        min_per_second: Optional[float] = None,
+        window: Optional[float] = None
+    ):
+        self.ratio = ratio if ratio is not None else settings.RETRY_BUDGET_RATIO
+        self.min_per_second = min_per_second if min_per_second is not None else settings.RETRY_BUDGET_MIN_PER_SECOND
+        self.window = window if window is not None else settings.RETRY_BUDGET_WINDOW_SECONDS
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self.granted = 0
+        self.denied = 0
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._requests and self._requests[0] < cutoff:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < cutoff:
+            self._retries.popleft()
+
+    def record_request(self) -> None:
+        """Record an original (non-retry) request."""
+        self._requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget, returning False if it is exhausted."""
+        now = time.monotonic()
+        self._expire(now)
+        allowed = self.ratio * len(self._requests) + self.min_per_second * self.window
+        if len(self._retries) >= allowed:
+            self.denied += 1
+            return False
+        self._retries.append(now)
+        self.granted += 1
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get retry budget counters."""
+        return {
+            "retries_granted": self.granted,
+            "retries_denied": self.denied
+        }
@@ -0,0 +1,247 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import hashlib
+import json
+import logging
+from app.core.config import settings
+from app.core.cache import LRUCache
+from app.core.redis_client import Pipelined
+
+logger = logging.getLogger(__name__)
+
+def _normalize_text(text: str) -> str:
+    """Collapse runs of whitespace so trivially different prompts share a key."""
+    return " ".join(text.split())
+
+class SemanticIndex:
+    """
+    Nearest-neighbour lookup over locally computed prompt embeddings.
+
+    Embeddings are L2-normalized and kept in a fixed-capacity float32 matrix,
+    so a lookup is one matrix-vector product. When full, the oldest rows are
+    overwritten. Requires NumPy.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Sequence[float]],
+        threshold: float = 0.95,
+        capacity: int = 10000
+    ):
+        import numpy as np
+
+        self._np = np
+        self.embed = embed
+        self.threshold = threshold
+        self.capacity = capacity
+        self._matrix = None
+        self._contexts: List[Optional[str]] = [None] * capacity
+        self._keys: List[Optional[str]] = [None] * capacity
+        self._next = 0
+
+    def _vector(self, text: str):
+        vector = self._np.asarray(self.embed(text), dtype=self._np.float32)
+        norm = self._np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add(self, context: str, text: str, key: str) -> None:
+        """Index a prompt under its context hash, pointing at a cache key."""
+        vector = self._vector(text)
+        if self._matrix is None:
+            self._matrix = self._np.zeros((self.capacity, vector.shape[0]), dtype=self._np.float32)
+        row = self._next % self.capacity
+        self._matrix[row] = vector
+        self._contexts[row] = context
+        self._keys[row] = key
+        self._next += 1
+
+    def search(self, context: str, text: str) -> Optional[str]:
+        """Find the cache key of the most similar prompt sharing the same context."""
+        if self._matrix is None:
+            return None
+        rows = min(self._next, self.capacity)
+        scores = self._matrix[:rows] @ self._vector(text)
+        for row in self._np.argsort(scores)[::-1]:
+            if scores[row] < self.threshold:
+                return None
+            if self._contexts[row] == context:
+                return self._keys[row]
+        return None
+
+class ResponseCache:
+    """
+    Cache of upstream responses keyed on a normalized hash of the request.
+
+    Lookups hit an in-process LRU first and fall back to Redis when a client
+    is configured. Requests sampled with a non-zero temperature are not cached
+    unless ``allow_nonzero_temperature`` is set, since their responses are
+    not meant to repeat.
+    """
+
+    KEY_PREFIX = "response_cache:"
+
+    def __init__(
+        self,
+        redis=None,
+        ttl_seconds: Optional[float] = None,
+        allow_nonzero_temperature: Optional[bool] = None,
+        local_cache: Optional[LRUCache] = None,
+        semantic_index: Optional[SemanticIndex] = None
+    ):
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.RESPONSE_CACHE_TTL_SECONDS
+        self.allow_nonzero_temperature = (
+            allow_nonzero_temperature if allow_nonzero_temperature is not None
+            else settings.RESPONSE_CACHE_ALLOW_NONZERO_TEMPERATURE
+        )
+        self.local = local_cache or LRUCache(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+            ttl_seconds=self.ttl_seconds,
+            sizeof=lambda value: len(json.dumps(value))
+        )
+        self.semantic_index = semantic_index
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _context_hash(
+        model: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict[str, str]]],
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> str:
+        """Hash everything about a request except the new message."""
+        context = {
+            "model": model,
+            "system": _normalize_text(system_prompt or ""),
+            "history": [
+                [msg["role"], _normalize_text(msg["content"])] for msg in history or []
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        encoded = json.dumps(context, separators=(",", ":"), sort_keys=True)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @classmethod
+    def make_key(
+        cls,
+        model: str,
+        message: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Build the cache key for a request.
+
+        ``history`` should be the already trimmed history actually sent
+        upstream, so requests that differ only in evicted turns share a key.
+        """
+        context = cls._context_hash(model, system_prompt, history, temperature, max_tokens)
+        digest = hashlib.sha256(f"{context}:{_normalize_text(message)}".encode()).hexdigest()
+        return f"{cls.KEY_PREFIX}{digest}"
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """Check whether a request sampled at this temperature may be cached."""
+        return temperature <= 0 or self.allow_nonzero_temperature
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached response, checking the local cache before Redis."""
+        value = await self._fetch(key)
+        self._count(value)
+        return value
+
+    async def _fetch(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is None and self.redis is not None:
+            batch = Pipelined(self.redis, "response_cache_get")
+            try:
+                async with batch as pipe:
+                    pipe.get(key)
+                    pipe.pttl(key)
+                data, pttl = batch.results
+            except Exception as e:
+                logger.warning("Response cache read failed: %s", str(e))
+                data = None
+            if data is not None:
+                value = json.loads(data)
+                # Keep the local copy no longer than Redis keeps the entry; a key
+                # without an expiry (PTTL -1) falls back to the default TTL, and
+                # one that expired between the two commands (-2) is not kept
+                ttl = None if pttl == -1 else min(pttl / 1000, self.ttl_seconds)
+                self.local.set(key, value, ttl=ttl)
+        return value
+
+    def _count(self, value: Optional[Any]) -> None:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    async def set(self, key: str, value: Any) -> None:
+        """Cache a response locally and in Redis."""
+        self.local.set(key, value)
+        if self.redis is not None:
+            try:
+                # Milliseconds, so sub-second TTLs don't round down to an invalid 0
+                ttl_ms = max(int(self.ttl_seconds * 1000), 1)
+                await self.redis.set(key, json.dumps(value), px=ttl_ms)
+            except Exception as e:
+                logger.warning("Response cache write failed: %s", str(e))
+
+    async def lookup(
+        self,
+        model: str,
+        message: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None
+    ) -> Optional[Any]:
+        """
+        Get the cached response for a request, falling back to the nearest
+        semantically similar prompt when a semantic index is configured.
+        """
+        if not self.is_cacheable(temperature):
+            return None
+        key = self.make_key(model, message, system_prompt, history, temperature, max_tokens)
+        value = await self._fetch(key)
+        if value is None and self.semantic_index is not None:
+            context = self._context_hash(model, system_prompt, history, temperature, max_tokens)
+            similar_key = self.semantic_index.search(context, _normalize_text(message))
+            if similar_key is not None:
+                value = await self._fetch(similar_key)
+        self._count(value)
+        return value
+
+    async def store(
+        self,
+        value: Any,
+        model: str,
+        message: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None
+    ) -> None:
+        """Cache the response for a request if its temperature allows it."""
+        if not self.is_cacheable(temperature):
+            return
+        key = self.make_key(model, message, system_prompt, history, temperature, max_tokens)
+        await self.set(key, value)
+        if self.semantic_index is not None:
+            context = self._context_hash(model, system_prompt, history, temperature, max_tokens)
+            self.semantic_index.add(context, _normalize_text(message), key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get response cache hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) * 100 if lookups else 0.0,
+            "local": self.local.get_stats()
+        }
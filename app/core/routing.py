@@ -0,0 +1,93 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Sequence
+import random
+from app.core.config import settings
+
+def record_outcome(
+    metrics: Dict[str, Any],
+    latency: float,
+    success: bool,
+    alpha: Optional[float] = None
+) -> None:
+    """
+    Fold a completed request into a service's rolling latency and error stats.
+
+    Both are exponentially weighted moving averages, so recent behaviour
+    dominates and a degraded backend is noticed within a few requests.
+    """
+    if alpha is None:
+        alpha = settings.ROUTING_EWMA_ALPHA
+    if metrics["samples"] == 0:
+        metrics["ewma_latency"] = latency
+        metrics["ewma_error_rate"] = 0.0 if success else 1.0
+    else:
+        metrics["ewma_latency"] += alpha * (latency - metrics["ewma_latency"])
+        metrics["ewma_error_rate"] += alpha * ((0.0 if success else 1.0) - metrics["ewma_error_rate"])
+    metrics["samples"] += 1
+
+def outstanding(metrics: Dict[str, Any]) -> int:
+    """In-flight requests on a service across the cluster (this worker's when unshared)."""
+    return metrics["requests"] + metrics.get("remote_requests", 0)
+
+def service_cost(metrics: Dict[str, Any]) -> float:
+    """
+    Expected cost of sending one more request to a service.
+
+    Latency is scaled by the outstanding requests the new one would queue
+    behind and inflated by the error rate. Services without samples cost
+    nothing so they receive traffic until they have been measured.
+    """
+    success_rate = max(1.0 - metrics["ewma_error_rate"], 0.01)
+    return metrics["ewma_latency"] * (outstanding(metrics) + 1) / success_rate
+
+class RoutingStrategy(ABC):
+    """Base class for choosing a service among the candidates for a query."""
+
+    @abstractmethod
+    def select(self, services: Sequence[Any], load_metrics: Dict[str, Dict[str, Any]]) -> Optional[Any]:
+        """Pick a service from a non-empty candidate list."""
+        pass
+
+class LeastOutstandingStrategy(RoutingStrategy):
+    """Choose the service with the fewest in-flight requests."""
+
+    def select(self, services: Sequence[Any], load_metrics: Dict[str, Dict[str, Any]]) -> Optional[Any]:
+        return min(services, key=lambda s: outstanding(load_metrics[s.name]))
+
+class EWMALatencyStrategy(RoutingStrategy):
+    """Choose the service with the lowest latency- and error-weighted cost."""
+
+    def select(self, services: Sequence[Any], load_metrics: Dict[str, Dict[str, Any]]) -> Optional[Any]:
+        return min(services, key=lambda s: service_cost(load_metrics[s.name]))
+
+class PowerOfTwoChoicesStrategy(RoutingStrategy):
+    """
+    Sample two services at random and choose the cheaper one.
+
+    Each decision is O(1) regardless of the number of services, and avoids
+    the herding a global minimum causes when stats are slightly stale.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self._rng = rng or random.Random()
+
+    def select(self, services: Sequence[Any], load_metrics: Dict[str, Dict[str, Any]]) -> Optional[Any]:
+        if len(services) == 1:
+            return services[0]
+        first, second = self._rng.sample(services, 2)
+        if service_cost(load_metrics[first.name]) <= service_cost(load_metrics[second.name]):
+            return first
+        return second
+
+ROUTING_STRATEGIES = {
+    "least_outstanding": LeastOutstandingStrategy,
+    "ewma_latency": EWMALatencyStrategy,
+    "power_of_two": PowerOfTwoChoicesStrategy,
+}
+
+def get_routing_strategy(name: Optional[str] = None) -> RoutingStrategy:
+    """Build a routing strategy by name, ROUTING_STRATEGY by default."""
+    name = name or settings.ROUTING_STRATEGY
+    if name not in ROUTING_STRATEGIES:
+        raise ValueError(f"Unknown routing strategy '{name}'")
+    return ROUTING_STRATEGIES[name]()
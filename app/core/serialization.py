@@ -0,0 +1,41 @@
+from typing import Any
+import json
+import logging
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is None:
+    logger.info("orjson is not installed; using the standard library JSON encoder")
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize to compact JSON bytes, with orjson when it is installed.
+
+    Values JSON has no type for are written as strings, dates and times in
+    ISO-8601 as ``jsonable_encoder`` would.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by ``dumps``; the app's default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class RawJSONResponse(Response):
+    """Response for a body that is already serialized JSON bytes."""
+
+    media_type = "application/json"
@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Tokens the chat format adds per message and to prime the reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+# Context window sizes, matched on the longest model name prefix
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "claude-2": 100000,
+    "llama2": 4096,
+}
+
+def context_window(model: str) -> int:
+    """Get the context window of a model, in tokens."""
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    if not matches:
+        return settings.DEFAULT_CONTEXT_WINDOW_TOKENS
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+class TokenCounter:
+    """
+    Counts tokens with a tiktoken encoding, or approximates them (~4 characters
+    per token) when no encoding is available.
+    """
+
+    def __init__(self, encoding: Optional[Any] = None):
+        self.encoding = encoding
+        self.name = encoding.name if encoding is not None else "approx"
+
+    def count(self, text: str) -> int:
+        """Count the tokens in a piece of text."""
+        if self.encoding is None:
+            return (len(text) + 3) // 4
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def message_tokens(self, message: Dict[str, Any]) -> int:
+        """
+        Count a message's content tokens, reusing the count stored with it.
+
+        Messages carry ``token_count`` and ``token_encoding`` from when they were
+        stored, so history is never re-encoded; a count made with a different
+        encoding is recomputed and cached on the message.
+        """
+        if message.get("token_encoding") == self.name and "token_count" in message:
+            return message["token_count"]
+        tokens = self.count(message["content"])
+        message["token_count"] = tokens
+        message["token_encoding"] = self.name
+        return tokens
+
+# Token counters whose encoding loaded, by model
+_token_counters: Dict[str, TokenCounter] = {}
+# When loading each model's encoding may be retried after a failure
+_retry_at: Dict[str, float] = {}
+# Concurrent loads of the same encoding share one worker thread
+_loads = SingleFlight()
+
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """
+    Get the token counter for a model (DEFAULT_MODEL if omitted), loading its
+    encoding on first use.
+
+    Only successful loads are kept. After a failure, such as the encoding
+    files being unreachable, counts are approximated and the load is retried
+    once TOKENIZER_RETRY_SECONDS have passed. Loading blocks, so async code
+    should use ``load_token_counter`` instead.
+    """
+    model = model or settings.DEFAULT_MODEL
+    counter = _token_counters.get(model)
+    if counter is not None:
+        return counter
+    if time.monotonic() < _retry_at.get(model, 0.0):
+        return TokenCounter()
+    return _load_token_counter(model)
+
+async def load_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """Like ``get_token_counter``, but loads the encoding in a worker thread, off the event loop."""
+    model = model or settings.DEFAULT_MODEL
+    counter = _token_counters.get(model)
+    if counter is not None:
+        return counter
+    if time.monotonic() < _retry_at.get(model, 0.0):
+        return TokenCounter()
+    return await _loads.do(model, lambda: asyncio.to_thread(_load_token_counter, model))
+
+def _load_token_counter(model: str) -> TokenCounter:
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Unknown to tiktoken or its encoding files are unreachable
+        logger.warning(
+            "No tiktoken encoding for %s, approximating token counts for %ss: %s",
+            model, settings.TOKENIZER_RETRY_SECONDS, str(e)
+        )
+        _retry_at[model] = time.monotonic() + settings.TOKENIZER_RETRY_SECONDS
+        return TokenCounter()
+    counter = TokenCounter(encoding)
+    _token_counters[model] = counter
+    _retry_at.pop(model, None)
+    return counter
+
+async def prewarm_token_counters(models: List[str]) -> None:
+    """Load the token counters for ``models`` in a worker thread, off the event loop."""
+    for model in models:
+        await load_token_counter(model)
+
+def fit_history(
+    history: List[Dict[str, Any]],
+    budget: int,
+    counter: TokenCounter
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Keep the most recent messages whose tokens fit in the budget.
+
+    Returns:
+        Tuple of the kept messages and the older, evicted ones, both in order.
+    """
+    used = 0
+    start = len(history)
+    for i in range(len(history) - 1, -1, -1):
+        tokens = counter.message_tokens(history[i]) + MESSAGE_OVERHEAD_TOKENS
+        if used + tokens > budget:
+            break
+        used += tokens
+        start = i
+    return history[start:], history[:start]
+
+def history_budget(
+    model: str,
+    counter: TokenCounter,
+    system_prompt: str,
+    message: str,
+    max_tokens: int
+) -> int:
+    """Tokens left for history once the prompt, new message and reply are accounted for."""
+    fixed = (
+        counter.count(system_prompt) + counter.count(message)
+        + 2 * MESSAGE_OVERHEAD_TOKENS + REPLY_PRIMING_TOKENS
+    )
+    return max(context_window(model) - max_tokens - fixed, 0)
@@ -1,10 +1,28 @@
-from fastapi import FastAPI
+from typing import Set
+import asyncio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.core.config import settings
+from app.core.http_client import get_http_client, close_http_client
+from app.core.redis_client import get_redis_client, close_redis_client
+from app.core.dependencies import (
+    close_conversation_manager,
+    close_orchestrator,
+    get_rate_limiter,
+    redis_required,
+    start_conversation_manager
+)
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.serialization import FastJSONResponse
+from app.core.tokens import prewarm_token_counters
+from app.api.v1.endpoints import services
 
 app = FastAPI(
     title="Chatbot Orchestration Layer",
     description="A meta-layer for orchestrating multiple chatbots and services",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -16,6 +34,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, get_limiter=get_rate_limiter)
+
+app.include_router(
+    services.router,
+    prefix=f"{settings.API_V1_STR}/services",
+    tags=["services"]
+)
+
+# Startup work left running in the background
+_background_tasks: Set[asyncio.Task] = set()
+
+@app.on_event("startup")
+async def startup():
+    if settings.STARTUP_PREWARM_CLIENTS:
+        # Open the shared connection pools once per worker; otherwise they open on first use
+        get_http_client()
+        if redis_required():
+            get_redis_client()
+    await start_conversation_manager()
+    if settings.STARTUP_PREWARM_TOKENIZER:
+        # Serve requests while the tokenizer loads instead of delaying startup for it
+        task = asyncio.create_task(prewarm_token_counters([settings.DEFAULT_MODEL]))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in _background_tasks:
+        task.cancel()
+    await close_orchestrator()
+    await close_conversation_manager()
+    await close_http_client()
+    await close_redis_client()
+
 @app.get("/")
 async def root():
     return {
@@ -23,6 +76,12 @@ async def root():
         "status": "operational"
     }
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     return {
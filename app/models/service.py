@@ -8,6 +8,12 @@ class ServiceBase(BaseModel):
     description: Optional[str] = None
     max_concurrent_requests: Optional[int] = None
     timeout_seconds: Optional[float] = 30.0
+    max_queue_depth: Optional[int] = None
+    max_queue_wait_seconds: Optional[float] = None
+    batch_endpoint: Optional[HttpUrl] = None
+    max_batch_size: Optional[int] = None
+    max_batch_wait_seconds: Optional[float] = None
+    rate_limit_per_minute: Optional[int] = None
 
 class ServiceCreate(ServiceBase):
     api_key: Optional[str] = None
@@ -1,14 +1,59 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Callable, Dict, Any, AsyncIterator, List, Optional, Union
+import asyncio
 
 class BaseBotService(ABC):
     """Base class for all bot service integrations."""
+
+    # Set by the orchestrator to collect backend-reported timings (in seconds)
+    timings_listener: Optional[Callable[[Dict[str, float]], None]] = None
     
     @abstractmethod
     async def process_query(self, query: str) -> Dict[str, Any]:
         """Process a query and return the response."""
         pass
+
+    async def stream_query(self, query: str) -> AsyncIterator[str]:
+        """
+        Process a query and yield the response in chunks as they arrive.
+
+        Services that can stream natively should override this; the default
+        falls back to a single chunk holding the full response.
+        """
+        result = await self.process_query(query)
+        yield result["response"]
     
+    def report_timings(self, timings: Dict[str, float]) -> None:
+        """Pass timings reported by the upstream (e.g. model load time) to the listener."""
+        if self.timings_listener is not None:
+            self.timings_listener(timings)
+
+    @property
+    def supports_batching(self) -> bool:
+        """Whether ``process_batch`` sends a whole batch as one upstream call."""
+        return False
+
+    async def process_batch(self, queries: List[str]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Process several queries, returning one result per query in order.
+
+        A failed query's entry is the exception it raised. Services whose
+        upstream accepts batch inputs should override this together with
+        ``supports_batching``; the default processes the queries concurrently.
+        """
+        return list(await asyncio.gather(
+            *(self.process_query(query) for query in queries),
+            return_exceptions=True
+        ))
+
+    def start(self) -> None:
+        """Start background work the service runs while registered, such as keep-warm pings."""
+        pass
+
+    async def stop(self) -> None:
+        """Stop the service's background work."""
+        pass
+
     @abstractmethod
     async def health_check(self) -> bool:
         """Check if the service is healthy and available."""
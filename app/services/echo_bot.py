@@ -1,4 +1,4 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator
 from app.services.base import BaseBotService
 import asyncio
 
@@ -18,6 +18,15 @@ class EchoBotService(BaseBotService):
             "response": f"Echo: {query}",
             "confidence": 1.0
         }
+
+    async def stream_query(self, query: str) -> AsyncIterator[str]:
+        """Echo back the query word by word, spreading the simulated delay."""
+        words = query.split() or [query]
+        delay = self._response_time / len(words)
+        yield "Echo:"
+        for word in words:
+            await asyncio.sleep(delay)
+            yield f" {word}"
     
     async def health_check(self) -> bool:
         """Always healthy for this demo service."""
@@ -0,0 +1,99 @@
+from typing import Dict, Any, List, Optional, Union
+import httpx
+from app.core.config import settings
+from app.core.http_client import get_http_client, request_timeout
+from app.services.base import BaseBotService
+
+class HTTPBotService(BaseBotService):
+    """
+    Adapter for a bot service reachable over HTTP.
+
+    Queries are POSTed as ``{"query": ...}`` to the service endpoint over the
+    shared connection pool. A JSON object response is returned as-is (its
+    ``response`` field holding the answer); any other body is wrapped.
+
+    With a ``batch_endpoint``, batches are POSTed there as ``{"queries": [...]}``
+    and the service answers ``{"results": [...]}`` with one entry per query.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        endpoint: str,
+        capabilities: List[str],
+        api_key: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout_seconds: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        batch_endpoint: Optional[str] = None
+    ):
+        self.name = name
+        self.endpoint = str(endpoint)
+        self.batch_endpoint = str(batch_endpoint) if batch_endpoint else None
+        self._capabilities = list(capabilities)
+        self.timeout_seconds = timeout_seconds
+        self._client = client
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for upstream calls, the shared pool by default."""
+        return self._client or get_http_client()
+
+    @property
+    def supports_batching(self) -> bool:
+        return self.batch_endpoint is not None
+
+    async def _post(self, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        client = self.client
+        kwargs = {}
+        if self.timeout_seconds is not None:
+            kwargs["timeout"] = request_timeout(client, self.timeout_seconds)
+        response = await client.post(url, headers=self.headers, json=payload, **kwargs)
+        if response.status_code != 200:
+            raise Exception(f"Service {self.name} returned {response.status_code}: {response.text}")
+        return response
+
+    def _wrap(self, query: str, result: Any) -> Dict[str, Any]:
+        if not isinstance(result, dict):
+            result = {"response": result}
+        return {"service": self.name, "query": query, **result}
+
+    async def process_query(self, query: str) -> Dict[str, Any]:
+        """Send the query to the service endpoint."""
+        response = await self._post(self.endpoint, {"query": query})
+        try:
+            result = response.json()
+        except ValueError:
+            result = response.text
+        return self._wrap(query, result)
+
+    async def process_batch(self, queries: List[str]) -> List[Union[Dict[str, Any], Exception]]:
+        """Send the queries to the batch endpoint in one request."""
+        if self.batch_endpoint is None:
+            return await super().process_batch(queries)
+        response = await self._post(self.batch_endpoint, {"queries": queries})
+        results = response.json()["results"]
+        if len(results) != len(queries):
+            raise Exception(f"Service {self.name} returned {len(results)} results for {len(queries)} queries")
+        return [self._wrap(query, result) for query, result in zip(queries, results)]
+
+    async def health_check(self) -> bool:
+        """The service is healthy when its endpoint answers without a server error."""
+        try:
+            client = self.client
+            response = await client.get(
+                self.endpoint,
+                headers=self.headers,
+                timeout=request_timeout(client, settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+            )
+            return response.status_code < 500
+        except Exception:
+            return False
+
+    @property
+    def capabilities(self) -> List[str]:
+        """List of service capabilities."""
+        return self._capabilities
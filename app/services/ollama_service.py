@@ -0,0 +1,191 @@
+from typing import List, Dict, Optional, Any, AsyncIterator
+import asyncio
+import json
+import logging
+import httpx
+from app.core.config import settings
+from app.core.http_client import get_http_client, request_timeout
+from app.services.base import BaseBotService
+
+logger = logging.getLogger(__name__)
+
+# Duration fields of an Ollama response, reported in nanoseconds
+DURATION_FIELDS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+
+def extract_timings(result: Dict[str, Any]) -> Dict[str, float]:
+    """Convert the durations of a final Ollama response to seconds."""
+    timings = {
+        field: result[field] / 1e9 for field in DURATION_FIELDS if result.get(field) is not None
+    }
+    if result.get("eval_count") and result.get("eval_duration"):
+        timings["tokens_per_second"] = result["eval_count"] / (result["eval_duration"] / 1e9)
+    return timings
+
+class OllamaService(BaseBotService):
+    """
+    Adapter for a local model served by Ollama.
+
+    Requests go through the shared connection pool and pass ``keep_alive`` so
+    Ollama keeps the model loaded between them. ``start_keep_warm`` also
+    pings the configured models in the background, so a quiet period never
+    leaves the next request paying for a cold load. Load and eval durations
+    from each response are reported to the orchestrator's metrics.
+
+    Micro-batching is left off: Ollama already decodes concurrent requests
+    together, so holding queries back to batch them would only add latency.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        base_url: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+        keep_warm_models: Optional[List[str]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        name: str = "ollama"
+    ):
+        self.name = name
+        self.model = model or settings.OLLAMA_MODEL
+        self.base_url = (base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+        self.keep_alive = keep_alive or settings.OLLAMA_KEEP_ALIVE
+        self.keep_warm_models = keep_warm_models or settings.OLLAMA_KEEP_WARM_MODELS or [self.model]
+        self._client = client
+        self._keep_warm_task: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for upstream calls, the shared pool by default."""
+        return self._client or get_http_client()
+
+    @property
+    def capabilities(self) -> List[str]:
+        """List of service capabilities."""
+        return ["chat", "completion", "streaming", "local"]
+
+    def _payload(self, query: str, stream: bool) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "prompt": query,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": settings.TEMPERATURE,
+                "num_predict": settings.MAX_TOKENS
+            }
+        }
+
+    async def process_query(self, query: str) -> Dict[str, Any]:
+        """Generate a completion for the query."""
+        response = await self.client.post(
+            f"{self.base_url}/api/generate",
+            json=self._payload(query, stream=False),
+            timeout=request_timeout(self.client, settings.OLLAMA_TIMEOUT_SECONDS)
+        )
+        if response.status_code != 200:
+            raise Exception(f"Ollama API error: {response.text}")
+
+        result = response.json()
+        timings = extract_timings(result)
+        self.report_timings(timings)
+        return {
+            "service": self.name,
+            "query": query,
+            "response": result["response"],
+            "model": result.get("model", self.model),
+            "timings": timings
+        }
+
+    async def stream_query(self, query: str) -> AsyncIterator[str]:
+        """Generate a completion for the query, yielding tokens as they arrive."""
+        async with self.client.stream(
+            "POST",
+            f"{self.base_url}/api/generate",
+            json=self._payload(query, stream=True),
+            timeout=request_timeout(self.client, settings.OLLAMA_TIMEOUT_SECONDS)
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(f"Ollama API error: {response.text}")
+
+            # One JSON object per line; the last carries done=true and the durations
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise Exception(f"Ollama API error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    self.report_timings(extract_timings(chunk))
+                    break
+
+    async def health_check(self) -> bool:
+        """The service is healthy when Ollama is up and has the model pulled."""
+        try:
+            response = await self.client.get(
+                f"{self.base_url}/api/tags",
+                timeout=request_timeout(self.client, settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+            )
+            if response.status_code != 200:
+                return False
+            names = {model["name"] for model in response.json().get("models", [])}
+            return self.model in names or f"{self.model}:latest" in names
+        except Exception:
+            return False
+
+    async def warm_up(self, model: Optional[str] = None) -> Dict[str, float]:
+        """
+        Load a model (or keep it loaded) without generating anything.
+
+        Returns:
+            Dict[str, float]: Timings of the request; ``load_duration`` is only
+            significant when the model was not already resident.
+        """
+        response = await self.client.post(
+            f"{self.base_url}/api/generate",
+            json={"model": model or self.model, "keep_alive": self.keep_alive},
+            timeout=request_timeout(self.client, settings.OLLAMA_TIMEOUT_SECONDS)
+        )
+        if response.status_code != 200:
+            raise Exception(f"Ollama API error: {response.text}")
+        return extract_timings(response.json())
+
+    def start_keep_warm(self, interval: Optional[float] = None) -> None:
+        """Ping the keep-warm models every ``interval`` seconds in the background."""
+        if interval is None:
+            interval = settings.OLLAMA_KEEP_WARM_INTERVAL_SECONDS
+        if self._keep_warm_task is None:
+            self._keep_warm_task = asyncio.create_task(self._keep_warm(interval))
+
+    async def stop_keep_warm(self) -> None:
+        """Stop the background keep-warm pings."""
+        if self._keep_warm_task is not None:
+            self._keep_warm_task.cancel()
+            await asyncio.gather(self._keep_warm_task, return_exceptions=True)
+            self._keep_warm_task = None
+
+    def start(self) -> None:
+        self.start_keep_warm()
+
+    async def stop(self) -> None:
+        await self.stop_keep_warm()
+
+    async def _keep_warm(self, interval: float) -> None:
+        while True:
+            for model in self.keep_warm_models:
+                try:
+                    await self.warm_up(model)
+                except Exception as e:
+                    logger.warning("Keep-warm ping for %s failed: %s", model, str(e))
+            await asyncio.sleep(interval)
+
+    async def get_available_models(self) -> List[str]:
+        """Get a list of the models pulled into Ollama."""
+        try:
+            response = await self.client.get(f"{self.base_url}/api/tags")
+            if response.status_code != 200:
+                raise Exception(f"Ollama API error: {response.text}")
+            return [model["name"] for model in response.json().get("models", [])]
+        except Exception as e:
+            raise Exception(f"Error fetching Ollama models: {str(e)}")
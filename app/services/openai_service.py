@@ -1,11 +1,31 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any, AsyncIterator
+import hashlib
+import json
 import httpx
+from app.core.cache import LRUCache
 from app.core.config import settings
-from app.services.base import BaseService
+from app.core.http_client import get_http_client
+from app.core.response_cache import ResponseCache
+from app.core.tokens import MESSAGE_OVERHEAD_TOKENS, fit_history, history_budget, load_token_counter
+from app.services.base import BaseBotService
 
-class OpenAIService(BaseService):
-    def __init__(self):
+class OpenAIService(BaseBotService):
+    SYSTEM_PROMPT = "You are a helpful AI assistant."
+    SUMMARY_PROMPT = (
+        "Summarize the following conversation in a few sentences, keeping any "
+        "facts, names and decisions needed to continue it."
+    )
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        response_cache: Optional[ResponseCache] = None
+    ):
         super().__init__()
+        self._client = client
+        self.response_cache = response_cache
+        self._summaries = LRUCache(max_entries=1024)
+        self.name = "openai"
         self.api_key = settings.OPENAI_API_KEY
         self.base_url = "https://api.openai.com/v1"
         self.model = settings.DEFAULT_MODEL
@@ -14,82 +34,234 @@ class OpenAIService(BaseService):
             "Content-Type": "application/json"
         }
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for upstream calls, the shared pool by default."""
+        return self._client or get_http_client()
+
+    @property
+    def capabilities(self) -> List[str]:
+        """List of service capabilities."""
+        return ["chat", "completion", "streaming"]
+
+    async def health_check(self) -> bool:
+        """The service is healthy when the API key is accepted."""
+        return await self.validate_api_key()
+
+    async def process_query(self, query: str) -> Dict[str, Any]:
+        """Process a single query without conversation history."""
+        response = await self.process_message(query)
+        return {
+            "service": self.name,
+            "query": query,
+            "response": response
+        }
+
+    async def stream_query(self, query: str) -> AsyncIterator[str]:
+        """Stream the response to a single query without conversation history."""
+        async for chunk in self.stream_message(query):
+            yield chunk
+
     async def validate_api_key(self) -> bool:
         """Validate the OpenAI API key."""
         if not self.api_key:
             return False
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/models",
-                    headers=self.headers
-                )
-                return response.status_code == 200
+            response = await self.client.get(
+                f"{self.base_url}/models",
+                headers=self.headers
+            )
+            return response.status_code == 200
         except Exception:
             return False
 
-    async def process_message(
+    async def _build_messages(
         self,
         message: str,
         conversation_history: Optional[List[Dict[str, str]]] = None,
-        **kwargs
-    ) -> str:
-        """Process a message using OpenAI's API."""
-        if not self.api_key:
-            raise ValueError("OpenAI API key not configured")
+        max_tokens: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Build the chat messages payload from the history and new message.
 
-        if conversation_history is None:
-            conversation_history = []
+        History is windowed by tokens rather than message count: the most
+        recent turns that fit in the model's context window, less room for a
+        ``max_tokens`` reply, are kept. Older turns are dropped, or summarized
+        into a system message when SUMMARIZE_EVICTED_HISTORY is enabled.
+        """
+        if max_tokens is None:
+            max_tokens = settings.MAX_TOKENS
+        counter = await load_token_counter(self.model)
+        budget = history_budget(self.model, counter, self.SYSTEM_PROMPT, message, max_tokens)
+        summarize = settings.SUMMARIZE_EVICTED_HISTORY
+        if summarize:
+            budget = max(budget - settings.HISTORY_SUMMARY_MAX_TOKENS - MESSAGE_OVERHEAD_TOKENS, 0)
+        kept, evicted = fit_history(conversation_history or [], budget, counter)
 
         messages = [
-            {"role": "system", "content": "You are a helpful AI assistant."}
+            {"role": "system", "content": self.SYSTEM_PROMPT}
         ]
-        
+
+        if summarize and evicted:
+            summary = await self._summarize(evicted)
+            if summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation: {summary}"
+                })
+
         # Add conversation history
-        for msg in conversation_history[-settings.MAX_CONVERSATION_HISTORY:]:
+        for msg in kept:
             messages.append({
                 "role": "user" if msg["role"] == "user" else "assistant",
                 "content": msg["content"]
             })
-        
+
         # Add the current message
         messages.append({"role": "user", "content": message})
+        return messages
+
+    async def _summarize(self, history: List[Dict[str, str]]) -> Optional[str]:
+        """Summarize evicted turns, reusing the summary while they are unchanged."""
+        key = hashlib.sha256(
+            json.dumps([[msg["role"], msg["content"]] for msg in history]).encode()
+        ).hexdigest()
+        summary = self._summaries.get(key)
+        if summary is not None:
+            return summary
 
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in history)
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "max_tokens": settings.MAX_TOKENS,
-                        "temperature": settings.TEMPERATURE,
-                    },
-                    timeout=30.0
-                )
-                
+            response = await self.client.post(
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": self.SUMMARY_PROMPT},
+                        {"role": "user", "content": transcript}
+                    ],
+                    "max_tokens": settings.HISTORY_SUMMARY_MAX_TOKENS,
+                    "temperature": 0,
+                }
+            )
+            if response.status_code != 200:
+                raise Exception(f"OpenAI API error: {response.text}")
+            summary = response.json()["choices"][0]["message"]["content"]
+        except Exception as e:
+            # Answer without the summary rather than failing the request
+            print(f"Error summarizing conversation history: {str(e)}")
+            return None
+
+        self._summaries.set(key, summary)
+        return summary
+
+    async def process_message(
+        self,
+        message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        **kwargs
+    ) -> str:
+        """Process a message using OpenAI's API."""
+        if not self.api_key:
+            raise ValueError("OpenAI API key not configured")
+
+        temperature = kwargs.get("temperature", settings.TEMPERATURE)
+        max_tokens = kwargs.get("max_tokens", settings.MAX_TOKENS)
+        messages = await self._build_messages(message, conversation_history, max_tokens)
+        cache_request = {
+            "model": self.model,
+            "message": message,
+            "system_prompt": self.SYSTEM_PROMPT,
+            "history": messages[1:-1],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+
+        if self.response_cache is not None:
+            cached = await self.response_cache.lookup(**cache_request)
+            if cached is not None:
+                return cached
+
+        try:
+            response = await self.client.post(
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json={
+                    "model": self.model,
+                    "messages": messages,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                }
+            )
+
+            if response.status_code != 200:
+                raise Exception(f"OpenAI API error: {response.text}")
+
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+            if self.response_cache is not None:
+                await self.response_cache.store(content, **cache_request)
+            return content
+
+        except Exception as e:
+            raise Exception(f"Error processing message with OpenAI: {str(e)}")
+
+    async def stream_message(
+        self,
+        message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Process a message using OpenAI's API, yielding tokens as they arrive."""
+        if not self.api_key:
+            raise ValueError("OpenAI API key not configured")
+
+        temperature = kwargs.get("temperature", settings.TEMPERATURE)
+        max_tokens = kwargs.get("max_tokens", settings.MAX_TOKENS)
+        messages = await self._build_messages(message, conversation_history, max_tokens)
+
+        try:
+            async with self.client.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json={
+                    "model": self.model,
+                    "messages": messages,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                    "stream": True,
+                }
+            ) as response:
                 if response.status_code != 200:
+                    await response.aread()
                     raise Exception(f"OpenAI API error: {response.text}")
-                
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        yield delta["content"]
 
         except Exception as e:
-            raise Exception(f"Error processing message with OpenAI: {str(e)}")
+            raise Exception(f"Error streaming message with OpenAI: {str(e)}")
 
     async def get_available_models(self) -> List[str]:
         """Get a list of available OpenAI models."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/models",
-                    headers=self.headers
-                )
-                if response.status_code != 200:
-                    raise Exception(f"OpenAI API error: {response.text}")
-                
-                models = response.json()["data"]
-                return [model["id"] for model in models]
+            response = await self.client.get(
+                f"{self.base_url}/models",
+                headers=self.headers
+            )
+            if response.status_code != 200:
+                raise Exception(f"OpenAI API error: {response.text}")
+
+            models = response.json()["data"]
+            return [model["id"] for model in models]
         except Exception as e:
             raise Exception(f"Error fetching OpenAI models: {str(e)}")
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List
+import random
+import time
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.core.conversation_codec import ConversationCodec, MsgpackCodec
+
+WORDS = (
+    "the a to of and in is it you that for on with as can this be are your not or "
+    "model service request response query token context history user assistant "
+    "latency cache error retry stream answer question example please thanks help"
+).split()
+
+def synthetic_conversation(rng: random.Random, messages: int) -> List[Dict[str, Any]]:
+    """Alternating user and assistant messages shaped like stored conversation history."""
+    start = datetime(2024, 1, 1)
+    history = []
+    for i in range(messages):
+        role = "user" if i % 2 == 0 else "assistant"
+        words = rng.randint(10, 60) if role == "user" else rng.randint(50, 300)
+        content = " ".join(rng.choice(WORDS) for _ in range(words))
+        history.append({
+            "role": role,
+            "content": content,
+            "timestamp": (start + timedelta(seconds=i * 7, microseconds=rng.randint(0, 999) * 1000)).isoformat(),
+            "token_count": (len(content) + 3) // 4,
+            "token_encoding": "cl100k_base"
+        })
+    return history
+
+def _measure(codec: ConversationCodec, conversations: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    messages = [message for history in conversations for message in history]
+    start = time.perf_counter()
+    encoded = [codec.encode(message) for message in messages]
+    encode_seconds = time.perf_counter() - start
+
+    raw = [record.encode() if isinstance(record, str) else record for record in encoded]
+    start = time.perf_counter()
+    decoded = [codec.decode(record) for record in raw]
+    decode_seconds = time.perf_counter() - start
+    if [message["content"] for message in decoded] != [message["content"] for message in messages]:
+        raise AssertionError(f"{codec.name} codec did not round-trip")
+
+    return {
+        "bytes_per_conversation": round(sum(len(record) for record in raw) / len(conversations)),
+        "encode_us_per_message": round(encode_seconds / len(messages) * 1e6, 3),
+        "decode_us_per_message": round(decode_seconds / len(messages) * 1e6, 3)
+    }
+
+async def codec_scenario(bench) -> Dict[str, Any]:
+    """Stored size and encode/decode time of synthetic conversations under each codec."""
+    rng = random.Random(bench.args.seed)
+    conversations = [
+        synthetic_conversation(rng, settings.MAX_CONVERSATION_HISTORY)
+        for _ in range(bench.args.conversations)
+    ]
+    codecs = {"json": ConversationCodec()}
+    try:
+        codecs["msgpack"] = MsgpackCodec(compress_threshold=float("inf"))
+        codecs["msgpack_zstd"] = MsgpackCodec()
+    except ImportError as e:
+        return {"json": _measure(codecs["json"], conversations), "skipped": f"msgpack unavailable: {str(e)}"}
+
+    results = {name: _measure(codec, conversations) for name, codec in codecs.items()}
+    results["messages_per_conversation"] = settings.MAX_CONVERSATION_HISTORY
+    return results
@@ -0,0 +1,112 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile of ``values`` by linear interpolation between closest ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    if not values:
+        return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3)
+    }
+
+class LoadResult:
+    """Outcome of one load run."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.overheads: List[float] = []
+        self.outcomes: Dict[str, int] = {}
+        self.elapsed = 0.0
+        self.scheduled = 0
+        self.max_lag = 0.0
+
+    def record(self, latency: float, outcome: str, backend_seconds: Optional[float]) -> None:
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if outcome != "ok":
+            return
+        self.latencies.append(latency)
+        if backend_seconds is not None:
+            self.overheads.append(max(latency - backend_seconds, 0.0))
+
+    def to_dict(self, target_rps: float) -> Dict[str, Any]:
+        completed = sum(self.outcomes.values())
+        return {
+            "target_rps": target_rps,
+            "requests": self.scheduled,
+            "completed": completed,
+            "succeeded": self.outcomes.get("ok", 0),
+            "outcomes": dict(sorted(self.outcomes.items())),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "throughput_rps": round(self.outcomes.get("ok", 0) / self.elapsed, 2) if self.elapsed else 0.0,
+            "max_schedule_lag_ms": round(self.max_lag * 1000, 3),
+            "latency": summarize(self.latencies),
+            "orchestrator_overhead": summarize(self.overheads)
+        }
+
+# A request sender returns its outcome ("ok", or e.g. the HTTP status) and,
+# on success, the seconds the backend reported spending on the request
+Sender = Callable[[int], Awaitable[tuple]]
+
+async def run_load(
+    send: Sender,
+    rps: float,
+    duration: float,
+    max_in_flight: int = 10000
+) -> LoadResult:
+    """
+    Drive ``send`` open-loop at ``rps`` requests per second for ``duration`` seconds.
+
+    Requests start on a fixed schedule whether or not earlier ones have
+    finished, and latency is measured from each request's scheduled start,
+    so a stalled server shows up as latency instead of as a lower request
+    rate (no coordinated omission). ``max_in_flight`` bounds the
+    outstanding requests so an overloaded run fails instead of exhausting
+    memory; requests over it are counted as ``"dropped"``.
+    """
+    result = LoadResult()
+    total = int(rps * duration)
+    interval = 1 / rps
+    tasks = set()
+
+    async def one(index: int, scheduled_at: float) -> None:
+        try:
+            outcome, backend_seconds = await send(index)
+        except Exception as e:
+            outcome, backend_seconds = type(e).__name__, None
+        result.record(time.perf_counter() - scheduled_at, outcome, backend_seconds)
+
+    start = time.perf_counter()
+    for index in range(total):
+        scheduled_at = start + index * interval
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            result.max_lag = max(result.max_lag, -delay)
+        result.scheduled += 1
+        if len(tasks) >= max_in_flight:
+            result.record(0.0, "dropped", None)
+            continue
+        task = asyncio.create_task(one(index, scheduled_at))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,332 @@
+"""
+Benchmark the orchestrator in-process against stub backends.
+
+Boots the FastAPI app inside this process and drives ``/query`` (and, when
+Redis is reachable, whole conversation turns) at a target request rate,
+then measures the conversation storage codecs.
+Prints a JSON report that can be diffed between releases:
+
+    python -m benchmarks.run --echo-backends 4 --http-backends 2 \\
+        --latency lognormal:0.02:0.5 --error-rate 0.01 --rps 200 --duration 10 \\
+        --output bench.json
+
+    python -m benchmarks.run --baseline bench.json   # also print changes
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+import httpx
+from app.core.config import settings
+from app.core.orchestrator import ServiceCreate
+from benchmarks.codec import codec_scenario
+from benchmarks.load import LoadResult, run_load
+from benchmarks.stubs import LatencyDistribution, StubBotService, StubHTTPBackend
+
+REPORT_VERSION = 1
+
+# Metrics compared against a baseline report, and whether higher is better
+COMPARED_METRICS = {
+    "throughput_rps": True,
+    "latency.p50_ms": False,
+    "latency.p95_ms": False,
+    "latency.p99_ms": False,
+    "orchestrator_overhead.p50_ms": False,
+    "orchestrator_overhead.p99_ms": False,
+    "memory.python_bytes_per_conversation": False,
+    "memory.redis_bytes_per_conversation": False,
+    "msgpack_zstd.bytes_per_conversation": False,
+    "msgpack_zstd.encode_us_per_message": False,
+    "msgpack_zstd.decode_us_per_message": False,
+}
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the orchestrator against stub backends")
+    parser.add_argument("--echo-backends", type=int, default=4, help="In-process stub backends")
+    parser.add_argument("--http-backends", type=int, default=0, help="Local stub HTTP backends")
+    parser.add_argument("--latency", default="const:0.01",
+                        help="Backend latency distribution, e.g. exp:0.05 or lognormal:0.05:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of backend calls that fail")
+    parser.add_argument("--rps", type=float, default=100.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of measured load per scenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds of unmeasured load first")
+    parser.add_argument("--scenarios", default="query,conversation,codec",
+                        help="Comma-separated scenarios to run: query, conversation, codec")
+    parser.add_argument("--conversations", type=int, default=100,
+                        help="Conversations the conversation scenario spreads turns over")
+    parser.add_argument("--max-in-flight", type=int, default=10000,
+                        help="Outstanding requests beyond which new ones are dropped")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and error sampling")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    return parser.parse_args(argv)
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def _configure() -> None:
+    """Turn off features and logging that would measure something other than the orchestrator."""
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    settings.RATE_LIMIT_ENABLED = False
+    settings.REGISTRY_ENABLED = False
+    settings.HEALTH_CHECK_ENABLED = False
+    settings.RESPONSE_CACHE_ENABLED = False
+
+class Bench:
+    """The booted app with its stub backends registered."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.client: Optional[httpx.AsyncClient] = None
+        self.stubs: List[StubBotService] = []
+        self.http_stubs: List[StubHTTPBackend] = []
+
+    def _distribution(self) -> LatencyDistribution:
+        return LatencyDistribution(self.args.latency, random.Random(self.rng.random()))
+
+    async def start(self) -> None:
+        from app.main import app
+        from app.core.dependencies import get_orchestrator
+
+        _configure()
+        self.app = app
+        await app.router.startup()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        orchestrator = await get_orchestrator()
+
+        for i in range(self.args.echo_backends):
+            stub = StubBotService(
+                f"bench-echo-{i}", self._distribution(), self.args.error_rate, random.Random(self.rng.random())
+            )
+            await orchestrator.register_service(
+                ServiceCreate(
+                    name=stub.name,
+                    endpoint="http://localhost/bench",
+                    capabilities=stub.capabilities,
+                    description="In-process benchmark backend"
+                ),
+                backend=stub
+            )
+            self.stubs.append(stub)
+
+        for i in range(self.args.http_backends):
+            stub = StubHTTPBackend(self._distribution(), self.args.error_rate, random.Random(self.rng.random()))
+            await stub.start()
+            self.http_stubs.append(stub)
+            # Registered through the API, like a real deployment
+            response = await self.client.post(
+                f"{settings.API_V1_STR}/services/",
+                json={
+                    "name": f"bench-http-{i}",
+                    "endpoint": stub.endpoint,
+                    "capabilities": ["bench"],
+                    "description": "Stub HTTP benchmark backend"
+                }
+            )
+            response.raise_for_status()
+
+    async def stop(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+        for stub in self.http_stubs:
+            await stub.stop()
+        await self.app.router.shutdown()
+
+    async def query(self, text: str) -> Tuple[str, Optional[float], Dict[str, Any]]:
+        response = await self.client.post(
+            f"{settings.API_V1_STR}/services/query",
+            params={"query": text, "capabilities": "bench"}
+        )
+        if response.status_code != 200:
+            return str(response.status_code), None, {}
+        body = response.json()
+        return "ok", body.get("backend_seconds"), body
+
+    async def drive(self, send) -> LoadResult:
+        if self.args.warmup > 0:
+            await run_load(send, self.args.rps, self.args.warmup, self.args.max_in_flight)
+        return await run_load(send, self.args.rps, self.args.duration, self.args.max_in_flight)
+
+async def query_scenario(bench: Bench) -> Dict[str, Any]:
+    """Single queries with no conversation state."""
+    run_id = uuid.uuid4().hex[:8]
+
+    async def send(index: int):
+        # Unique queries, so single-flight coalescing does not hide backend calls
+        outcome, backend_seconds, _ = await bench.query(f"bench {run_id} {index}")
+        return outcome, backend_seconds
+
+    return (await bench.drive(send)).to_dict(bench.args.rps)
+
+async def conversation_scenario(bench: Bench) -> Dict[str, Any]:
+    """
+    Conversation turns: load history, store the user message, query, store the reply.
+
+    Needs Redis; reports the Redis and Python memory each conversation takes.
+    Overhead here includes the conversation's own Redis round trips.
+    """
+    from app.core.conversation import ConversationManager
+    from app.core.redis_client import get_redis_client
+
+    redis = get_redis_client()
+    try:
+        await redis.ping()
+    except Exception as e:
+        return {"skipped": f"Redis unavailable at {settings.REDIS_URL}: {str(e)}"}
+
+    manager = ConversationManager(redis_client=redis)
+    run_id = uuid.uuid4().hex[:8]
+    ids = [f"bench:{run_id}:{i}" for i in range(bench.args.conversations)]
+
+    async def send(index: int):
+        conversation_id = ids[index % len(ids)]
+        await manager.get_conversation(conversation_id)
+        text = f"bench {run_id} {index}"
+        await manager.add_message(conversation_id, "user", text)
+        outcome, backend_seconds, body = await bench.query(text)
+        if outcome == "ok":
+            await manager.add_message(conversation_id, "assistant", body.get("response", ""))
+        return outcome, backend_seconds
+
+    try:
+        result = (await bench.drive(send)).to_dict(bench.args.rps)
+        result["memory"] = await _conversation_memory(manager, redis, ids)
+    finally:
+        for conversation_id in ids:
+            await manager.delete_conversation(conversation_id)
+    return result
+
+async def _conversation_memory(manager, redis, ids: List[str]) -> Dict[str, Any]:
+    redis_bytes: Optional[int] = 0
+    try:
+        for conversation_id in ids:
+            for key in (manager._messages_key(conversation_id), manager._meta_key(conversation_id)):
+                redis_bytes += await redis.memory_usage(key) or 0
+    except Exception as e:
+        # MEMORY is disabled on some managed Redis services
+        print(f"Error measuring Redis memory: {str(e)}", file=sys.stderr)
+        redis_bytes = None
+
+    # Python heap held by the decoded histories, as a request or the local cache would hold them
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    histories = [await manager.get_conversation(conversation_id) for conversation_id in ids]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    python_bytes = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    messages = sum(len(history) for history in histories)
+    return {
+        "codec": manager.codec.name,
+        "conversations": len(ids),
+        "messages_per_conversation": round(messages / len(ids), 2),
+        "redis_bytes_per_conversation": round(redis_bytes / len(ids)) if redis_bytes is not None else None,
+        "python_bytes_per_conversation": round(max(python_bytes, 0) / len(ids))
+    }
+
+SCENARIOS = {
+    "query": query_scenario,
+    "conversation": conversation_scenario,
+    "codec": codec_scenario,
+}
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the selected scenarios and build the report."""
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    for name in names:
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {name}")
+
+    bench = Bench(args)
+    await bench.start()
+    try:
+        results = {}
+        for name in names:
+            results[name] = await SCENARIOS[name](bench)
+        backend_calls = sum(stub.calls for stub in bench.stubs + bench.http_stubs)
+    finally:
+        await bench.stop()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    return {
+        "report_version": REPORT_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "config": config,
+        "backend_calls": backend_calls,
+        "scenarios": results
+    }
+
+def _lookup(data: Dict[str, Any], path: str) -> Optional[float]:
+    for part in path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data if isinstance(data, (int, float)) else None
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare the headline metrics of two reports.
+
+    Returns one row per metric present in both, with the relative change
+    and whether it is a regression.
+    """
+    rows = []
+    for scenario, result in current.get("scenarios", {}).items():
+        previous = baseline.get("scenarios", {}).get(scenario, {})
+        for path, higher_is_better in COMPARED_METRICS.items():
+            old, new = _lookup(previous, path), _lookup(result, path)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append({
+                "scenario": scenario,
+                "metric": path,
+                "baseline": old,
+                "current": new,
+                "change_pct": round(change, 1),
+                "regression": change < 0 if higher_is_better else change > 0
+            })
+    return rows
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for row in compare(baseline, report):
+            marker = " (worse)" if row["regression"] and row["change_pct"] else ""
+            print(
+                f"{row['scenario']:>12} {row['metric']:<40} "
+                f"{row['baseline']:>12} -> {row['current']:<12} {row['change_pct']:+.1f}%{marker}",
+                file=sys.stderr
+            )
+
+if __name__ == "__main__":
+    main()
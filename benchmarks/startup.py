@@ -0,0 +1,125 @@
+"""
+Profile how long a worker takes to start, to catch cold-start regressions.
+
+Times the app's import and lifespan startup in a fresh interpreter, breaks
+the import down with ``-X importtime``, and prints a JSON report with the slowest
+modules and packages. Exits non-zero if the import exceeds its budget or
+loads a module that should only load on first use:
+
+    python -m benchmarks.startup --max-import-ms 600 --output startup.json
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Heavy dependencies and modules that must stay out of the import path; they load on first use
+DEFERRED_MODULES = [
+    "httpx", "redis", "redis.asyncio", "redis.client", "tenacity", "tiktoken", "openai", "ollama",
+    "sqlalchemy", "numpy", "msgpack", "zstandard",
+    "app.core.conversation", "app.services.http_service", "app.services.ollama_service",
+    "app.services.openai_service"
+]
+
+# Run in the child interpreter: time the import and lifespan startup, list loaded modules
+_CHILD = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+loaded = sorted(sys.modules)
+async def lifespan():
+    await app.main.app.router.startup()
+    started = time.perf_counter()
+    await app.main.app.router.shutdown()
+    return started
+started = asyncio.run(lifespan())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "loaded": loaded
+}))
+"""
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` lines into modules with self and cumulative microseconds."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+    return modules
+
+def summarize_imports(modules: List[Dict[str, Any]], top: int = 15) -> Dict[str, Any]:
+    """Total import time, and the modules and top-level packages that took longest."""
+    packages: Dict[str, int] = {}
+    for module in modules:
+        package = module["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + module["self_us"]
+    slowest = sorted(modules, key=lambda m: m["cumulative_us"], reverse=True)
+    return {
+        "total_ms": round(sum(m["self_us"] for m in modules) / 1000, 1),
+        "modules": len(modules),
+        "slowest_modules": [
+            {"module": m["module"], "cumulative_ms": round(m["cumulative_us"] / 1000, 1)}
+            for m in slowest[:top]
+        ],
+        "slowest_packages": [
+            {"package": name, "ms": round(us / 1000, 1)}
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ]
+    }
+
+def _run_child(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True, env=env
+    )
+
+def profile(top: int = 15) -> Dict[str, Any]:
+    """Profile a fresh worker start."""
+    # Timed without -X importtime, whose own bookkeeping slows imports down
+    timing = json.loads(_run_child(_CHILD).stdout.strip().splitlines()[-1])
+    # Import only, so modules deferred to startup don't show up as import cost
+    importtime = _run_child("import app.main", "-X", "importtime")
+    return {
+        "import_ms": round(timing["import_ms"], 1),
+        "startup_ms": round(timing["startup_ms"], 1),
+        "deferred_modules_loaded": [name for name in DEFERRED_MODULES if name in timing["loaded"]],
+        "imports": summarize_imports(parse_importtime(importtime.stderr), top)
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Profile the app's import and startup time")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if importing the app takes longer")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules and packages to list")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = profile(args.top)
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    failures = []
+    if report["deferred_modules_loaded"]:
+        failures.append(f"modules loaded at import: {', '.join(report['deferred_modules_loaded'])}")
+    if args.max_import_ms is not None and report["import_ms"] > args.max_import_ms:
+        failures.append(f"import took {report['import_ms']}ms, budget {args.max_import_ms}ms")
+    if failures:
+        print("Startup regression: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
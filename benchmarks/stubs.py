@@ -0,0 +1,154 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import random
+from app.services.base import BaseBotService
+
+class LatencyDistribution:
+    """
+    Random backend latency, parsed from a ``kind:param[:param]`` spec.
+
+    Supported kinds (all values in seconds):
+        - ``const:0.05``: always 50ms
+        - ``uniform:0.01:0.1``: uniform between 10ms and 100ms
+        - ``exp:0.05``: exponential with a 50ms mean
+        - ``lognormal:0.05:0.5``: lognormal with a 50ms median and sigma 0.5
+    """
+
+    KINDS = {"const": 1, "uniform": 2, "exp": 1, "lognormal": 2}
+
+    def __init__(self, spec: str, rng: Optional[random.Random] = None):
+        kind, *params = spec.split(":")
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency distribution: {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(param) for param in params]
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        """Draw one latency in seconds."""
+        if self.kind == "const":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(*self.params)
+        if self.kind == "exp":
+            return self.rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        median, sigma = self.params
+        return self.rng.lognormvariate(0, sigma) * median
+
+class StubBotService(BaseBotService):
+    """
+    In-process backend with a latency distribution and an error rate.
+
+    Each response reports the time spent in the backend as
+    ``backend_seconds``, so the orchestrator's own overhead can be
+    separated from backend latency.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        latency: LatencyDistribution,
+        error_rate: float = 0.0,
+        rng: Optional[random.Random] = None
+    ):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = rng or random.Random()
+        self.calls = 0
+
+    async def process_query(self, query: str) -> Dict[str, Any]:
+        self.calls += 1
+        delay = self.latency.sample()
+        await asyncio.sleep(delay)
+        if self.rng.random() < self.error_rate:
+            raise Exception(f"Injected failure in {self.name}")
+        return {
+            "query": query,
+            "response": f"Stub: {query}",
+            "confidence": 1.0,
+            "backend_seconds": delay
+        }
+
+    async def health_check(self) -> bool:
+        return True
+
+    @property
+    def capabilities(self) -> List[str]:
+        return ["bench"]
+
+class StubHTTPBackend:
+    """
+    Local HTTP/1.1 bot service answering ``POST /query`` like ``StubBotService``.
+
+    Served with asyncio streams on the benchmark's own event loop, so
+    simulated latency does not tie up threads. Injected errors answer 500.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyDistribution,
+        error_rate: float = 0.0,
+        rng: Optional[random.Random] = None
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = rng or random.Random()
+        self.calls = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/query"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._respond(body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, body: bytes):
+        self.calls += 1
+        query = json.loads(body or b"{}").get("query", "")
+        delay = self.latency.sample()
+        await asyncio.sleep(delay)
+        if self.rng.random() < self.error_rate:
+            return "500 Internal Server Error", {"error": "Injected failure"}
+        return "200 OK", {
+            "response": f"Stub: {query}",
+            "confidence": 1.0,
+            "backend_seconds": delay
+        }
@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from app.core.admission import AdmissionController, ServiceOverloadedError
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_full():
+    controller = AdmissionController("svc", max_concurrent=1, max_queue_depth=1, max_queue_wait=1.0)
+    await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.queue_depth == 1
+
+    with pytest.raises(ServiceOverloadedError, match="queue full"):
+        await controller.acquire()
+
+    controller.release()
+    await waiter
+    assert controller.in_flight == 1
+    assert controller.queue_depth == 0
+    assert controller.get_stats()["rejected_queue_full"] == 1
+
+@pytest.mark.asyncio
+async def test_rejects_after_max_queue_wait():
+    controller = AdmissionController("svc", max_concurrent=1, max_queue_depth=5, max_queue_wait=0.01)
+    await controller.acquire()
+    with pytest.raises(ServiceOverloadedError, match="timed out"):
+        await controller.acquire()
+
+    stats = controller.get_stats()
+    assert stats["rejected_queue_timeout"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["max_queue_wait"] >= 0.01
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    controller = AdmissionController("svc", max_concurrent=1, max_queue_depth=5, max_queue_wait=1.0)
+    await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    controller.release()
+    assert controller.in_flight == 0
+    async with controller.slot():
+        assert controller.in_flight == 1
+    assert controller.in_flight == 0
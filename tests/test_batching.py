@@ -0,0 +1,137 @@
+import asyncio
+import json
+import httpx
+import pytest
+from app.core.batching import Histogram, MicroBatcher
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.services.echo_bot import EchoBotService
+from app.services.http_service import HTTPBotService
+
+class BatchingEchoBot(EchoBotService):
+    def __init__(self):
+        super().__init__("batch_echo")
+        self.batches = []
+
+    @property
+    def supports_batching(self):
+        return True
+
+    async def process_batch(self, queries):
+        self.batches.append(list(queries))
+        return [
+            ValueError("bad query") if query == "bad" else {"response": f"Echo: {query}"}
+            for query in queries
+        ]
+
+def test_histogram_buckets_by_upper_bound():
+    histogram = Histogram((1, 2, 4))
+    for value in (1, 2, 3, 10):
+        histogram.observe(value)
+    stats = histogram.get_stats()
+    assert stats["buckets"] == {"1": 1, "2": 1, "4": 1, "+Inf": 1}
+    assert stats["count"] == 4
+    assert stats["sum"] == 16
+
+@pytest.mark.asyncio
+async def test_batcher_sends_full_batch_immediately():
+    batches = []
+
+    async def send(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(send, max_batch_size=3, max_wait=10)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(i) for i in range(3))), 1
+    )
+    assert results == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_after_window_and_fails_whole_batch():
+    async def send(items):
+        raise RuntimeError("upstream down")
+
+    batcher = MicroBatcher(send, max_batch_size=10, max_wait=0.01)
+    results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.get_stats()["batch_size"]["buckets"]["2"] == 1
+
+@pytest.mark.asyncio
+async def test_orchestrator_batches_concurrent_queries():
+    orchestrator = ChatbotOrchestrator()
+    bot = BatchingEchoBot()
+    await orchestrator.register_service(
+        ServiceCreate(
+            name="batch",
+            endpoint="http://localhost:9000/query",
+            capabilities=["echo"],
+            description="batch",
+            max_batch_size=4,
+            max_batch_wait_seconds=0.05
+        ),
+        backend=bot
+    )
+
+    responses = await asyncio.gather(
+        *(orchestrator.process_query(f"query {i}") for i in range(3)),
+        orchestrator.process_query("bad")
+    )
+    # The failed query is retried on its own
+    assert bot.batches[0] == ["query 0", "query 1", "query 2", "bad"]
+    assert [r["response"] for r in responses[:3]] == ["Echo: query 0", "Echo: query 1", "Echo: query 2"]
+    assert responses[3]["error"] == "Service error: bad query"
+
+    metrics = orchestrator.get_service_metrics("batch")
+    assert metrics["batching"]["batch_size"]["buckets"]["4"] == 1
+
+@pytest.mark.asyncio
+async def test_http_service_posts_batch_endpoint():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/batch"
+        queries = json.loads(request.content)["queries"]
+        return httpx.Response(200, json={"results": [{"response": q.upper()} for q in queries]})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        service = HTTPBotService(
+            "remote", "http://bot/query", ["chat"],
+            client=client, batch_endpoint="http://bot/batch"
+        )
+        assert service.supports_batching
+        results = await service.process_batch(["a", "b"])
+        assert [r["response"] for r in results] == ["A", "B"]
+        assert results[0]["service"] == "remote"
+
+@pytest.mark.asyncio
+async def test_batched_queries_each_take_an_admission_slot():
+    orchestrator = ChatbotOrchestrator()
+    bot = BatchingEchoBot()
+    await orchestrator.register_service(
+        ServiceCreate(
+            name="batch",
+            endpoint="http://localhost:9000/query",
+            capabilities=["echo"],
+            description="batch",
+            max_concurrent_requests=2,
+            max_queue_depth=0,
+            max_batch_size=4,
+            max_batch_wait_seconds=0.05
+        ),
+        backend=bot
+    )
+    in_flight = []
+    send_batch = bot.process_batch
+
+    async def process_batch(queries):
+        in_flight.append(orchestrator._admission["batch"].in_flight)
+        return await send_batch(queries)
+
+    bot.process_batch = process_batch
+    responses = await asyncio.gather(*(orchestrator.process_query(f"query {i}") for i in range(4)))
+
+    # Two queries fill the concurrency limit; the others are shed, not sent
+    assert bot.batches == [["query 0", "query 1"]]
+    assert in_flight == [2]
+    assert [r.get("response") for r in responses[:2]] == ["Echo: query 0", "Echo: query 1"]
+    assert [r["status_code"] for r in responses[2:]] == [503, 503]
+    assert orchestrator._admission["batch"].in_flight == 0
@@ -0,0 +1,59 @@
+import asyncio
+import random
+import pytest
+from app.core.config import settings
+from benchmarks.load import percentile, run_load
+from benchmarks.run import compare, parse_args, run
+from benchmarks.stubs import LatencyDistribution
+
+def test_percentile_interpolates_between_ranks():
+    values = [0.4, 0.1, 0.3, 0.2]
+    assert percentile(values, 0) == 0.1
+    assert percentile(values, 50) == pytest.approx(0.25)
+    assert percentile(values, 100) == 0.4
+    assert percentile([], 99) == 0.0
+
+def test_latency_distributions():
+    rng = random.Random(1)
+    assert LatencyDistribution("const:0.05").sample() == 0.05
+    samples = [LatencyDistribution("uniform:0.01:0.02", rng).sample() for _ in range(100)]
+    assert all(0.01 <= sample <= 0.02 for sample in samples)
+    assert LatencyDistribution("lognormal:0.05:0.5", rng).sample() > 0
+    with pytest.raises(ValueError):
+        LatencyDistribution("normal:0.05")
+
+@pytest.mark.asyncio
+async def test_load_is_open_loop_and_measures_overhead():
+    async def send(index):
+        # A slow request must not delay the ones scheduled after it
+        await asyncio.sleep(0.2 if index == 0 else 0.01)
+        return ("ok", 0.01) if index % 5 else ("503", None)
+
+    result = await run_load(send, rps=100, duration=0.2)
+    report = result.to_dict(100)
+    assert report["requests"] == 20
+    assert report["outcomes"] == {"503": 4, "ok": 16}
+    assert report["elapsed_seconds"] < 0.35
+    assert report["orchestrator_overhead"]["p50_ms"] < report["latency"]["p50_ms"]
+
+def test_compare_flags_regressions():
+    baseline = {"scenarios": {"query": {"throughput_rps": 100.0, "latency": {"p99_ms": 10.0}}}}
+    current = {"scenarios": {"query": {"throughput_rps": 90.0, "latency": {"p99_ms": 8.0}}}}
+    rows = {row["metric"]: row for row in compare(baseline, current)}
+    assert rows["throughput_rps"]["change_pct"] == -10.0
+    assert rows["throughput_rps"]["regression"]
+    assert not rows["latency.p99_ms"]["regression"]
+
+def test_query_scenario_runs_in_process(monkeypatch):
+    # The run switches these off; restore them for the other tests
+    for name in ("RATE_LIMIT_ENABLED", "REGISTRY_ENABLED", "HEALTH_CHECK_ENABLED", "RESPONSE_CACHE_ENABLED"):
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    args = parse_args([
+        "--echo-backends", "2", "--http-backends", "1", "--latency", "const:0.005",
+        "--rps", "50", "--duration", "0.2", "--warmup", "0", "--scenarios", "query"
+    ])
+    report = asyncio.run(run(args))
+    query = report["scenarios"]["query"]
+    assert query["succeeded"] == 10
+    assert report["backend_calls"] == 10
+    assert query["orchestrator_overhead"]["p50_ms"] >= 0
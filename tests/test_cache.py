@@ -0,0 +1,52 @@
+import time
+from app.core.cache import LRUCache
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+def test_lru_bounded_by_bytes():
+    cache = LRUCache(max_entries=100, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "yyyy")
+    cache.set("c", "zzzz")
+    assert "a" not in cache
+    assert cache.get_stats()["bytes"] == 8
+
+    # Values larger than the whole budget are never cached
+    cache.set("d", "x" * 11)
+    assert "d" not in cache
+    assert len(cache) == 2
+
+def test_lru_ttl_expiry(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache = LRUCache(ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 30)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+def test_lru_hit_miss_counters():
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    cache.peek("a")
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 50.0
+    assert cache.invalidate("a") is True
+    assert cache.invalidate("a") is False
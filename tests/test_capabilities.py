@@ -0,0 +1,56 @@
+import pytest
+from app.core.capabilities import CapabilityIndex, QueryClassifier
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+
+def test_capability_index_lookup():
+    index = CapabilityIndex()
+    index.add("echo", ["echo", "repeat"])
+    index.add("gpt", ["chat", "code"])
+    index.add("coder", ["code"])
+
+    assert index.lookup(["code"]) == {"gpt", "coder"}
+    assert index.lookup(["code", "chat"]) == {"gpt"}
+    assert index.lookup(["translate"]) == set()
+
+    index.remove("gpt", ["chat", "code"])
+    assert index.lookup(["code"]) == {"coder"}
+    assert "chat" not in index.capabilities()
+
+def test_query_classifier():
+    classifier = QueryClassifier({
+        "code": ["python", r"def\s+\w+"],
+        "echo": ["echo", "repeat"],
+    })
+    assert classifier.classify("Please ECHO this") == {"echo"}
+    assert classifier.classify("fix def foo(): in python") == {"code"}
+    assert classifier.classify("repeat my python code") == {"code", "echo"}
+    assert classifier.classify("pythonic") == set()
+    assert QueryClassifier({}).classify("anything") == set()
+
+def test_query_classifier_rejects_named_groups():
+    # Unnamed groups are fine; they do not affect which capability matched
+    assert QueryClassifier({"code": [r"(python|java) code"]}).classify("java code") == {"code"}
+    with pytest.raises(ValueError):
+        QueryClassifier({"code": [r"(?P<c1>python)"], "math": ["sum"]})
+
+@pytest.mark.asyncio
+async def test_orchestrator_routes_by_capability():
+    orchestrator = ChatbotOrchestrator(classifier=QueryClassifier({"echo": ["echo"]}))
+    for name, capabilities in [("echo_bot", ["echo"]), ("gpt", ["chat"])]:
+        await orchestrator.register_service(ServiceCreate(
+            name=name,
+            endpoint="http://localhost:9000",
+            capabilities=capabilities,
+            description=name
+        ))
+
+    assert (await orchestrator.route_query("echo hello")).name == "echo_bot"
+    assert (await orchestrator.route_query("hi", capabilities=["chat"])).name == "gpt"
+    assert await orchestrator.route_query("hi", capabilities=["vision"]) is None
+
+    # Inferred capabilities fall back to any active service
+    orchestrator.set_service_active("echo_bot", False)
+    assert (await orchestrator.route_query("echo hello")).name == "gpt"
+
+    orchestrator.deregister_service("gpt")
+    assert orchestrator.capability_index.lookup(["chat"]) == set()
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+import fakeredis
+import pytest
+from app.core import dependencies
+from app.core.config import settings
+from app.core.conversation import ConversationManager
+from app.core.conversation_codec import ConversationCodec, MsgpackCodec, to_epoch_ms
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+@pytest.fixture
+def manager(redis_client):
+    return ConversationManager(redis_client=redis_client, cache_enabled=False, codec=MsgpackCodec())
+
+async def store_legacy(redis_client, conversation_id, contents, updated_minutes_ago=1):
+    """Write a conversation the way it was stored before the list and hash layout."""
+    updated_at = datetime.utcnow() - timedelta(minutes=updated_minutes_ago)
+    conversation = {
+        "created_at": (updated_at - timedelta(minutes=5)).isoformat(),
+        "updated_at": updated_at.isoformat(),
+        "messages": [
+            {"role": "user", "content": content, "timestamp": updated_at.isoformat()}
+            for content in contents
+        ]
+    }
+    await redis_client.set(f"conversation:{conversation_id}", json.dumps(conversation), ex=1800)
+    return conversation
+
+def same_ms(stored: str, original: str) -> bool:
+    """Timestamps stored by the msgpack codec keep millisecond precision."""
+    return to_epoch_ms(stored) == to_epoch_ms(original)
+
+@pytest.mark.asyncio
+async def test_add_message_appends_to_list_and_hash(manager, redis_client):
+    assert await manager.add_message("c1", "user", "hello")
+    assert await manager.add_message("c1", "assistant", "hi there", metadata={"service": "echo"})
+
+    messages = await manager.get_conversation("c1")
+    assert [(m["role"], m["content"]) for m in messages] == [("user", "hello"), ("assistant", "hi there")]
+    assert messages[1]["metadata"] == {"service": "echo"}
+    assert messages[0]["token_count"] > 0
+    assert await redis_client.llen("conversation:c1:messages") == 2
+    meta = await redis_client.hgetall("conversation:c1:meta")
+    assert set(meta) == {"created_at", "updated_at"}
+    assert await redis_client.ttl("conversation:c1:meta") > 0
+    assert await redis_client.zscore(ConversationManager.ACTIVE_INDEX_KEY, "c1") is not None
+
+@pytest.mark.asyncio
+async def test_history_is_trimmed_to_most_recent(manager, redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_CONVERSATION_HISTORY", 3)
+    for i in range(5):
+        await manager.add_message("c1", "user", f"message {i}")
+
+    messages = await manager.get_conversation("c1")
+    assert [m["content"] for m in messages] == ["message 2", "message 3", "message 4"]
+    assert await redis_client.llen("conversation:c1:messages") == 3
+
+@pytest.mark.asyncio
+async def test_metadata_counts_messages_with_llen(manager):
+    for i in range(4):
+        await manager.add_message("c1", "user", f"message {i}")
+
+    metadata = await manager.get_conversation_metadata("c1")
+    assert metadata["message_count"] == 4
+    assert not metadata["is_expired"]
+    assert metadata["created_at"] <= metadata["updated_at"]
+    assert await manager.get_conversation_metadata("missing") is None
+
+@pytest.mark.asyncio
+async def test_delete_removes_every_key(manager, redis_client):
+    await manager.add_message("c1", "user", "hello")
+    await store_legacy(redis_client, "c2", ["old"])
+    assert await manager.delete_conversation("c1")
+    assert await manager.delete_conversation("c2")
+    assert await redis_client.keys("conversation:*") == []
+    assert await manager.get_conversation("c1") == []
+
+@pytest.mark.asyncio
+async def test_legacy_conversation_is_converted_on_read(manager, redis_client):
+    legacy = await store_legacy(redis_client, "old", ["first", "second"])
+
+    messages = await manager.get_conversation("old")
+    assert [m["content"] for m in messages] == ["first", "second"]
+    assert same_ms(messages[0]["timestamp"], legacy["messages"][0]["timestamp"])
+    assert not await redis_client.exists("conversation:old")
+    assert await redis_client.llen("conversation:old:messages") == 2
+
+    metadata = await manager.get_conversation_metadata("old")
+    assert same_ms(metadata["created_at"], legacy["created_at"])
+    assert same_ms(metadata["updated_at"], legacy["updated_at"])
+    assert metadata["message_count"] == 2
+    assert "old" in await manager.get_active_conversations()
+
+@pytest.mark.asyncio
+async def test_legacy_conversation_is_converted_on_write(manager, redis_client):
+    legacy = await store_legacy(redis_client, "old", ["first", "second"])
+
+    assert await manager.add_message("old", "user", "third")
+    messages = await manager.get_conversation("old")
+    assert [m["content"] for m in messages] == ["first", "second", "third"]
+    metadata = await manager.get_conversation_metadata("old")
+    assert same_ms(metadata["created_at"], legacy["created_at"])
+    assert metadata["updated_at"] > legacy["updated_at"]
+
+@pytest.mark.asyncio
+async def test_write_succeeds_when_legacy_blob_is_malformed(manager, redis_client):
+    await redis_client.set("conversation:old", "{not json")
+
+    assert await manager.add_message("old", "user", "new")
+    assert await redis_client.llen("conversation:old:messages") == 1
+
+@pytest.mark.asyncio
+async def test_legacy_conversation_is_converted_once(manager, redis_client):
+    await store_legacy(redis_client, "old", ["first", "second"])
+
+    assert await manager._migrate_legacy_conversation("old")
+    assert not await manager._migrate_legacy_conversation("old")
+    assert await redis_client.llen("conversation:old:messages") == 2
+
+@pytest.mark.asyncio
+async def test_expired_legacy_conversation_is_deleted(redis_client):
+    manager = ConversationManager(redis_client=redis_client, cache_enabled=False, codec=ConversationCodec())
+    await store_legacy(redis_client, "old", ["first"], updated_minutes_ago=settings.CONVERSATION_TIMEOUT_MINUTES + 1)
+
+    assert await manager.get_conversation("old") == []
+    assert await redis_client.keys("conversation:*") == []
+
+async def index(redis_client, scores):
+    """Add conversations to the active index, scored by minutes since last update."""
+    now = time.time()
+    await redis_client.zadd(
+        ConversationManager.ACTIVE_INDEX_KEY,
+        {conversation_id: now - minutes * 60 for conversation_id, minutes in scores.items()}
+    )
+
+@pytest.mark.asyncio
+async def test_active_conversations_are_paged_oldest_first(manager, redis_client):
+    await index(redis_client, {f"c{i}": 10 - i for i in range(7)})
+
+    ids = [conversation_id async for conversation_id in manager.iter_active_conversations(page_size=2)]
+    assert ids == [f"c{i}" for i in range(7)]
+
+@pytest.mark.asyncio
+async def test_paging_splits_ties_by_member(manager, redis_client):
+    now = time.time()
+    await redis_client.zadd(ConversationManager.ACTIVE_INDEX_KEY, {f"c{i}": now for i in range(5)})
+
+    ids = [conversation_id async for conversation_id in manager.iter_active_conversations(page_size=2)]
+    assert ids == [f"c{i}" for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_removal_during_iteration_skips_nothing(manager, redis_client):
+    await index(redis_client, {f"c{i}": 10 - i for i in range(6)})
+
+    ids = []
+    async for conversation_id in manager.iter_active_conversations(page_size=2):
+        ids.append(conversation_id)
+        # Remove what was already yielded, as pruning or deletion would
+        await redis_client.zrem(ConversationManager.ACTIVE_INDEX_KEY, conversation_id)
+    assert ids == [f"c{i}" for i in range(6)]
+
+@pytest.mark.asyncio
+async def test_updated_conversations_move_to_the_end(manager, redis_client):
+    await index(redis_client, {f"c{i}": 10 - i for i in range(4)})
+
+    ids = []
+    async for conversation_id in manager.iter_active_conversations(page_size=2):
+        ids.append(conversation_id)
+        if conversation_id == "c1":
+            await index(redis_client, {"c0": 0})
+    assert ids == ["c0", "c1", "c2", "c3", "c0"]
+
+@pytest.mark.asyncio
+async def test_active_conversations_since_minutes(manager, redis_client):
+    await index(redis_client, {"recent": 1, "older": 20, "expired": settings.CONVERSATION_TIMEOUT_MINUTES + 1})
+
+    assert await manager.get_active_conversations(since_minutes=5) == ["recent"]
+    assert await manager.get_active_conversations() == ["older", "recent"]
+
+@pytest.mark.asyncio
+async def test_prune_expired_conversations(manager, redis_client):
+    await manager.add_message("current", "user", "hello")
+    await manager.add_message("stale", "user", "hello")
+    expired = {f"old{i}": settings.CONVERSATION_TIMEOUT_MINUTES + i + 1 for i in range(5)}
+    await index(redis_client, {**expired, "stale": settings.CONVERSATION_TIMEOUT_MINUTES + 1})
+
+    assert await manager.prune_expired_conversations(batch_size=2) == 6
+    assert await redis_client.zrange(ConversationManager.ACTIVE_INDEX_KEY, 0, -1) == ["current"]
+    assert not await redis_client.exists("conversation:stale:messages", "conversation:stale:meta")
+    assert await redis_client.exists("conversation:current:messages")
+
+@pytest.mark.asyncio
+async def test_prune_keeps_conversation_updated_after_listing(manager, redis_client):
+    timeout = settings.CONVERSATION_TIMEOUT_MINUTES
+    await manager.add_message("revived", "user", "hello")
+    await manager.add_message("old", "user", "hello")
+    await index(redis_client, {"revived": timeout + 1, "old": timeout + 1})
+    list_expired = redis_client.zrangebyscore
+
+    async def listed_then_updated(*args, **kwargs):
+        expired = await list_expired(*args, **kwargs)
+        if "revived" in expired:
+            # A new message lands between listing and deleting
+            await manager.add_message("revived", "user", "still here")
+        return expired
+
+    redis_client.zrangebyscore = listed_then_updated
+    assert await manager.prune_expired_conversations() == 1
+    assert [m["content"] for m in await manager.get_conversation("revived")] == ["hello", "still here"]
+    assert not await redis_client.exists("conversation:old:messages")
+
+@pytest.mark.asyncio
+async def test_prune_removes_expired_legacy_conversations(manager, redis_client):
+    timeout = settings.CONVERSATION_TIMEOUT_MINUTES
+    await store_legacy(redis_client, "legacy_old", ["hi"], updated_minutes_ago=timeout + 1)
+    await store_legacy(redis_client, "legacy_recent", ["hi"])
+    await manager.add_message("current", "user", "hello")
+
+    assert await manager.prune_expired_conversations() == 1
+    assert not await redis_client.exists("conversation:legacy_old")
+    assert await redis_client.exists("conversation:legacy_recent")
+    assert await redis_client.exists("conversation:current:messages")
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_write_on_one_worker_evicts_anothers_cache():
+    server = fakeredis.FakeServer()
+    workers = [
+        ConversationManager(
+            redis_client=fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+            cache_enabled=True
+        )
+        for _ in range(2)
+    ]
+    first, second = workers
+    for worker in workers:
+        await worker.start_cache_invalidation()
+    try:
+        await first.add_message("c1", "user", "hello")
+        assert [m["content"] for m in await second.get_conversation("c1")] == ["hello"]
+        assert second.cache.peek("c1") is not None
+
+        await first.add_message("c1", "assistant", "hi")
+        await wait_for(lambda: second.cache.peek("c1") is None)
+        assert [m["content"] for m in await second.get_conversation("c1")] == ["hello", "hi"]
+        # The writer's own cache was written through, not invalidated
+        assert first.cache.peek("c1") is not None
+
+        await second.delete_conversation("c1")
+        await wait_for(lambda: first.cache.peek("c1") is None)
+    finally:
+        for worker in workers:
+            await worker.stop_cache_invalidation()
+
+@pytest.mark.asyncio
+async def test_shared_manager_follows_invalidations_when_cached(monkeypatch):
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(dependencies, "get_redis_client", lambda: redis_client)
+    monkeypatch.setattr(settings, "CONVERSATION_CACHE_ENABLED", True)
+
+    await dependencies.start_conversation_manager()
+    manager = dependencies.get_conversation_manager()
+    try:
+        assert manager.cache is not None
+        assert manager._invalidation_task is not None
+        manager.cache.set("c1", [])
+        await redis_client.publish(ConversationManager.INVALIDATION_CHANNEL, "other-worker:c1")
+        await wait_for(lambda: manager.cache.peek("c1") is None)
+    finally:
+        await dependencies.close_conversation_manager()
+    assert manager._invalidation_task is None
@@ -0,0 +1,51 @@
+import json
+import pytest
+from app.core.conversation_codec import (
+    FORMAT_MSGPACK,
+    FORMAT_MSGPACK_ZSTD,
+    ConversationCodec,
+    MsgpackCodec,
+    decode_message,
+    format_timestamp,
+    get_codec,
+    parse_timestamp
+)
+
+def message(content="hello", **extra):
+    return {"role": "user", "content": content, "timestamp": "2024-01-01T12:00:00.250000", **extra}
+
+def test_msgpack_round_trips_with_epoch_timestamps():
+    codec = MsgpackCodec(compress_threshold=10_000)
+    record = codec.encode(message(metadata={"source": "test"}))
+    assert record[0] == FORMAT_MSGPACK
+    assert len(record) < len(ConversationCodec().encode(message(metadata={"source": "test"})))
+    assert decode_message(record) == message(metadata={"source": "test"})
+
+def test_large_records_are_compressed():
+    codec = MsgpackCodec(compress_threshold=64)
+    original = message("the same words again " * 50)
+    record = codec.encode(original)
+    assert record[0] == FORMAT_MSGPACK_ZSTD
+    assert len(record) < len(original["content"]) / 4
+    assert codec.decode(record) == original
+
+def test_legacy_json_records_are_read_transparently():
+    legacy = json.dumps(message())
+    assert decode_message(legacy) == message()
+    assert decode_message(legacy.encode()) == message()
+
+def test_unknown_format_version_is_rejected():
+    with pytest.raises(ValueError):
+        decode_message(bytes([99]) + b"payload")
+
+def test_timestamps_parse_in_either_format():
+    epoch = parse_timestamp("2024-01-01T00:00:00")
+    assert parse_timestamp(str(int(epoch * 1000))) == epoch
+    assert format_timestamp(str(int(epoch * 1000))) == "2024-01-01T00:00:00"
+    assert format_timestamp("2024-01-01T00:00:00") == "2024-01-01T00:00:00"
+
+def test_get_codec():
+    assert get_codec("json").name == "json"
+    assert get_codec("msgpack").name == "msgpack"
+    with pytest.raises(ValueError):
+        get_codec("xml")
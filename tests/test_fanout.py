@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.dependencies import get_orchestrator
+from app.core.fanout import BestConfidencePolicy, FirstKPolicy, get_aggregation_policy
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.services.base import BaseBotService
+
+class ScriptedBot(BaseBotService):
+    """Answers after a fixed delay with a fixed confidence, or fails."""
+
+    def __init__(self, delay, confidence=0.5, fail=False):
+        self.delay = delay
+        self.confidence = confidence
+        self.fail = fail
+        self.cancelled = False
+
+    async def process_query(self, query):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise Exception("backend down")
+        return {"response": f"answer at {self.delay}", "confidence": self.confidence}
+
+    async def health_check(self):
+        return True
+
+    @property
+    def capabilities(self):
+        return ["chat"]
+
+async def make_orchestrator(**bots):
+    orchestrator = ChatbotOrchestrator()
+    for name, bot in bots.items():
+        await orchestrator.register_service(ServiceCreate(
+            name=name, endpoint="http://localhost:9000", capabilities=["chat"], description=name
+        ), backend=bot)
+    return orchestrator
+
+@pytest.mark.asyncio
+async def test_first_successful_skips_failures_and_cancels_the_rest():
+    bots = {
+        "broken": ScriptedBot(0.0, fail=True),
+        "fast": ScriptedBot(0.01),
+        "slow": ScriptedBot(1.0)
+    }
+    orchestrator = await make_orchestrator(**bots)
+    response = await orchestrator.fan_out("hi", ["chat"])
+
+    assert response["service"] == "fast"
+    assert sorted(response["fanout"]["services"]) == ["broken", "fast", "slow"]
+    assert response["fanout"]["responded"] == 1
+    assert response["fanout"]["cancelled"] == 1
+    await asyncio.sleep(0.01)  # Let the cancellation reach the backend
+    assert bots["slow"].cancelled
+    assert orchestrator.get_service_metrics("slow")["current_load"] == 0
+    assert orchestrator.get_resilience_metrics()["fanout_cancelled_calls"] == 1
+
+@pytest.mark.asyncio
+async def test_first_k_collects_k_responses():
+    orchestrator = await make_orchestrator(a=ScriptedBot(0.01), b=ScriptedBot(0.02), c=ScriptedBot(1.0))
+    response = await orchestrator.fan_out("hi", ["chat"], FirstKPolicy(k=2))
+    assert [r["service"] for r in response["responses"]] == ["a", "b"]
+    assert response["service"] == "a"
+
+@pytest.mark.asyncio
+async def test_best_confidence_waits_until_deadline():
+    orchestrator = await make_orchestrator(
+        low=ScriptedBot(0.01, confidence=0.2),
+        high=ScriptedBot(0.03, confidence=0.9),
+        late=ScriptedBot(1.0, confidence=0.99)
+    )
+    response = await orchestrator.fan_out("hi", ["chat"], BestConfidencePolicy(deadline=0.2))
+    assert response["service"] == "high"
+    assert response["fanout"]["cancelled"] == 1
+
+@pytest.mark.asyncio
+async def test_best_confidence_stops_at_maximum_confidence():
+    orchestrator = await make_orchestrator(sure=ScriptedBot(0.01, confidence=1.0), slow=ScriptedBot(1.0))
+    response = await orchestrator.fan_out("hi", ["chat"], BestConfidencePolicy(deadline=5))
+    assert response["service"] == "sure"
+
+@pytest.mark.asyncio
+async def test_fan_out_reports_when_every_service_fails():
+    orchestrator = await make_orchestrator(a=ScriptedBot(0, fail=True), b=ScriptedBot(0, fail=True))
+    response = await orchestrator.fan_out("hi", ["chat"])
+    assert response["error"].startswith("All services failed")
+    assert "a: backend down" in response["error"] and "b: backend down" in response["error"]
+
+    orchestrator = await make_orchestrator(slow=ScriptedBot(1.0))
+    response = await orchestrator.fan_out("hi", ["chat"], get_aggregation_policy("first_successful", deadline=0.01))
+    assert "within" in response["error"]
+
+def test_query_endpoint_fans_out(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    orchestrator = asyncio.run(make_orchestrator(a=ScriptedBot(0, confidence=0.3), b=ScriptedBot(0, confidence=0.8)))
+    app.dependency_overrides[get_orchestrator] = lambda: orchestrator
+    try:
+        client = TestClient(app)
+        url = f"{settings.API_V1_STR}/services/query"
+        response = client.post(url, params={"query": "hi", "capabilities": "chat", "aggregation": "best_confidence"})
+        assert response.status_code == 200
+        assert response.json()["service"] == "b"
+
+        assert client.post(url, params={"query": "hi", "aggregation": "vote"}).status_code == 400
+        assert client.post(url, params={"query": "hi", "aggregation": "first_successful", "k": 2}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,152 @@
+import asyncio
+import time
+import pytest
+from app.core.health import CircuitBreaker, CircuitState, HealthCheckScheduler
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.services.echo_bot import EchoBotService
+
+class FlakyBot(EchoBotService):
+    def __init__(self):
+        super().__init__("flaky")
+        self.healthy = False
+
+    async def process_query(self, query):
+        raise RuntimeError("backend down")
+
+    async def health_check(self):
+        return self.healthy
+
+def test_circuit_breaker_transitions(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    changes = []
+    breaker = CircuitBreaker(
+        failure_threshold=2, reset_timeout=10, success_threshold=2,
+        latency_slo=1.0, on_state_change=changes.append
+    )
+
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    # Latency SLO breaches count as failures
+    breaker.record_success(5.0)
+    assert breaker.state == CircuitState.OPEN
+
+    # Probes before the reset timeout keep it open
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.OPEN
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 30)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.CLOSED
+    assert changes == [
+        CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.OPEN,
+        CircuitState.HALF_OPEN, CircuitState.CLOSED
+    ]
+
+@pytest.mark.asyncio
+async def test_open_circuit_removes_service(monkeypatch):
+    orchestrator = ChatbotOrchestrator()
+    bot = FlakyBot()
+    await orchestrator.register_service(ServiceCreate(
+        name="flaky", endpoint="http://localhost", capabilities=[], description="flaky"
+    ), backend=bot)
+    breaker = orchestrator._breakers["flaky"]
+    breaker.reset_timeout = 0
+
+    for _ in range(breaker.failure_threshold):
+        await orchestrator.process_query("hi")
+    assert orchestrator.get_available_services() == []
+    assert orchestrator.get_service_metrics("flaky")["circuit_state"] == "open"
+    assert (await orchestrator.process_query("hi"))["error"] == "No suitable service found for query"
+
+    bot.healthy = True
+    for _ in range(breaker.success_threshold):
+        assert await orchestrator.check_service_health("flaky")
+    assert [s.name for s in orchestrator.get_available_services()] == ["flaky"]
+    assert orchestrator.get_service_metrics("flaky")["last_health_check"] is not None
+
+@pytest.mark.asyncio
+async def test_health_check_scheduler_probes_services():
+    orchestrator = ChatbotOrchestrator()
+    probed = []
+
+    class ProbedBot(EchoBotService):
+        async def health_check(self):
+            probed.append(time.monotonic())
+            return True
+
+    await orchestrator.register_service(ServiceCreate(
+        name="echo", endpoint="http://localhost", capabilities=[], description="echo"
+    ), backend=ProbedBot())
+    scheduler = HealthCheckScheduler(orchestrator, interval=0.05, jitter=0.5)
+    scheduler.start()
+    await asyncio.sleep(0.3)
+    await scheduler.stop()
+    assert len(probed) >= 2
+
+def test_half_open_circuit_admits_bounded_trials(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, success_threshold=2, half_open_max_requests=2)
+    assert breaker.allow_request() and breaker.trials_in_flight == 0
+
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() and breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.release_trial()
+    assert breaker.allow_request()
+
+    # The first failed trial re-opens the circuit
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+
+@pytest.mark.asyncio
+async def test_half_open_service_gets_trial_traffic_only():
+    orchestrator = ChatbotOrchestrator()
+    gate = asyncio.Event()
+    calls = []
+
+    class SlowBot(EchoBotService):
+        async def process_query(self, query):
+            calls.append(query)
+            await gate.wait()
+            return await super().process_query(query)
+
+    bot = SlowBot("recovering")
+    bot.set_response_time(0)
+    await orchestrator.register_service(ServiceCreate(
+        name="recovering", endpoint="http://localhost", capabilities=[], description="recovering"
+    ), backend=bot)
+    breaker = orchestrator._breakers["recovering"]
+    breaker.reset_timeout = 0
+    breaker._transition(CircuitState.OPEN)
+    breaker.record_success()
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    trial = asyncio.create_task(orchestrator.process_query("trial"))
+    while not calls:
+        await asyncio.sleep(0)
+    # Traffic beyond the trial is shed instead of piling onto the recovering service
+    response = await orchestrator.process_query("more")
+    assert response["status_code"] == 503
+    assert calls == ["trial"]
+
+    gate.set()
+    assert (await trial)["service"] == "recovering"
+    assert breaker.trials_in_flight == 0
+    assert (await orchestrator.process_query("after"))["service"] == "recovering"
@@ -0,0 +1,61 @@
+import httpx
+import pytest
+from app.core import http_client
+from app.core.config import settings
+from app.core.http_client import get_http_client, close_http_client
+from app.services.http_service import HTTPBotService
+from app.services.openai_service import OpenAIService
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared():
+    client = get_http_client()
+    assert get_http_client() is client
+    await close_http_client()
+    assert client.is_closed
+
+@pytest.mark.asyncio
+async def test_http_client_recreated_after_close():
+    first = get_http_client()
+    await close_http_client()
+    second = get_http_client()
+    assert second is not first
+    assert not second.is_closed
+    await close_http_client()
+    assert http_client._http_client is None
+
+@pytest.mark.asyncio
+async def test_openai_requests_use_the_client_timeouts():
+    timeouts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200, json={"choices": [{"message": {"content": "pong"}}]})
+
+    timeout = httpx.Timeout(12.0, connect=2.0)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=timeout) as client:
+        service = OpenAIService(client=client)
+        service.api_key = "test-key"
+        assert await service.process_message("ping") == "pong"
+        async for _ in service.stream_message("ping"):
+            pass
+    assert timeouts == [timeout.as_dict()] * 2
+
+@pytest.mark.asyncio
+async def test_http_service_timeouts_keep_the_client_connect_and_pool_limits():
+    timeouts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200, json={"response": "pong"})
+
+    timeout = httpx.Timeout(12.0, connect=2.0, pool=3.0)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=timeout) as client:
+        service = HTTPBotService("remote", "http://bot/query", ["chat"], timeout_seconds=7.0, client=client)
+        assert (await service.process_query("ping"))["response"] == "pong"
+        assert await service.health_check()
+
+    health = settings.HEALTH_CHECK_TIMEOUT_SECONDS
+    assert timeouts == [
+        {"connect": 2.0, "read": 7.0, "write": 7.0, "pool": 3.0},
+        {"connect": 2.0, "read": health, "write": health, "pool": 3.0}
+    ]
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.main import app
+from app.core.cache import LRUCache
+from app.core.metrics import redis_timer, stats_collector
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.core.rate_limit import RateLimiter
+from app.services.echo_bot import EchoBotService
+
+class FailingBot(EchoBotService):
+    async def process_query(self, query):
+        raise RuntimeError("backend down")
+
+class DenyingRedis:
+    """Stands in for Redis with every rate limit bucket empty."""
+
+    def register_script(self, script):
+        async def run(keys, args):
+            return [0, 1000, 0]
+        return run
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+async def make_orchestrator(name, backend):
+    orchestrator = ChatbotOrchestrator()
+    backend.set_response_time(0)
+    await orchestrator.register_service(
+        ServiceCreate(
+            name=name,
+            endpoint="http://localhost:9000",
+            capabilities=["echo"],
+            description=name
+        ),
+        backend=backend
+    )
+    return orchestrator
+
+@pytest.mark.asyncio
+async def test_request_latency_and_first_token_histograms():
+    orchestrator = await make_orchestrator("metrics_echo", EchoBotService())
+    before = sample("orchestrator_request_duration_seconds_count", service="metrics_echo", outcome="success")
+
+    await orchestrator.process_query("hello")
+    async for _ in orchestrator.stream_query("hello stream"):
+        pass
+
+    after = sample("orchestrator_request_duration_seconds_count", service="metrics_echo", outcome="success")
+    assert after - before == 2
+    assert sample("orchestrator_time_to_first_token_seconds_count", service="metrics_echo") >= 1
+
+@pytest.mark.asyncio
+async def test_errors_counted_by_type():
+    orchestrator = await make_orchestrator("metrics_broken", FailingBot())
+    await orchestrator.process_query("hello")
+    assert sample(
+        "orchestrator_request_errors_total", service="metrics_broken", error_type="RuntimeError"
+    ) >= 1
+
+@pytest.mark.asyncio
+async def test_deregistering_removes_error_series():
+    orchestrator = await make_orchestrator("metrics_removed", FailingBot())
+    await orchestrator.process_query("hello")
+    # A service that only ever shed requests has error series too
+    orchestrator.services["metrics_removed"].rate_limit_per_minute = 1
+    orchestrator.rate_limiter = RateLimiter(DenyingRedis(), local_fraction=0)
+    await orchestrator.process_query("hello")
+    assert sample(
+        "orchestrator_request_errors_total", service="metrics_removed", error_type="ServiceOverloadedError"
+    ) == 1
+
+    orchestrator.deregister_service("metrics_removed")
+    for error_type in ("RuntimeError", "ServiceOverloadedError"):
+        assert REGISTRY.get_sample_value(
+            "orchestrator_request_errors_total", {"service": "metrics_removed", "error_type": error_type}
+        ) is None
+
+    shed_only = await make_orchestrator("metrics_shed_only", EchoBotService())
+    shed_only.services["metrics_shed_only"].rate_limit_per_minute = 1
+    shed_only.rate_limiter = RateLimiter(DenyingRedis(), local_fraction=0)
+    await shed_only.process_query("hello")
+    shed_only.deregister_service("metrics_shed_only")
+    assert REGISTRY.get_sample_value(
+        "orchestrator_request_errors_total", {"service": "metrics_shed_only", "error_type": "ServiceOverloadedError"}
+    ) is None
+
+@pytest.mark.asyncio
+async def test_redis_timer_observes_operation():
+    with redis_timer("test_operation"):
+        pass
+    assert sample("redis_operation_duration_seconds_count", operation="test_operation") == 1
+
+def test_metrics_endpoint_exposes_collected_stats():
+    cache = LRUCache()
+    cache.set("key", "value")
+    cache.get("key")
+    cache.get("missing")
+    stats_collector.register_cache("test", cache)
+
+    orchestrator = asyncio.run(make_orchestrator("scraped", EchoBotService()))
+    stats_collector.register_orchestrator(orchestrator)
+
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert 'cache_hit_ratio{cache="test"} 0.5' in response.text
+    assert 'orchestrator_in_flight_requests{service="scraped"} 0.0' in response.text
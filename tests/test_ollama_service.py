@@ -0,0 +1,220 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+from app.core.config import settings
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.services.ollama_service import OllamaService
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers the subset of the Ollama API the adapter uses."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "llama2:latest"}]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        timings = {
+            "done": True,
+            "total_duration": 3_000_000_000,
+            "load_duration": 1_000_000_000,
+            "eval_count": 20,
+            "eval_duration": 2_000_000_000
+        }
+        if "prompt" not in body:
+            self._send_json({"model": body["model"], "response": "", **timings})
+        elif not body["stream"]:
+            with self.server.lock:
+                self.server.active += 1
+                self.server.max_active = max(self.server.max_active, self.server.active)
+            time.sleep(0.05)
+            with self.server.lock:
+                self.server.active -= 1
+            self._send_json({"model": body["model"], "response": "Hello there", **timings})
+        else:
+            lines = [
+                {"response": "Hello", "done": False},
+                {"response": " there", "done": False},
+                {"response": "", **timings},
+            ]
+            data = "".join(json.dumps(line) + "\n" for line in lines).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+@pytest.fixture
+def ollama_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    server.requests = []
+    server.lock = threading.Lock()
+    server.active = 0
+    server.max_active = 0
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_service(server, client, **kwargs):
+    host, port = server.server_address
+    return OllamaService(base_url=f"http://{host}:{port}", client=client, **kwargs)
+
+@pytest.mark.asyncio
+async def test_process_query_passes_keep_alive_and_reports_timings(ollama_server):
+    async with httpx.AsyncClient() as client:
+        service = make_service(ollama_server, client, keep_alive="1h")
+        result = await service.process_query("hi")
+
+    assert result["response"] == "Hello there"
+    assert result["timings"]["load_duration"] == 1.0
+    assert result["timings"]["tokens_per_second"] == 10.0
+    assert ollama_server.requests[0]["keep_alive"] == "1h"
+    assert ollama_server.requests[0]["stream"] is False
+
+@pytest.mark.asyncio
+async def test_stream_query_yields_tokens(ollama_server):
+    async with httpx.AsyncClient() as client:
+        service = make_service(ollama_server, client)
+        reported = []
+        service.timings_listener = reported.append
+        chunks = [chunk async for chunk in service.stream_query("hi")]
+
+    assert chunks == ["Hello", " there"]
+    assert reported[0]["eval_duration"] == 2.0
+
+@pytest.mark.asyncio
+async def test_health_check_and_warm_up(ollama_server):
+    async with httpx.AsyncClient() as client:
+        service = make_service(ollama_server, client)
+        assert await service.health_check()
+        assert not await make_service(ollama_server, client, model="mistral").health_check()
+
+        timings = await service.warm_up()
+        assert timings["load_duration"] == 1.0
+        assert "prompt" not in ollama_server.requests[-1]
+
+@pytest.mark.asyncio
+async def test_orchestrator_collects_backend_timings(ollama_server):
+    async with httpx.AsyncClient() as client:
+        orchestrator = ChatbotOrchestrator()
+        service = make_service(ollama_server, client)
+        await orchestrator.register_service(
+            ServiceCreate(
+                name="ollama",
+                endpoint=service.base_url,
+                capabilities=service.capabilities,
+                description="local model"
+            ),
+            backend=service
+        )
+        await orchestrator.process_query("hi")
+        async for _ in orchestrator.stream_query("hi again"):
+            pass
+
+    timings = orchestrator.get_service_metrics("ollama")["backend_timings"]
+    assert timings["load_duration"] == 1.0
+    assert timings["total_duration"] == 3.0
+
+@pytest.mark.asyncio
+async def test_orchestrator_sends_ollama_queries_without_batching_delay(ollama_server):
+    async with httpx.AsyncClient() as client:
+        orchestrator = ChatbotOrchestrator()
+        service = make_service(ollama_server, client)
+        assert not service.supports_batching
+        await orchestrator.register_service(
+            ServiceCreate(
+                name="ollama",
+                endpoint=service.base_url,
+                capabilities=service.capabilities,
+                description="local model",
+                max_batch_size=8,
+                max_batch_wait_seconds=5.0
+            ),
+            backend=service
+        )
+        start = time.monotonic()
+        results = await asyncio.gather(*(orchestrator.process_query(f"q{i}") for i in range(4)))
+        elapsed = time.monotonic() - start
+
+    assert [r["response"] for r in results] == ["Hello there"] * 4
+    # Sent at once, for Ollama to decode together, instead of waiting out a batch window
+    assert elapsed < 1.0
+    assert ollama_server.max_active == 4
+    assert "batching" not in orchestrator.get_service_metrics("ollama")
+
+@pytest.mark.asyncio
+async def test_orchestrator_runs_keep_warm_while_registered(ollama_server):
+    def pings():
+        return [r for r in ollama_server.requests if "prompt" not in r]
+
+    async with httpx.AsyncClient() as client:
+        orchestrator = ChatbotOrchestrator()
+        for name in ("first", "second"):
+            service = make_service(ollama_server, client, name=name)
+            await orchestrator.register_service(
+                ServiceCreate(
+                    name=name,
+                    endpoint=service.base_url,
+                    capabilities=service.capabilities,
+                    description="local model"
+                ),
+                backend=service
+            )
+        first, second = orchestrator._backends["first"], orchestrator._backends["second"]
+        assert first._keep_warm_task is None
+
+        orchestrator.start_backends()
+        while len(pings()) < 2:
+            await asyncio.sleep(0.01)
+        task = first._keep_warm_task
+        orchestrator.deregister_service("first")
+        await asyncio.gather(*orchestrator._backend_stops)
+        assert task.cancelled() and first._keep_warm_task is None
+
+        await orchestrator.stop_backends()
+        assert second._keep_warm_task is None
+
+@pytest.mark.asyncio
+async def test_requests_keep_the_client_connect_and_pool_limits():
+    timeouts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"])
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "llama2:latest"}]})
+        return httpx.Response(200, json={"response": "hi", "done": True})
+
+    timeout = httpx.Timeout(12.0, connect=2.0, pool=3.0)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=timeout) as client:
+        service = OllamaService(base_url="http://ollama", client=client)
+        await service.process_query("hi")
+        assert [chunk async for chunk in service.stream_query("hi")] == ["hi"]
+        await service.warm_up()
+        assert await service.health_check()
+
+    generate, health = settings.OLLAMA_TIMEOUT_SECONDS, settings.HEALTH_CHECK_TIMEOUT_SECONDS
+    assert timeouts == [
+        {"connect": 2.0, "read": generate, "write": generate, "pool": 3.0}
+    ] * 3 + [
+        {"connect": 2.0, "read": health, "write": health, "pool": 3.0}
+    ]
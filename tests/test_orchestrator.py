@@ -0,0 +1,121 @@
+import asyncio
+import httpx
+import pytest
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.services.echo_bot import EchoBotService
+from app.services.http_service import HTTPBotService
+
+def make_service(name, **kwargs):
+    return ServiceCreate(
+        name=name,
+        endpoint="http://localhost:9000/query",
+        capabilities=["echo"],
+        description=name,
+        **kwargs
+    )
+
+class FailingBot(EchoBotService):
+    async def process_query(self, query):
+        raise RuntimeError("backend down")
+
+@pytest.mark.asyncio
+async def test_process_query_dispatches_to_backend():
+    orchestrator = ChatbotOrchestrator()
+    bot = EchoBotService()
+    bot.set_response_time(0)
+    await orchestrator.register_service(make_service("echo"), backend=bot)
+
+    response = await orchestrator.process_query("hello")
+    assert response["service"] == "echo"
+    assert response["response"] == "Echo: hello"
+    assert response["confidence"] == 1.0
+
+@pytest.mark.asyncio
+async def test_success_rate_counts_failures_and_timeouts():
+    orchestrator = ChatbotOrchestrator()
+    slow = EchoBotService()
+    slow.set_response_time(1)
+    await orchestrator.register_service(make_service("slow", timeout_seconds=0.01), backend=slow)
+    await orchestrator.register_service(make_service("broken"), backend=FailingBot())
+
+    orchestrator.set_service_active("broken", False)
+    response = await orchestrator.process_query("hi")
+    assert "timed out" in response["error"]
+
+    orchestrator.set_service_active("broken", True)
+    orchestrator.set_service_active("slow", False)
+    response = await orchestrator.process_query("hi")
+    assert response["error"] == "Service error: backend down"
+
+    metrics = orchestrator.get_service_metrics("broken")
+    assert metrics["success_rate"] == 0
+    assert metrics["current_load"] == 0
+
+@pytest.mark.asyncio
+async def test_max_concurrent_requests_enforced():
+    orchestrator = ChatbotOrchestrator()
+    active = 0
+    peak = 0
+
+    class CountingBot(EchoBotService):
+        async def process_query(self, query):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {"response": query}
+
+    await orchestrator.register_service(
+        make_service("limited", max_concurrent_requests=2), backend=CountingBot()
+    )
+    await asyncio.gather(*(orchestrator.process_query(f"hi {i}") for i in range(6)))
+    assert peak == 2
+    assert orchestrator.get_service_metrics("limited")["total_requests"] == 6
+
+@pytest.mark.asyncio
+async def test_http_service_adapter():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer secret"
+        return httpx.Response(200, json={"response": "remote answer", "confidence": 0.5})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        service = HTTPBotService(
+            name="remote",
+            endpoint="http://remote/query",
+            capabilities=["chat"],
+            api_key="secret",
+            client=client
+        )
+        result = await service.process_query("hi")
+    assert result == {
+        "service": "remote",
+        "query": "hi",
+        "response": "remote answer",
+        "confidence": 0.5
+    }
+
+@pytest.mark.asyncio
+async def test_spills_over_when_service_saturated():
+    orchestrator = ChatbotOrchestrator()
+    busy = EchoBotService("busy")
+    busy.set_response_time(0.05)
+    idle = EchoBotService("idle")
+    idle.set_response_time(0)
+    await orchestrator.register_service(
+        make_service("busy", max_concurrent_requests=1, max_queue_depth=0), backend=busy
+    )
+
+    first = asyncio.create_task(orchestrator.process_query("one"))
+    await asyncio.sleep(0)
+    shed = await orchestrator.process_query("two")
+    assert shed["status_code"] == 503
+    assert shed["retry_after"] is not None
+
+    await orchestrator.register_service(make_service("idle"), backend=idle)
+    orchestrator._load_metrics["idle"]["requests"] = 5  # steer routing to "busy" first
+    response = await orchestrator.process_query("three")
+    assert response["service"] == "idle"
+
+    assert (await first)["service"] == "busy"
+    assert orchestrator.get_service_metrics("busy")["rejected_requests"] == 2
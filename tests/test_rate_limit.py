@@ -0,0 +1,179 @@
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware
+from app.services.echo_bot import EchoBotService
+
+class CountingRedis:
+    """Stands in for Redis: fixed buckets without refill, charged like the script."""
+
+    def __init__(self):
+        self.tokens = {}
+        self.calls = 0
+        self.fail = False
+
+    def register_script(self, script):
+        async def run(keys, args):
+            self.calls += 1
+            if self.fail:
+                raise ConnectionError("redis down")
+            levels = []
+            for i, key in enumerate(keys):
+                capacity, pending = args[2 * i], args[2 * i + 1]
+                levels.append(self.tokens.get(key, capacity) - pending)
+            allowed = all(level >= 1 for level in levels)
+            for key, level in zip(keys, levels):
+                self.tokens[key] = level - 1 if allowed else level
+            return [int(allowed), 0 if allowed else 1500, min(self.tokens[key] for key in keys)]
+        return run
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+async def backdate(redis_client, key, seconds):
+    """Move a bucket's last refill back, as if ``seconds`` had passed."""
+    ts = int(await redis_client.hget(key, "ts"))
+    await redis_client.hset(key, "ts", ts - int(seconds * 1000))
+
+@pytest.mark.asyncio
+async def test_script_denies_when_bucket_is_empty(redis_client):
+    limiter = RateLimiter(redis_client, local_fraction=0)
+    results = [await limiter.check({"ratelimit:client": 3}) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    # 3 tokens a minute refill one every 20 seconds
+    assert 19.9 <= results[-1].retry_after <= 20.0
+    assert 0 < await redis_client.pttl("ratelimit:client") <= 61000
+
+@pytest.mark.asyncio
+async def test_script_refills_over_time(redis_client):
+    limiter = RateLimiter(redis_client, local_fraction=0)
+    for _ in range(3):
+        assert (await limiter.check({"ratelimit:client": 3})).allowed
+    assert not (await limiter.check({"ratelimit:client": 3})).allowed
+
+    await backdate(redis_client, "ratelimit:client", 40)
+    results = [await limiter.check({"ratelimit:client": 3}) for _ in range(3)]
+    assert [r.allowed for r in results] == [True, True, False]
+
+    # Refill stops at capacity
+    await backdate(redis_client, "ratelimit:client", 600)
+    results = [await limiter.check({"ratelimit:client": 3}) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+
+@pytest.mark.asyncio
+async def test_script_denies_on_any_empty_bucket_without_charging_others(redis_client):
+    limiter = RateLimiter(redis_client, local_fraction=0)
+    assert (await limiter.check({"ratelimit:a": 1})).allowed
+    result = await limiter.check({"ratelimit:a": 1, "ratelimit:b": 60})
+    assert not result.allowed
+    # The slowest-refilling empty bucket sets the wait
+    assert 59.9 <= result.retry_after <= 60.0
+    assert float(await redis_client.hget("ratelimit:b", "tokens")) == 60
+
+    await backdate(redis_client, "ratelimit:a", 60)
+    assert (await limiter.check({"ratelimit:a": 1, "ratelimit:b": 60})).allowed
+    assert 58.9 <= float(await redis_client.hget("ratelimit:b", "tokens")) <= 59.0
+
+@pytest.mark.asyncio
+async def test_script_charges_locally_admitted_requests(redis_client):
+    limiter = RateLimiter(redis_client, local_fraction=0.5, local_sync_seconds=60)
+    results = [await limiter.check({"ratelimit:client": 20}) for _ in range(11)]
+    assert all(r.allowed for r in results)
+    # One Redis check, 9 local admissions, then a check charging them
+    assert limiter.get_stats()["local_hits"] == 9
+    tokens = float(await redis_client.hget("ratelimit:client", "tokens"))
+    assert 20 - 11 <= tokens < 20 - 11 + 0.1
+    # The key lives until the bucket would be full again, plus a second
+    assert 33000 < await redis_client.pttl("ratelimit:client") <= 34000
+
+@pytest.mark.asyncio
+async def test_limits_enforced_through_redis():
+    redis = CountingRedis()
+    limiter = RateLimiter(redis, local_fraction=0)
+    results = [await limiter.check({"client": 3}) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[-1].retry_after == 1.5
+    assert redis.calls == 4
+
+@pytest.mark.asyncio
+async def test_local_precheck_defers_charges_to_next_redis_call():
+    redis = CountingRedis()
+    limiter = RateLimiter(redis, local_fraction=0.5, local_sync_seconds=60)
+
+    results = [await limiter.check({"client": 20}) for _ in range(12)]
+    assert all(r.allowed for r in results)
+    # 19 left after the first call allows 9 local admissions before syncing,
+    # then 9 left after charging them allows 4 more
+    assert redis.calls == 2
+    assert limiter.get_stats()["local_hits"] == 10
+    assert redis.tokens["client"] == 20 - 11
+
+@pytest.mark.asyncio
+async def test_fails_open_and_backs_off_when_redis_is_down():
+    redis = CountingRedis()
+    redis.fail = True
+    limiter = RateLimiter(redis, local_fraction=0, failure_backoff=60)
+    assert (await limiter.check({"client": 1})).allowed
+    assert (await limiter.check({"client": 1})).allowed
+    assert redis.calls == 1
+
+def test_middleware_rejects_with_retry_after():
+    limiter = RateLimiter(CountingRedis(), local_fraction=0)
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, get_limiter=lambda: limiter, path_prefix="/api")
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    client = TestClient(app)
+    headers = {"X-API-Key": "secret"}
+    for _ in range(settings.RATE_LIMIT_PER_MINUTE):
+        assert client.get("/api/ping", headers=headers).status_code == 200
+
+    response = client.get("/api/ping", headers=headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    # Other clients and routes outside the API are unaffected
+    assert client.get("/api/ping", headers={"X-API-Key": "other"}).status_code == 200
+    assert client.get("/health", headers=headers).status_code == 200
+
+def test_middleware_decodes_model_query_parameter(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_RATE_LIMITS", {"gpt 4": 5})
+    scope = {"type": "http", "headers": [], "client": ("1.2.3.4", 0), "query_string": b"model=gpt%204"}
+    assert RateLimiter.key("model", "gpt 4") in RateLimitMiddleware._limits(scope)
+
+@pytest.mark.asyncio
+async def test_service_rate_limit_spills_over():
+    orchestrator = ChatbotOrchestrator(rate_limiter=RateLimiter(CountingRedis(), local_fraction=0))
+    for name, limit in (("limited", 1), ("spare", None)):
+        bot = EchoBotService(name)
+        bot.set_response_time(0)
+        await orchestrator.register_service(
+            ServiceCreate(
+                name=name,
+                endpoint="http://localhost:9000",
+                capabilities=["echo"],
+                description=name,
+                rate_limit_per_minute=limit
+            ),
+            backend=bot
+        )
+    orchestrator.set_service_active("spare", False)
+    assert (await orchestrator.process_query("one"))["service"] == "limited"
+
+    response = await orchestrator.process_query("two")
+    assert response["status_code"] == 503
+    assert "rate limited" in response["error"]
+
+    orchestrator.set_service_active("spare", True)
+    assert (await orchestrator.process_query("three"))["service"] == "spare"
@@ -0,0 +1,73 @@
+import pytest
+import redis.asyncio as redis
+from prometheus_client import REGISTRY
+from app.core.config import settings
+from app.core.redis_client import Pipelined, create_redis_client
+
+class FakePipeline:
+    def __init__(self, transaction):
+        self.transaction = transaction
+        self.commands = []
+        self.was_reset = False
+
+    def get(self, key):
+        self.commands.append(("GET", key))
+
+    async def execute(self):
+        return [f"value:{key}" for _, key in self.commands]
+
+    async def reset(self):
+        self.was_reset = True
+
+class FakeRedis:
+    def __init__(self):
+        self.pipelines = []
+
+    def pipeline(self, transaction=True):
+        pipe = FakePipeline(transaction)
+        self.pipelines.append(pipe)
+        return pipe
+
+def round_trips(operation):
+    return REGISTRY.get_sample_value(
+        "redis_operation_duration_seconds_count", {"operation": operation}
+    ) or 0.0
+
+@pytest.mark.asyncio
+async def test_pool_is_bounded_and_configured():
+    client = create_redis_client()
+    try:
+        pool = client.connection_pool
+        assert isinstance(pool, redis.BlockingConnectionPool)
+        assert pool.max_connections == settings.REDIS_MAX_CONNECTIONS
+        assert pool.timeout == settings.REDIS_POOL_TIMEOUT_SECONDS
+        assert pool.connection_kwargs["health_check_interval"] == settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS
+        assert pool.connection_kwargs["decode_responses"]
+    finally:
+        await client.aclose()
+
+@pytest.mark.asyncio
+async def test_pipelined_sends_commands_in_one_execute():
+    fake = FakeRedis()
+    batch = Pipelined(fake, "test_pipelined")
+    async with batch as pipe:
+        pipe.get("a")
+        pipe.get("b")
+
+    assert batch.results == ["value:a", "value:b"]
+    assert fake.pipelines[0].transaction is False
+    assert fake.pipelines[0].was_reset
+    assert round_trips("test_pipelined") == 1
+
+@pytest.mark.asyncio
+async def test_pipelined_discards_commands_on_error():
+    fake = FakeRedis()
+    batch = Pipelined(fake, "test_pipelined_error", transaction=True)
+    with pytest.raises(RuntimeError):
+        async with batch as pipe:
+            pipe.get("a")
+            raise RuntimeError("boom")
+
+    assert batch.results == []
+    assert fake.pipelines[0].was_reset
+    assert round_trips("test_pipelined_error") == 0
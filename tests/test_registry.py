@@ -0,0 +1,248 @@
+import asyncio
+import json
+import fakeredis
+import pytest
+import pytest_asyncio
+from app.core import dependencies
+from app.core.config import settings
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.core.registry import ServiceRegistry, service_config
+from app.core.routing import LeastOutstandingStrategy
+from app.models.service import ServiceCreate as ServiceCreateModel
+from app.services.echo_bot import EchoBotService
+
+class ScriptOnlyRedis:
+    """Enough of a Redis client to construct a registry; changes are fed in directly."""
+
+    def __init__(self):
+        self.services = {}
+
+    def register_script(self, script):
+        return None
+
+    async def hget(self, key, field):
+        return self.services.get(field)
+
+def make_registry():
+    registry = ServiceRegistry(ScriptOnlyRedis(), ChatbotOrchestrator())
+    registry.snapshots = 0
+
+    async def load_snapshot():
+        registry.snapshots += 1
+        return registry.version
+
+    registry.load_snapshot = load_snapshot
+    return registry
+
+def change(version, op="register", name="remote", worker="other", **config):
+    config = {"name": name, "endpoint": "http://localhost:9000", "capabilities": ["chat"],
+              "description": name, **config}
+    return {"version": version, "op": op, "name": name, "config": json.dumps(config), "worker": worker}
+
+async def feed(registry, message):
+    """Deliver a change: its config goes in the services hash, the message only names the service."""
+    config = message.pop("config")
+    if message["op"] == "register":
+        registry.redis.services[message["name"]] = config
+    await registry._on_change(message)
+
+def definition(name, **fields):
+    return ServiceCreate(
+        name=name, endpoint="http://localhost:9000", capabilities=["chat"], description=name, **fields
+    )
+
+async def eventually(condition, timeout=2.0):
+    """Wait for another worker to apply a published change."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "change was not applied"
+        await asyncio.sleep(0.01)
+
+@pytest_asyncio.fixture
+async def workers():
+    """Two workers sharing one Redis, each with its own orchestrator."""
+    server = fakeredis.FakeServer()
+    registries = [
+        ServiceRegistry(
+            fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+            ChatbotOrchestrator(),
+            load_sync_interval=60
+        )
+        for _ in range(2)
+    ]
+    for registry in registries:
+        await registry.start()
+    yield registries
+    for registry in registries:
+        await registry.stop()
+
+def test_service_config_serializes_models_and_dataclasses():
+    model = ServiceCreateModel(name="a", endpoint="http://bot.example.com/query", capabilities=["chat"])
+    config = service_config(model)
+    assert config["endpoint"] == "http://bot.example.com/query"
+    assert json.loads(json.dumps(config)) == config
+
+    dataclass_config = service_config(ServiceCreate(
+        name="a", endpoint="http://localhost:9000", capabilities=["chat"], description=""
+    ))
+    assert dataclass_config["name"] == "a"
+
+@pytest.mark.asyncio
+async def test_changes_apply_incrementally_in_version_order():
+    registry = make_registry()
+    orchestrator = registry.orchestrator
+
+    await feed(registry, change(1, max_concurrent_requests=2))
+    assert orchestrator.services["remote"].max_concurrent_requests == 2
+
+    # Stale and own changes are not re-applied
+    await feed(registry, change(1, op="deregister"))
+    await feed(registry, change(2, op="deregister", worker=registry.worker_id))
+    assert "remote" in orchestrator.services
+    assert registry.version == 2
+
+    await feed(registry, change(3, op="deregister"))
+    assert "remote" not in orchestrator.services
+    assert registry.snapshots == 0
+
+@pytest.mark.asyncio
+async def test_missed_change_reloads_snapshot():
+    registry = make_registry()
+    await feed(registry, change(4))
+    assert registry.snapshots == 1
+    assert "remote" not in registry.orchestrator.services
+
+@pytest.mark.asyncio
+async def test_routing_uses_cluster_wide_load():
+    orchestrator = ChatbotOrchestrator(routing_strategy=LeastOutstandingStrategy())
+    for name in ("a", "b"):
+        await orchestrator.register_service(ServiceCreate(
+            name=name, endpoint="http://localhost:9000", capabilities=["chat"], description=name
+        ))
+    orchestrator._load_metrics["a"]["requests"] = 1
+    orchestrator.set_remote_load({"b": 5})
+
+    assert orchestrator.get_local_load() == {"a": 1, "b": 0}
+    assert orchestrator.get_service_metrics("b")["cluster_load"] == 5
+    assert (await orchestrator.route_query("hi")).name == "a"
+
+@pytest.mark.asyncio
+async def test_register_and_deregister_reach_other_workers(workers):
+    first, second = workers
+    await first.register(definition("shared", max_concurrent_requests=2))
+    assert "shared" in first.orchestrator.services
+    await eventually(lambda: "shared" in second.orchestrator.services)
+    assert second.orchestrator.services["shared"].max_concurrent_requests == 2
+    assert first.version == second.version == 1
+
+    await second.deregister("shared")
+    assert "shared" not in second.orchestrator.services
+    await eventually(lambda: "shared" not in first.orchestrator.services)
+    assert first.version == second.version == 2
+
+@pytest.mark.asyncio
+async def test_duplicate_and_unknown_changes_are_rejected(workers):
+    first, second = workers
+    await first.register(definition("shared"))
+    with pytest.raises(ValueError):
+        await second.register(definition("shared"))
+    with pytest.raises(KeyError):
+        await second.deregister("missing")
+    assert int(await first.redis.get(ServiceRegistry.VERSION_KEY)) == 1
+
+@pytest.mark.asyncio
+async def test_version_gap_reloads_snapshot(workers):
+    first, second = workers
+    # A change second never heard about, e.g. published while it was disconnected
+    await first.redis.hset(ServiceRegistry.SERVICES_KEY, "missed", json.dumps(service_config(definition("missed"))))
+    await first.redis.incr(ServiceRegistry.VERSION_KEY)
+
+    await first.register(definition("announced"))
+    await eventually(lambda: "announced" in second.orchestrator.services)
+    assert "missed" in second.orchestrator.services
+    assert second.version == 2
+
+@pytest.mark.asyncio
+async def test_load_snapshot_reconciles_with_redis():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    registry = ServiceRegistry(redis, ChatbotOrchestrator())
+    await registry.register(definition("kept"))
+    await registry.register(definition("removed"))
+    await registry.register(definition("changed"))
+
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hdel(ServiceRegistry.SERVICES_KEY, "removed")
+        pipe.hset(ServiceRegistry.SERVICES_KEY, "changed", json.dumps(
+            service_config(definition("changed", max_concurrent_requests=3))
+        ))
+        pipe.hset(ServiceRegistry.SERVICES_KEY, "added", json.dumps(service_config(definition("added"))))
+        pipe.set(ServiceRegistry.VERSION_KEY, 7)
+        await pipe.execute()
+
+    assert await registry.load_snapshot() == 7
+    services = registry.orchestrator.services
+    assert set(services) == {"kept", "changed", "added"}
+    assert services["changed"].max_concurrent_requests == 3
+
+@pytest.mark.asyncio
+async def test_remote_changes_keep_local_backends(workers):
+    first, second = workers
+    local = EchoBotService("shared")
+    await second.orchestrator.register_service(definition("shared"), backend=local)
+
+    await first.register(definition("shared"))
+    await first.register(definition("marker"))
+    await eventually(lambda: "marker" in second.orchestrator.services)
+    assert second.orchestrator.get_backend("shared") is local
+
+    await second.load_snapshot()
+    assert second.orchestrator.get_backend("shared") is local
+    await first.deregister("shared")
+    await first.deregister("marker")
+    await eventually(lambda: "marker" not in second.orchestrator.services)
+    assert second.orchestrator.get_backend("shared") is local
+
+@pytest.mark.asyncio
+async def test_orchestrator_is_handed_out_once_the_registry_has_loaded(monkeypatch):
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(dependencies, "get_redis_client", lambda: redis_client)
+    monkeypatch.setattr(settings, "REGISTRY_ENABLED", True)
+    monkeypatch.setattr(settings, "HEALTH_CHECK_ENABLED", False)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    load_snapshot = ServiceRegistry.load_snapshot
+
+    async def slow_load_snapshot(self):
+        await asyncio.sleep(0.05)
+        return await load_snapshot(self)
+
+    monkeypatch.setattr(ServiceRegistry, "load_snapshot", slow_load_snapshot)
+    async def request():
+        orchestrator = await dependencies.get_orchestrator()
+        return orchestrator, await dependencies.get_registry(orchestrator)
+
+    try:
+        (first, first_registry), (second, second_registry) = await asyncio.gather(request(), request())
+        assert first is second
+        # Neither request could register a service before the registry was following changes
+        assert first_registry is not None and second_registry is first_registry
+    finally:
+        await dependencies.close_orchestrator()
+
+@pytest.mark.asyncio
+async def test_published_changes_leave_out_credentials(workers):
+    first, second = workers
+    pubsub = first.redis.pubsub()
+    await pubsub.subscribe(ServiceRegistry.CHANGES_CHANNEL)
+    await first.register(definition("secret", api_key="sk-secret", headers={"X-Token": "hidden"}))
+
+    message = None
+    while message is None:
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+    await pubsub.aclose()
+    assert "sk-secret" not in message["data"] and "hidden" not in message["data"]
+    assert set(json.loads(message["data"])) == {"version", "op", "name", "worker"}
+
+    # Other workers still get the full config, credentials included
+    await eventually(lambda: "secret" in second.orchestrator.services)
+    assert second.orchestrator.get_backend("secret").headers["Authorization"] == "Bearer sk-secret"
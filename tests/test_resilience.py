@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.core.resilience import RetryBudget, latency_percentile
+from app.services.echo_bot import EchoBotService
+
+def make_service(name):
+    return ServiceCreate(name=name, endpoint="http://localhost", capabilities=["echo"], description=name)
+
+class FlakyBot(EchoBotService):
+    def __init__(self, failures):
+        super().__init__("flaky")
+        self.failures = failures
+        self.calls = 0
+
+    async def process_query(self, query):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("transient error")
+        return {"response": query}
+
+def test_latency_percentile():
+    samples = [0.1 * i for i in range(1, 11)]
+    assert latency_percentile(samples, 50) == pytest.approx(0.5)
+    assert latency_percentile(samples, 95) == pytest.approx(1.0)
+
+def test_retry_budget_caps_retries():
+    budget = RetryBudget(ratio=0.5, min_per_second=0, window=10)
+    for _ in range(4):
+        budget.record_request()
+    assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+    assert budget.get_stats() == {"retries_granted": 2, "retries_denied": 1}
+
+@pytest.mark.asyncio
+async def test_retries_transient_failures(monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_BACKOFF_SECONDS", 0)
+    orchestrator = ChatbotOrchestrator()
+    bot = FlakyBot(failures=1)
+    await orchestrator.register_service(make_service("flaky"), backend=bot)
+
+    response = await orchestrator.process_query("hi")
+    assert response["response"] == "hi"
+    assert bot.calls == 2
+    assert orchestrator.get_resilience_metrics()["retries"] == 1
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_stops_retries(monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_BACKOFF_SECONDS", 0)
+    orchestrator = ChatbotOrchestrator()
+    orchestrator.retry_budget = RetryBudget(ratio=0, min_per_second=0)
+    bot = FlakyBot(failures=1)
+    await orchestrator.register_service(make_service("flaky"), backend=bot)
+
+    assert "error" in await orchestrator.process_query("hi")
+    assert bot.calls == 1
+    assert orchestrator.get_resilience_metrics()["retries_denied"] == 1
+
+@pytest.mark.asyncio
+async def test_hedged_request_takes_faster_service(monkeypatch):
+    monkeypatch.setattr(settings, "HEDGING_ENABLED", True)
+    monkeypatch.setattr(settings, "HEDGE_DEFAULT_DELAY_SECONDS", 0.01)
+    orchestrator = ChatbotOrchestrator()
+    slow = EchoBotService("slow")
+    slow.set_response_time(1)
+    fast = EchoBotService("fast")
+    fast.set_response_time(0)
+    await orchestrator.register_service(make_service("slow"), backend=slow)
+    await orchestrator.register_service(make_service("fast"), backend=fast)
+    orchestrator._load_metrics["fast"]["requests"] = 1  # route the primary to "slow"
+
+    response = await asyncio.wait_for(orchestrator.process_query("hi"), 0.5)
+    assert response["service"] == "fast"
+    stats = orchestrator.get_resilience_metrics()
+    assert stats["hedged_requests"] == 1
+    assert stats["hedge_wins"] == 1
+
+    # The slow primary is cancelled rather than left running
+    await asyncio.sleep(0.01)
+    assert orchestrator.get_service_metrics("slow")["current_load"] == 0
@@ -0,0 +1,62 @@
+import asyncio
+import fakeredis
+import httpx
+import pytest
+from app.core.response_cache import ResponseCache
+from app.services.openai_service import OpenAIService
+
+def test_make_key_normalizes_whitespace():
+    key = ResponseCache.make_key("gpt", "What is  Redis?\n")
+    assert key == ResponseCache.make_key("gpt", " What is Redis? ")
+    assert key != ResponseCache.make_key("gpt", "What is Redis?", temperature=0.5)
+    assert key != ResponseCache.make_key("other", "What is Redis?")
+
+@pytest.mark.asyncio
+async def test_lookup_skips_nonzero_temperature():
+    cache = ResponseCache()
+    await cache.store("answer", "gpt", "hi", temperature=0.7)
+    assert await cache.lookup("gpt", "hi", temperature=0.7) is None
+
+    permissive = ResponseCache(allow_nonzero_temperature=True)
+    await permissive.store("answer", "gpt", "hi", temperature=0.7)
+    assert await permissive.lookup("gpt", "hi", temperature=0.7) == "answer"
+
+@pytest.mark.asyncio
+async def test_redis_entries_expire_after_ttl():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    for ttl, expected_ms in ((0.25, 250), (90, 90000)):
+        cache = ResponseCache(redis=redis, ttl_seconds=ttl)
+        await cache.set(f"key:{ttl}", "answer")
+        assert await redis.get(f"key:{ttl}") == '"answer"'
+        assert 0 < await redis.pttl(f"key:{ttl}") <= expected_ms
+
+@pytest.mark.asyncio
+async def test_local_copy_expires_with_the_redis_entry():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    await redis.set("key", '"answer"', px=50)
+
+    cache = ResponseCache(redis=redis, ttl_seconds=60)
+    assert await cache.get("key") == "answer"
+    await asyncio.sleep(0.1)
+    assert await redis.get("key") is None
+    assert await cache.get("key") is None
+
+@pytest.mark.asyncio
+async def test_openai_service_bypasses_upstream_on_hit(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "pong"}}]})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        service = OpenAIService(client=client, response_cache=ResponseCache())
+        service.api_key = "test-key"
+
+        assert await service.process_message("ping", temperature=0) == "pong"
+        assert await service.process_message("ping ", temperature=0) == "pong"
+        assert len(calls) == 1
+        assert service.response_cache.get_stats()["hits"] == 1
+
+        await service.process_message("ping", temperature=0.7)
+        assert len(calls) == 2
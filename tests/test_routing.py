@@ -0,0 +1,55 @@
+import random
+from types import SimpleNamespace
+from app.core.routing import (
+    EWMALatencyStrategy,
+    LeastOutstandingStrategy,
+    PowerOfTwoChoicesStrategy,
+    get_routing_strategy,
+    record_outcome,
+)
+import pytest
+
+def make_metrics(requests=0):
+    return {"requests": requests, "samples": 0, "ewma_latency": 0.0, "ewma_error_rate": 0.0}
+
+@pytest.fixture
+def services():
+    return [SimpleNamespace(name="fast"), SimpleNamespace(name="slow")]
+
+def test_record_outcome_tracks_ewma():
+    metrics = make_metrics()
+    record_outcome(metrics, 1.0, True, alpha=0.5)
+    assert metrics["ewma_latency"] == 1.0
+    record_outcome(metrics, 3.0, False, alpha=0.5)
+    assert metrics["ewma_latency"] == 2.0
+    assert metrics["ewma_error_rate"] == 0.5
+    assert metrics["samples"] == 2
+
+def test_least_outstanding(services):
+    load = {"fast": make_metrics(requests=3), "slow": make_metrics(requests=1)}
+    assert LeastOutstandingStrategy().select(services, load).name == "slow"
+
+def test_ewma_latency_prefers_fast_and_healthy(services):
+    load = {"fast": make_metrics(), "slow": make_metrics()}
+    record_outcome(load["fast"], 0.1, True)
+    record_outcome(load["slow"], 2.0, True)
+    assert EWMALatencyStrategy().select(services, load).name == "fast"
+
+    # A fast backend that keeps failing loses its traffic
+    for _ in range(10):
+        record_outcome(load["fast"], 0.1, False)
+    load["fast"]["ewma_latency"] = 1.5
+    assert EWMALatencyStrategy().select(services, load).name == "slow"
+
+def test_power_of_two_choices(services):
+    load = {"fast": make_metrics(), "slow": make_metrics()}
+    record_outcome(load["fast"], 0.1, True)
+    record_outcome(load["slow"], 2.0, True)
+    strategy = PowerOfTwoChoicesStrategy(rng=random.Random(0))
+    assert all(strategy.select(services, load).name == "fast" for _ in range(20))
+    assert strategy.select(services[:1], load).name == "fast"
+
+def test_get_routing_strategy():
+    assert isinstance(get_routing_strategy("power_of_two"), PowerOfTwoChoicesStrategy)
+    with pytest.raises(ValueError):
+        get_routing_strategy("unknown")
@@ -0,0 +1,73 @@
+import asyncio
+import json
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.dependencies import get_orchestrator
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.core.serialization import dumps
+from app.services.echo_bot import EchoBotService
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+def register(orchestrator, name):
+    bot = EchoBotService(name=name)
+    bot.set_response_time(0)
+    return asyncio.run(orchestrator.register_service(ServiceCreate(
+        name=name,
+        endpoint="http://bot.example.com/query",
+        capabilities=["echo"],
+        description=f"{name} service"
+    ), backend=bot))
+
+@pytest.fixture
+def client():
+    orchestrator = ChatbotOrchestrator()
+    register(orchestrator, "echo")
+    app.dependency_overrides[get_orchestrator] = lambda: orchestrator
+    yield TestClient(app), orchestrator
+    app.dependency_overrides.clear()
+
+def test_dumps_is_compact_and_handles_extra_types():
+    data = json.loads(dumps({"at": datetime(2024, 1, 1), 1: "one", "nested": [1.5, None]}))
+    assert data == {"at": "2024-01-01T00:00:00", "1": "one", "nested": [1.5, None]}
+    assert b" " not in dumps({"a": [1, 2]})
+
+def test_service_listing_is_rendered_once_per_registry_change():
+    orchestrator = ChatbotOrchestrator()
+    register(orchestrator, "a")
+    renders = []
+
+    def render(services):
+        renders.append([service.name for service in services])
+        return dumps(renders[-1])
+
+    assert orchestrator.get_services_payload(render) == orchestrator.get_services_payload(render)
+    register(orchestrator, "b")
+    orchestrator.get_services_payload(render)
+    orchestrator.set_service_active("a", False)
+    orchestrator.get_services_payload(render)
+    orchestrator.deregister_service("b")
+    orchestrator.get_services_payload(render)
+    assert renders == [["a"], ["a", "b"], ["b"], []]
+
+def test_list_services_matches_response_model(client):
+    client, orchestrator = client
+    services = client.get(f"{settings.API_V1_STR}/services/").json()
+    assert [service["name"] for service in services] == ["echo"]
+    assert services[0]["endpoint"] == "http://bot.example.com/query"
+    assert services[0]["success_rate"] == 100.0
+
+    register(orchestrator, "second")
+    assert len(client.get(f"{settings.API_V1_STR}/services/").json()) == 2
+
+def test_query_response_is_returned_as_is(client):
+    client, _ = client
+    response = client.post(f"{settings.API_V1_STR}/services/query", params={"query": "hi"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["response"] == "Echo: hi"
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.core.singleflight import SingleFlight
+from app.services.echo_bot import EchoBotService
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.get_stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+    # Once finished, the next call runs again
+    await flight.do("key", fetch)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_leader_disconnect_does_not_cancel_followers():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    leader = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "result"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+@pytest.mark.asyncio
+async def test_call_cancelled_when_all_waiters_leave():
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def fetch():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [asyncio.create_task(flight.do("key", fetch)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), 0.1)
+    await asyncio.sleep(0)
+    assert len(flight) == 0
+
+@pytest.mark.asyncio
+async def test_orchestrator_coalesces_identical_queries():
+    orchestrator = ChatbotOrchestrator()
+    calls = 0
+
+    class CountingBot(EchoBotService):
+        async def process_query(self, query):
+            nonlocal calls
+            calls += 1
+            return await super().process_query(query)
+
+    bot = CountingBot()
+    bot.set_response_time(0.01)
+    await orchestrator.register_service(ServiceCreate(
+        name="echo", endpoint="http://localhost", capabilities=[], description="echo"
+    ), backend=bot)
+
+    responses = await asyncio.gather(
+        *(orchestrator.process_query("popular  prompt") for _ in range(10))
+    )
+    assert calls == 1
+    assert all(r["response"] == "Echo: popular  prompt" for r in responses)
+    assert responses[0] is not responses[1]
+    assert orchestrator.get_resilience_metrics()["coalesced_requests"] == 9
+
+@pytest.mark.asyncio
+async def test_request_after_last_waiter_leaves_starts_a_new_call():
+    flight = SingleFlight()
+    started = 0
+
+    async def fetch():
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    waiter = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    # The abandoned call is cancelled but not finished yet; a new caller must not join it
+    assert await flight.do("key", fetch) == "result"
+    assert started == 2
+    assert flight.get_stats()["leaders"] == 2
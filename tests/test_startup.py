@@ -0,0 +1,49 @@
+import json
+import pathlib
+import subprocess
+import sys
+from benchmarks.startup import DEFERRED_MODULES, parse_importtime, summarize_imports
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       5000 | fastapi
+import time:      3000 |       3000 |   fastapi.routing
+import time:       500 |       5500 | app
+"""
+
+def test_parse_importtime():
+    modules = parse_importtime(IMPORTTIME)
+    assert [m["module"] for m in modules] == ["_io", "fastapi", "fastapi.routing", "app"]
+    assert modules[2] == {"module": "fastapi.routing", "depth": 1, "self_us": 3000, "cumulative_us": 3000}
+    assert modules[1]["depth"] == 0
+
+def test_summarize_imports():
+    summary = summarize_imports(parse_importtime(IMPORTTIME), top=2)
+    assert summary["total_ms"] == 5.6
+    assert [m["module"] for m in summary["slowest_modules"]] == ["app", "fastapi"]
+    assert summary["slowest_packages"][0] == {"package": "fastapi", "ms": 5.0}
+
+def test_importing_app_defers_heavy_modules():
+    code = "import json, sys, app.main; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT)
+    loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    assert not loaded & set(DEFERRED_MODULES)
+
+def test_importing_modules_does_not_load_settings():
+    # app.main builds its routes and middleware from the settings, so it is the one exception
+    modules = sorted(
+        ".".join(path.relative_to(ROOT).with_suffix("").parts)
+        for path in (ROOT / "app").rglob("*.py")
+        if path.name != "__init__.py" and path != ROOT / "app" / "main.py"
+    )
+    code = (
+        "import importlib\n"
+        f"for name in {modules!r}: importlib.import_module(name)\n"
+        "from app.core.config import get_settings\n"
+        "print(get_settings.cache_info().currsize)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT)
+    assert len(modules) > 20
+    assert result.stdout.strip().splitlines()[-1] == "0"
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.dependencies import get_orchestrator
+from app.core.orchestrator import ChatbotOrchestrator, ServiceCreate
+from app.services.echo_bot import EchoBotService
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+@pytest.fixture
+def orchestrator():
+    orchestrator = ChatbotOrchestrator()
+    bot = EchoBotService(name="echo")
+    bot.set_response_time(0.01)
+    asyncio.run(orchestrator.register_service(ServiceCreate(
+        name="echo",
+        endpoint="http://localhost:9000",
+        capabilities=["echo"],
+        description="Echo service"
+    ), backend=bot))
+    return orchestrator
+
+@pytest.mark.asyncio
+async def test_echo_bot_stream_query():
+    bot = EchoBotService()
+    bot.set_response_time(0)
+    chunks = [chunk async for chunk in bot.stream_query("hello world")]
+    assert "".join(chunks) == "Echo: hello world"
+
+@pytest.mark.asyncio
+async def test_orchestrator_stream_updates_metrics(orchestrator):
+    events = [event async for event in orchestrator.stream_query("hi there")]
+    assert all(event["service"] == "echo" for event in events)
+    assert "".join(event["chunk"] for event in events) == "Echo: hi there"
+
+    metrics = orchestrator.get_service_metrics("echo")
+    assert metrics["current_load"] == 0
+    assert metrics["total_requests"] == 1
+
+@pytest.mark.asyncio
+async def test_orchestrator_stream_releases_load_on_disconnect(orchestrator):
+    stream = orchestrator.stream_query("hi there")
+    await stream.__anext__()
+    assert orchestrator.get_service_metrics("echo")["current_load"] == 1
+    await stream.aclose()
+
+    metrics = orchestrator.get_service_metrics("echo")
+    assert metrics["current_load"] == 0
+    assert metrics["total_requests"] == 0
+
+@pytest.mark.asyncio
+async def test_orchestrator_stream_without_services():
+    events = [event async for event in ChatbotOrchestrator().stream_query("hi")]
+    assert events == [{"error": "No suitable service found for query"}]
+
+def test_sse_and_websocket_endpoints(orchestrator):
+    app.dependency_overrides[get_orchestrator] = lambda: orchestrator
+    try:
+        client = TestClient(app)
+        response = client.post("/api/v1/services/query/stream", params={"query": "ping"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert "event: done" in response.text
+        data = [
+            json.loads(line[len("data: "):])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert data[-1] == {"service": "echo"}
+
+        with client.websocket_connect("/api/v1/services/query/ws") as websocket:
+            websocket.send_text("ping")
+            messages = []
+            while True:
+                message = websocket.receive_json()
+                messages.append(message)
+                if message.get("done"):
+                    break
+        assert messages[-1] == {"done": True, "service": "echo"}
+        assert "".join(m["chunk"] for m in messages[:-1]).endswith("ping")
+    finally:
+        app.dependency_overrides.clear()
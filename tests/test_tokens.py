@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from app.core import tokens
+from app.core.config import settings
+from app.core.tokens import (
+    MESSAGE_OVERHEAD_TOKENS,
+    TokenCounter,
+    context_window,
+    fit_history,
+    get_token_counter,
+    history_budget,
+    load_token_counter,
+)
+from app.services.openai_service import OpenAIService
+
+class CharEncoding:
+    """One token per character, so budgets are easy to reason about."""
+    name = "chars"
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.calls += 1
+        return list(text)
+
+def test_context_window_matches_longest_prefix():
+    assert context_window("gpt-4") == 8192
+    assert context_window("gpt-4-32k-0613") == 32768
+    assert context_window("unknown-model") == settings.DEFAULT_CONTEXT_WINDOW_TOKENS
+
+class FlakyTiktoken:
+    """Stands in for tiktoken's loader: fails until ``available``, then counts loads and threads."""
+
+    def __init__(self):
+        self.available = False
+        self.loads = 0
+        self.threads = set()
+
+    def encoding_for_model(self, model):
+        self.loads += 1
+        self.threads.add(threading.current_thread())
+        if not self.available:
+            raise ConnectionError("encoding files unreachable")
+        time.sleep(0.05)
+        return CharEncoding()
+
+@pytest.fixture
+def tiktoken_loader(monkeypatch):
+    import tiktoken
+
+    loader = FlakyTiktoken()
+    monkeypatch.setattr(tiktoken, "encoding_for_model", loader.encoding_for_model)
+    monkeypatch.setattr(tokens, "_token_counters", {})
+    monkeypatch.setattr(tokens, "_retry_at", {})
+    return loader
+
+def test_failed_encoding_load_is_retried_later(tiktoken_loader, monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    assert get_token_counter("gpt-4").name == "approx"
+    # Approximated without retrying until the retry delay has passed
+    assert get_token_counter("gpt-4").name == "approx"
+    assert tiktoken_loader.loads == 1
+
+    tiktoken_loader.available = True
+    now += settings.TOKENIZER_RETRY_SECONDS + 1
+    assert get_token_counter("gpt-4").name == "chars"
+    assert get_token_counter("gpt-4") is get_token_counter("gpt-4")
+    assert tiktoken_loader.loads == 2
+
+@pytest.mark.asyncio
+async def test_load_token_counter_loads_once_off_the_event_loop(tiktoken_loader):
+    tiktoken_loader.available = True
+    counters = await asyncio.gather(*(load_token_counter("gpt-4") for _ in range(5)))
+
+    assert all(counter is counters[0] for counter in counters)
+    assert counters[0].name == "chars"
+    assert tiktoken_loader.loads == 1
+    assert threading.current_thread() not in tiktoken_loader.threads
+
+def test_message_tokens_reuses_stored_count():
+    encoding = CharEncoding()
+    counter = TokenCounter(encoding)
+    message = {"role": "user", "content": "hello"}
+
+    assert counter.message_tokens(message) == 5
+    assert counter.message_tokens(message) == 5
+    assert encoding.calls == 1
+    assert message["token_encoding"] == "chars"
+
+    # A count made with another encoding is recomputed
+    stale = {"role": "user", "content": "hello", "token_count": 2, "token_encoding": "approx"}
+    assert counter.message_tokens(stale) == 5
+
+def test_fit_history_keeps_most_recent_within_budget():
+    counter = TokenCounter(CharEncoding())
+    history = [
+        {"role": "user", "content": "x" * 100},
+        {"role": "assistant", "content": "a" * 10},
+        {"role": "user", "content": "b" * 10},
+    ]
+    budget = 2 * (10 + MESSAGE_OVERHEAD_TOKENS)
+
+    kept, evicted = fit_history(history, budget, counter)
+    assert kept == history[1:]
+    assert evicted == history[:1]
+
+    kept, evicted = fit_history(history, budget - 1, counter)
+    assert kept == history[2:]
+
+def test_history_budget_reserves_reply_tokens():
+    counter = TokenCounter(CharEncoding())
+    budget = history_budget("gpt-4", counter, "system", "hi", max_tokens=1000)
+    assert budget < 8192 - 1000
+    assert history_budget("gpt-4", counter, "system", "hi", max_tokens=10000) == 0
+
+@pytest.mark.asyncio
+async def test_openai_service_summarizes_evicted_turns(monkeypatch):
+    async def char_counter(model):
+        return TokenCounter(CharEncoding())
+
+    monkeypatch.setattr("app.services.openai_service.load_token_counter", char_counter)
+    monkeypatch.setattr(settings, "SUMMARIZE_EVICTED_HISTORY", True)
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "earlier chat"}}]})
+
+    history = [
+        {"role": "user", "content": "x" * 6000},
+        {"role": "assistant", "content": "short answer"},
+    ]
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        service = OpenAIService(client=client)
+        service.model = "gpt-4"
+
+        messages = await service._build_messages("next", history, max_tokens=2000)
+        assert [m["content"] for m in messages[2:]] == ["short answer", "next"]
+        assert messages[1] == {
+            "role": "system",
+            "content": "Summary of the earlier conversation: earlier chat"
+        }
+
+        # The summary of unchanged evicted turns is reused
+        await service._build_messages("again", history, max_tokens=2000)
+        assert len(requests) == 1